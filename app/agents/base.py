@@ -8,7 +8,10 @@ from uuid import UUID
 import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agents.batch import decode_batch_parts, encode_batch
 from app.config import get_settings
+from app.db.database import current_session
+from app.services.http_client import pooled_request
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -22,7 +25,12 @@ class BaseAgent(ABC):
     def __init__(self, access_token: str, user_id: UUID, db: AsyncSession):
         self.access_token = access_token
         self.user_id = user_id
-        self.db = db
+        self._db = db
+
+    @property
+    def db(self) -> AsyncSession:
+        """The running step's own session when the orchestrator opened one, else the request's."""
+        return current_session.get() or self._db
 
     def _headers(self) -> dict[str, str]:
         return {"Authorization": f"Bearer {self.access_token}"}
@@ -41,26 +49,60 @@ class BaseAgent(ABC):
             logger.debug("DEMO: %s %s params=%s", method, url, params)
             return route_mock_request(method, url, params=params, json_body=json_body)
 
+        resp = await self._send(method, url, params=params, json=json_body)
+        if resp.status_code == 204 or not resp.content:
+            return {}
+        return resp.json()
+
+    async def _batch_request(self, batch_url: str, requests: list[dict]) -> list[dict | None]:
+        """Send several ``{"method", "url", "params"}`` sub-requests in one batch call.
+
+        Results keep the order of ``requests``. Sub-requests that failed inside the
+        batch (429, 5xx, missing parts) are re-sent one by one through ``_send``'s
+        backoff and raise if they still fail; only 404s come back as ``None``.
+        """
+        if not requests:
+            return []
+        if settings.demo_mode:
+            from app.agents.mock_data import route_mock_request
+            logger.debug("DEMO: batch of %d to %s", len(requests), batch_url)
+            return route_mock_request("POST", batch_url, json_body={"requests": requests})["responses"]
+
+        boundary, body = encode_batch(requests)
+        resp = await self._send(
+            "POST",
+            batch_url,
+            content=body,
+            headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+        )
+        parts = decode_batch_parts(resp.headers.get("Content-Type", ""), resp.content, len(requests))
+
+        results: list[dict | None] = []
+        for req, (status, body) in zip(requests, parts):
+            if status is not None and (200 <= status < 300 or status == 404):
+                results.append(body)
+            else:
+                results.append(await self._request(req.get("method", "GET"), req["url"], params=req.get("params")))
+        return results
+
+    async def _send(self, method: str, url: str, *, headers: dict | None = None, **kwargs) -> httpx.Response:
+        """Send a request through the shared pool with retry + exponential backoff."""
         last_exc: Exception | None = None
         for attempt in range(settings.google_api_retry_attempts):
             try:
-                async with httpx.AsyncClient(timeout=15.0) as client:
-                    resp = await client.request(
-                        method,
-                        url,
-                        headers=self._headers(),
-                        params=params,
-                        json=json_body,
-                    )
-                    if resp.status_code == 429:
-                        delay = settings.google_api_retry_base_delay * (2 ** attempt)
-                        logger.warning("Rate limited on %s, retrying in %.1fs", url, delay)
-                        await asyncio.sleep(delay)
-                        continue
-                    resp.raise_for_status()
-                    if resp.status_code == 204 or not resp.content:
-                        return {}
-                    return resp.json()
+                resp = await pooled_request(
+                    method,
+                    url,
+                    headers={**self._headers(), **(headers or {})},
+                    **kwargs,
+                )
+                if resp.status_code == 429:
+                    delay = settings.google_api_retry_base_delay * (2 ** attempt)
+                    logger.warning("Rate limited on %s, retrying in %.1fs", url, delay)
+                    await asyncio.sleep(delay)
+                    continue
+                resp.raise_for_status()
+                return resp
             except httpx.HTTPStatusError as e:
                 last_exc = e
                 if e.response.status_code >= 500:
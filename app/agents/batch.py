@@ -0,0 +1,78 @@
+"""Encode and decode Google API ``multipart/mixed`` batch requests."""
+
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+GMAIL_BATCH_URL = "https://www.googleapis.com/batch/gmail/v1"
+GCAL_BATCH_URL = "https://www.googleapis.com/batch/calendar/v3"
+DRIVE_BATCH_URL = "https://www.googleapis.com/batch/drive/v3"
+
+
+def encode_batch(requests: list[dict]) -> tuple[str, bytes]:
+    """Build a batch body from ``{"method", "url", "params"}`` sub-requests.
+
+    Returns the multipart boundary and the encoded body. Each part carries a
+    ``Content-ID`` of ``<item-N>`` so responses can be matched back to their index.
+    """
+    boundary = f"batch_{uuid.uuid4().hex}"
+    lines: list[str] = []
+    for i, req in enumerate(requests):
+        url = httpx.URL(req["url"], params=req.get("params"))
+        lines += [
+            f"--{boundary}",
+            "Content-Type: application/http",
+            f"Content-ID: <item-{i}>",
+            "",
+            f"{req.get('method', 'GET')} {url.raw_path.decode()}",
+            "",
+        ]
+    lines.append(f"--{boundary}--")
+    return boundary, "\r\n".join(lines).encode()
+
+
+def decode_batch_parts(content_type: str, content: bytes, expected: int) -> list[tuple[int | None, dict | None]]:
+    """Parse a batch response into ``(status, body)`` pairs ordered like the original sub-requests.
+
+    Sub-requests missing from the response come back as ``(None, None)``; failed
+    ones (non-2xx) keep their status with a ``None`` body.
+    """
+    results: list[tuple[int | None, dict | None]] = [(None, None)] * expected
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + content
+    )
+    if not message.is_multipart():
+        logger.warning("Batch response was not multipart: %s", content_type)
+        return results
+
+    for part in message.iter_parts():
+        content_id = (part.get("Content-ID") or "").strip("<>")
+        try:
+            index = int(content_id.rsplit("-", 1)[-1])
+        except ValueError:
+            continue
+        if not 0 <= index < expected:
+            continue
+
+        payload = part.get_payload(decode=True) or b""
+        head, _, body = payload.replace(b"\r\n", b"\n").partition(b"\n\n")
+        status_line = head.split(b"\n", 1)[0].decode(errors="replace")
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            continue
+        if not 200 <= status < 300:
+            logger.warning("Batch item %s failed: %s", index, status_line)
+            results[index] = (status, None)
+            continue
+        results[index] = (status, json.loads(body) if body.strip() else {})
+
+    return results
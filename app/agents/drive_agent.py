@@ -9,6 +9,7 @@ from app.services.vector_search import hybrid_search_files
 logger = logging.getLogger(__name__)
 
 DRIVE_API = "https://www.googleapis.com/drive/v3"
+FILE_FIELDS = "id,name,mimeType,modifiedTime,description,trashed"
 
 
 class DriveAgent(BaseAgent):
@@ -20,7 +21,7 @@ class DriveAgent(BaseAgent):
     async def get_context(self, resource_id: str) -> dict:
         return await self.get_file(file_id=resource_id)
 
-    async def search_files(
+    def search_params(
         self,
         query: str | None = None,
         keyword: str | None = None,
@@ -29,19 +30,34 @@ class DriveAgent(BaseAgent):
         date_to: str | None = None,
         limit: int = 5,
         **kwargs,
-    ) -> list[dict]:
-        search_query = keyword or query or ""
-
-        df = datetime.fromisoformat(date_from) if date_from else None
-        dt = datetime.fromisoformat(date_to) if date_to else None
+    ) -> dict:
+        """Keyword arguments for ``hybrid_search_files`` derived from step params."""
+        return {
+            "query": keyword or query or "",
+            "mime_type": mime_type,
+            "date_from": datetime.fromisoformat(date_from) if date_from else None,
+            "date_to": datetime.fromisoformat(date_to) if date_to else None,
+            "limit": limit,
+        }
 
-        results = await hybrid_search_files(
-            self.db, self.user_id, search_query,
-            mime_type=mime_type, date_from=df, date_to=dt, limit=limit,
-        )
+    async def search_files(
+        self,
+        query: str | None = None,
+        *,
+        query_embedding: list[float] | None = None,
+        prefetched: list[dict] | None = None,
+        **params,
+    ) -> list[dict]:
+        search = self.search_params(query=query, **params)
+        if prefetched is not None:
+            results = prefetched
+        else:
+            results = await hybrid_search_files(self.db, self.user_id, **search, query_embedding=query_embedding)
 
         if not results:
-            results = await self._api_search(query=search_query, mime_type=mime_type, max_results=limit)
+            results = await self._api_search(
+                query=search["query"], mime_type=search["mime_type"], max_results=search["limit"],
+            )
 
         return results
 
@@ -77,6 +93,66 @@ class DriveAgent(BaseAgent):
             for f in data.get("files", [])
         ]
 
+    async def get_start_page_token(self) -> str:
+        """Cursor for ``changes.list`` marking the current state of the Drive."""
+        data = await self._request("GET", f"{DRIVE_API}/changes/startPageToken")
+        return data["startPageToken"]
+
+    async def list_all_files(self, max_results: int) -> list[dict]:
+        """Raw metadata for the most recently modified files, up to ``max_results``."""
+        files: list[dict] = []
+        page_token: str | None = None
+        while len(files) < max_results:
+            params: dict = {
+                "pageSize": min(max_results - len(files), 1000),
+                "fields": f"nextPageToken,files({FILE_FIELDS})",
+                "q": "trashed = false",
+                "orderBy": "modifiedTime desc",
+            }
+            if page_token:
+                params["pageToken"] = page_token
+            data = await self._request("GET", f"{DRIVE_API}/files", params=params)
+            files.extend(data.get("files", []))
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                break
+        return files[:max_results]
+
+    async def list_changes(self, page_token: str) -> tuple[list[dict], list[str], str]:
+        """Files changed since ``page_token``.
+
+        Returns ``(changed_files, removed_file_ids, new_start_page_token)``. Trashed
+        files count as removed.
+        """
+        changed: dict[str, dict] = {}
+        removed: dict[str, None] = {}
+        while True:
+            data = await self._request(
+                "GET",
+                f"{DRIVE_API}/changes",
+                params={
+                    "pageToken": page_token,
+                    "pageSize": 1000,
+                    "fields": f"nextPageToken,newStartPageToken,changes(changeType,fileId,removed,file({FILE_FIELDS}))",
+                },
+            )
+            for change in data.get("changes", []):
+                # Shared drive changes (changeType "drive") carry no fileId
+                file_id = change.get("fileId")
+                if change.get("changeType", "file") != "file" or not file_id:
+                    continue
+                file = change.get("file") or {}
+                if change.get("removed") or file.get("trashed"):
+                    changed.pop(file_id, None)
+                    removed[file_id] = None
+                else:
+                    removed.pop(file_id, None)
+                    changed[file_id] = file
+
+            if "newStartPageToken" in data:
+                return list(changed.values()), list(removed), data["newStartPageToken"]
+            page_token = data["nextPageToken"]
+
     async def get_file(self, file_id: str, **kwargs) -> dict:
         data = await self._request(
             "GET",
@@ -20,7 +20,7 @@ class GCalAgent(BaseAgent):
     async def get_context(self, resource_id: str) -> dict:
         return await self.get_event(event_id=resource_id)
 
-    async def search_events(
+    def search_params(
         self,
         query: str | None = None,
         keyword: str | None = None,
@@ -31,9 +31,8 @@ class GCalAgent(BaseAgent):
         attendee_email: str | None = None,
         limit: int = 10,
         **kwargs,
-    ) -> list[dict]:
-        search_query = keyword or query or ""
-
+    ) -> dict:
+        """Keyword arguments for ``hybrid_search_events`` derived from step params."""
         df = datetime.fromisoformat(date_from) if date_from else None
         dt = datetime.fromisoformat(date_to) if date_to else None
 
@@ -49,16 +48,32 @@ class GCalAgent(BaseAgent):
         if attendee_email:
             attendees_filter.append(attendee_email)
 
-        results = await hybrid_search_events(
-            self.db, self.user_id, search_query,
-            date_from=df, date_to=dt,
-            attendees=attendees_filter or None,
-            limit=limit,
-        )
+        return {
+            "query": keyword or query or "",
+            "date_from": df,
+            "date_to": dt,
+            "attendees": attendees_filter or None,
+            "limit": limit,
+        }
+
+    async def search_events(
+        self,
+        query: str | None = None,
+        *,
+        query_embedding: list[float] | None = None,
+        prefetched: list[dict] | None = None,
+        **params,
+    ) -> list[dict]:
+        search = self.search_params(query=query, **params)
+        if prefetched is not None:
+            results = prefetched
+        else:
+            results = await hybrid_search_events(self.db, self.user_id, **search, query_embedding=query_embedding)
 
         if not results:
             results = await self._api_search(
-                query=search_query, time_min=df, time_max=dt, max_results=limit,
+                query=search["query"], time_min=search["date_from"], time_max=search["date_to"],
+                max_results=search["limit"],
             )
 
         return results
@@ -94,6 +109,36 @@ class GCalAgent(BaseAgent):
             for ev in data.get("items", [])
         ]
 
+    async def list_event_changes(
+        self,
+        sync_token: str | None = None,
+        max_results: int | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """Raw events changed since ``sync_token``, or all upcoming events when it is ``None``.
+
+        Returns ``(items, next_sync_token)``. Deleted events come back with
+        ``status == "cancelled"``. ``next_sync_token`` is ``None`` when ``max_results``
+        cut a full listing short. An expired token raises ``httpx.HTTPStatusError`` (410).
+        """
+        items: list[dict] = []
+        page_token: str | None = None
+        while True:
+            params: dict = {"maxResults": 250, "singleEvents": "true"}
+            if sync_token:
+                params["syncToken"] = sync_token
+            else:
+                params["timeMin"] = datetime.now(timezone.utc).isoformat()
+            if page_token:
+                params["pageToken"] = page_token
+            data = await self._request("GET", f"{GCAL_API}/calendars/primary/events", params=params)
+            items.extend(data.get("items", []))
+
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                return items, data.get("nextSyncToken")
+            if not sync_token and max_results is not None and len(items) >= max_results:
+                return items[:max_results], None
+
     async def get_event(self, event_id: str, **kwargs) -> dict:
         data = await self._request("GET", f"{GCAL_API}/calendars/primary/events/{event_id}")
         return {
@@ -6,13 +6,30 @@ from datetime import datetime
 from email.mime.text import MIMEText
 
 from app.agents.base import BaseAgent
+from app.agents.batch import GMAIL_BATCH_URL
+from app.config import get_settings
 from app.services.vector_search import hybrid_search_emails
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 GMAIL_API = "https://www.googleapis.com/gmail/v1/users/me"
 
 
+def _parse_message(data: dict) -> dict:
+    headers = {h["name"]: h["value"] for h in data.get("payload", {}).get("headers", [])}
+    return {
+        "email_id": data["id"],
+        "thread_id": data.get("threadId"),
+        "subject": headers.get("Subject", ""),
+        "sender": headers.get("From", ""),
+        "to": headers.get("To", ""),
+        "date": headers.get("Date", ""),
+        "snippet": data.get("snippet", ""),
+        "labels": data.get("labelIds", []),
+    }
+
+
 class GmailAgent(BaseAgent):
     SERVICE_NAME = "gmail"
 
@@ -22,7 +39,7 @@ class GmailAgent(BaseAgent):
     async def get_context(self, resource_id: str) -> dict:
         return await self.get_email(email_id=resource_id)
 
-    async def search_emails(
+    def search_params(
         self,
         query: str | None = None,
         keyword: str | None = None,
@@ -31,22 +48,39 @@ class GmailAgent(BaseAgent):
         date_to: str | None = None,
         limit: int = 5,
         **kwargs,
-    ) -> list[dict]:
-        """Hybrid search: vector similarity on cache + metadata filters."""
-        search_query = keyword or query or ""
+    ) -> dict:
+        """Keyword arguments for ``hybrid_search_emails`` derived from step params."""
+        return {
+            "query": keyword or query or "",
+            "sender": sender,
+            # Parse date strings to datetime
+            "date_from": datetime.fromisoformat(date_from) if date_from else None,
+            "date_to": datetime.fromisoformat(date_to) if date_to else None,
+            "limit": limit,
+        }
 
-        # Parse date strings to datetime
-        df = datetime.fromisoformat(date_from) if date_from else None
-        dt = datetime.fromisoformat(date_to) if date_to else None
+    async def search_emails(
+        self,
+        query: str | None = None,
+        *,
+        query_embedding: list[float] | None = None,
+        prefetched: list[dict] | None = None,
+        **params,
+    ) -> list[dict]:
+        """Hybrid search: vector similarity on cache + metadata filters.
 
-        results = await hybrid_search_emails(
-            self.db, self.user_id, search_query,
-            sender=sender, date_from=df, date_to=dt, limit=limit,
-        )
+        ``prefetched`` holds cache results already fetched by a combined
+        cross-service search; the API fallback still applies when it is empty.
+        """
+        search = self.search_params(query=query, **params)
+        if prefetched is not None:
+            results = prefetched
+        else:
+            results = await hybrid_search_emails(self.db, self.user_id, **search, query_embedding=query_embedding)
 
         if not results:
             # Fallback: direct Gmail API search
-            results = await self._api_search(search_query, sender=sender, max_results=limit)
+            results = await self._api_search(search["query"], sender=search["sender"], max_results=search["limit"])
 
         return results
 
@@ -68,26 +102,86 @@ class GmailAgent(BaseAgent):
         )
 
         messages = data.get("messages", [])
-        results = []
-        for msg in messages[:max_results]:
-            detail = await self.get_email(msg["id"])
-            results.append(detail)
-        return results
+        return await self.get_emails([msg["id"] for msg in messages[:max_results]])
+
+    async def get_history_id(self) -> str:
+        """Current mailbox history ID, the cursor for incremental sync."""
+        data = await self._request("GET", f"{GMAIL_API}/profile")
+        return str(data["historyId"])
+
+    async def list_message_ids(self, max_results: int) -> list[str]:
+        """Newest message IDs, following ``nextPageToken`` up to ``max_results``."""
+        ids: list[str] = []
+        page_token: str | None = None
+        while len(ids) < max_results:
+            params: dict = {"maxResults": min(max_results - len(ids), 500)}
+            if page_token:
+                params["pageToken"] = page_token
+            data = await self._request("GET", f"{GMAIL_API}/messages", params=params)
+            ids.extend(m["id"] for m in data.get("messages", []))
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                break
+        return ids[:max_results]
+
+    async def list_history(self, start_history_id: str) -> tuple[list[str], list[str], str]:
+        """Messages added and deleted since ``start_history_id``.
+
+        Returns ``(added_ids, deleted_ids, latest_history_id)``. Gmail answers 404
+        once the start ID has expired, which surfaces as ``httpx.HTTPStatusError``.
+        """
+        added: dict[str, None] = {}
+        deleted: dict[str, None] = {}
+        history_id = start_history_id
+        page_token: str | None = None
+        while True:
+            params: dict = {
+                "startHistoryId": start_history_id,
+                "historyTypes": ["messageAdded", "messageDeleted"],
+            }
+            if page_token:
+                params["pageToken"] = page_token
+            data = await self._request("GET", f"{GMAIL_API}/history", params=params)
+
+            for record in data.get("history", []):
+                for item in record.get("messagesAdded", []):
+                    msg_id = item["message"]["id"]
+                    deleted.pop(msg_id, None)
+                    added[msg_id] = None
+                for item in record.get("messagesDeleted", []):
+                    msg_id = item["message"]["id"]
+                    added.pop(msg_id, None)
+                    deleted[msg_id] = None
+
+            history_id = str(data.get("historyId", history_id))
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                break
+        return list(added), list(deleted), history_id
 
     async def get_email(self, email_id: str, **kwargs) -> dict:
         data = await self._request("GET", f"{GMAIL_API}/messages/{email_id}", params={"format": "metadata"})
+        return _parse_message(data)
 
-        headers = {h["name"]: h["value"] for h in data.get("payload", {}).get("headers", [])}
-        return {
-            "email_id": data["id"],
-            "thread_id": data.get("threadId"),
-            "subject": headers.get("Subject", ""),
-            "sender": headers.get("From", ""),
-            "to": headers.get("To", ""),
-            "date": headers.get("Date", ""),
-            "snippet": data.get("snippet", ""),
-            "labels": data.get("labelIds", []),
-        }
+    async def get_emails(self, email_ids: list[str], **kwargs) -> list[dict]:
+        """Fetch metadata for many messages via the Gmail batch endpoint.
+
+        Deleted messages (404) are skipped; any other failure raises, so incremental
+        sync keeps its old cursor. Order follows ``email_ids``.
+        """
+        results = []
+        batch_size = settings.google_api_batch_size
+        for start in range(0, len(email_ids), batch_size):
+            chunk = email_ids[start : start + batch_size]
+            responses = await self._batch_request(
+                GMAIL_BATCH_URL,
+                [
+                    {"method": "GET", "url": f"{GMAIL_API}/messages/{email_id}", "params": {"format": "metadata"}}
+                    for email_id in chunk
+                ],
+            )
+            results.extend(_parse_message(data) for data in responses if data)
+        return results
 
     async def draft_email(
         self,
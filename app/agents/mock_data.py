@@ -302,6 +302,25 @@ def mock_gmail_message_get(message_id: str) -> dict:
     return {"id": message_id, "snippet": "", "payload": {"headers": []}}
 
 
+def mock_gmail_batch(requests: list[dict]) -> dict:
+    """Simulate POST /batch/gmail/v1 — one response per sub-request, in order."""
+    responses = []
+    for req in requests:
+        data = route_mock_request(req.get("method", "GET"), req["url"], params=req.get("params"))
+        responses.append(data if data.get("payload", {}).get("headers") else None)
+    return {"responses": responses}
+
+
+def mock_gmail_profile() -> dict:
+    """Simulate GET /gmail/v1/users/me/profile response."""
+    return {"emailAddress": "demo@workspace.dev", "messagesTotal": len(MOCK_EMAILS), "historyId": "1000"}
+
+
+def mock_gmail_history_list(start_history_id: str = "") -> dict:
+    """Simulate GET /gmail/v1/users/me/history — the demo mailbox never changes."""
+    return {"history": [], "historyId": start_history_id or "1000"}
+
+
 def mock_gmail_draft_create(**kwargs) -> dict:
     return {"id": "draft_demo_001", "message": {"id": "msg_draft_001"}}
 
@@ -327,7 +346,7 @@ def mock_gcal_events_list(query: str = "", time_min: str = "", time_max: str = "
                 "location": ev["location"],
                 "status": ev["status"],
             })
-    return {"items": items}
+    return {"items": items, "nextSyncToken": "demo_sync_token"}
 
 
 def mock_gcal_event_get(event_id: str) -> dict:
@@ -363,6 +382,11 @@ def mock_drive_files_list(query: str = "") -> dict:
     return {"files": files}
 
 
+def mock_drive_changes_list(page_token: str = "") -> dict:
+    """Simulate GET /drive/v3/changes — the demo Drive never changes."""
+    return {"changes": [], "newStartPageToken": page_token or "demo_page_token"}
+
+
 def mock_drive_file_get(file_id: str) -> dict:
     for f in MOCK_FILES:
         if f["file_id"] == file_id:
@@ -383,7 +407,13 @@ def route_mock_request(method: str, url: str, params: dict | None = None, json_b
     params = params or {}
 
     # Gmail
+    if url.endswith("/batch/gmail/v1") and method == "POST":
+        return mock_gmail_batch((json_body or {}).get("requests", []))
     if "/gmail/" in url:
+        if url.endswith("/profile") and method == "GET":
+            return mock_gmail_profile()
+        if url.endswith("/history") and method == "GET":
+            return mock_gmail_history_list(params.get("startHistoryId", ""))
         if url.endswith("/messages") and method == "GET":
             return mock_gmail_messages_list(params.get("q", ""))
         if "/messages/" in url and method == "GET":
@@ -398,6 +428,8 @@ def route_mock_request(method: str, url: str, params: dict | None = None, json_b
 
     # Calendar
     if "/calendar/" in url:
+        if url.endswith("/events") and method == "GET" and params.get("syncToken"):
+            return {"items": [], "nextSyncToken": params["syncToken"]}
         if url.endswith("/events") and method == "GET":
             return mock_gcal_events_list(params.get("q", ""), params.get("timeMin", ""), params.get("timeMax", ""))
         if "/events/" in url and method == "GET":
@@ -411,6 +443,10 @@ def route_mock_request(method: str, url: str, params: dict | None = None, json_b
 
     # Drive
     if "/drive/" in url:
+        if url.endswith("/changes/startPageToken"):
+            return {"startPageToken": "demo_page_token"}
+        if url.endswith("/changes") and method == "GET":
+            return mock_drive_changes_list(params.get("pageToken", ""))
         if url.endswith("/files") and method == "GET":
             q = params.get("q", "")
             search_term = ""
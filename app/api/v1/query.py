@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 import uuid
+from collections.abc import AsyncIterator
 
 from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,11 +16,18 @@ from app.config import get_settings
 from app.core.intent_classifier import classify_intent
 from app.core.orchestrator import ServiceOrchestrator
 from app.core.query_planner import build_execution_plan
-from app.core.response_synthesizer import synthesize_response
-from app.db.database import get_db
+from app.core.response_synthesizer import stream_response, summarize_actions, synthesize_response
+from app.db.database import async_session_factory, get_db
 from app.models.conversation import Conversation
 from app.models.user import User
-from app.schemas.query import QueryRequest, QueryResponse
+from app.schemas.query import (
+    ActionTaken,
+    ClassifiedIntent,
+    ExecutionPlan,
+    QueryRequest,
+    QueryResponse,
+    StepResult,
+)
 from app.services.google_auth import get_valid_token
 
 logger = logging.getLogger(__name__)
@@ -24,16 +35,8 @@ settings = get_settings()
 router = APIRouter(tags=["query"])
 
 
-@router.post("/query", response_model=QueryResponse)
-async def process_query(
-    request: QueryRequest,
-    db: AsyncSession = Depends(get_db),
-    x_user_id: str = Header(..., description="Authenticated user ID"),
-):
-    """Process a natural language query against Google Workspace."""
-    user_id = uuid.UUID(x_user_id)
-
-    # Rate limiting
+async def _authorize(db: AsyncSession, user_id: uuid.UUID) -> str:
+    """Apply the rate limit and return the user's valid Google access token."""
     allowed = await rate_limit_check(str(user_id), limit=settings.max_queries_per_hour)
     if not allowed:
         raise HTTPException(status_code=429, detail="Rate limit exceeded. Try again later.")
@@ -45,65 +48,170 @@ async def process_query(
         raise HTTPException(status_code=404, detail="User not found")
 
     try:
-        access_token = await get_valid_token(user, db)
+        return await get_valid_token(user, db)
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
 
-    # Conversation context
-    context = await get_conversation_context(str(user_id))
-    await store_conversation_context(str(user_id), request.query)
 
-    # 1. Classify intent
-    intent = await classify_intent(request.query, conversation_context=context)
-    logger.info("Classified intent: %s (confidence=%.2f)", intent.intent, intent.confidence)
+def _needs_clarification(intent: ClassifiedIntent) -> bool:
+    return bool(intent.ambiguities) and intent.confidence < 0.5
 
-    # Handle ambiguities
-    if intent.ambiguities and intent.confidence < 0.5:
-        conv = Conversation(
-            id=request.conversation_id or uuid.uuid4(),
-            user_id=user_id,
-            query=request.query,
-            intent=intent.model_dump(),
-            response=f"I need some clarification:\n" + "\n".join(f"- {a}" for a in intent.ambiguities),
-        )
-        db.add(conv)
-        await db.commit()
-        return QueryResponse(
-            conversation_id=conv.id,
-            query=request.query,
-            response=conv.response,
-            actions_taken=[],
-            created_at=conv.created_at,
-        )
-
-    # 2. Build execution plan
-    plan = build_execution_plan(intent)
-    logger.info("Execution plan: %d steps, %d parallel groups", len(plan.steps), len(plan.parallel_groups))
 
-    # 3. Execute
-    orchestrator = ServiceOrchestrator(user_id=user_id, access_token=access_token, db=db)
-    step_results = await orchestrator.execute(plan)
+def _clarification(intent: ClassifiedIntent) -> str:
+    return "I need some clarification:\n" + "\n".join(f"- {a}" for a in intent.ambiguities)
 
-    # 4. Synthesize response
-    response_text, actions_taken = await synthesize_response(request.query, step_results)
 
-    # Persist conversation
+async def _save_conversation(
+    db: AsyncSession,
+    request: QueryRequest,
+    user_id: uuid.UUID,
+    intent: ClassifiedIntent,
+    plan: ExecutionPlan | None,
+    response_text: str,
+    actions_taken: list[ActionTaken],
+    synthesis: str,
+) -> QueryResponse:
     conv = Conversation(
         id=request.conversation_id or uuid.uuid4(),
         user_id=user_id,
         query=request.query,
         intent=intent.model_dump(),
-        execution_plan=plan.model_dump(),
+        execution_plan=plan.model_dump() if plan else None,
         response=response_text,
     )
     db.add(conv)
     await db.commit()
     await db.refresh(conv)
-
     return QueryResponse(
         conversation_id=conv.id,
         query=request.query,
         response=response_text,
         actions_taken=actions_taken,
+        synthesis=synthesis,
         created_at=conv.created_at,
     )
+
+
+@router.post("/query", response_model=QueryResponse)
+async def process_query(
+    request: QueryRequest,
+    db: AsyncSession = Depends(get_db),
+    x_user_id: str = Header(..., description="Authenticated user ID"),
+):
+    """Process a natural language query against Google Workspace."""
+    user_id = uuid.UUID(x_user_id)
+    access_token = await _authorize(db, user_id)
+
+    # Conversation context
+    context = await get_conversation_context(str(user_id))
+    await store_conversation_context(str(user_id), request.query)
+
+    # 1. Classify intent
+    intent = await classify_intent(request.query, conversation_context=context, user_timezone=request.user_timezone)
+    logger.info("Classified intent: %s (confidence=%.2f)", intent.intent, intent.confidence)
+
+    # Handle ambiguities
+    if _needs_clarification(intent):
+        return await _save_conversation(db, request, user_id, intent, None, _clarification(intent), [], "clarification")
+
+    # 2. Build execution plan
+    plan = build_execution_plan(intent)
+    logger.info("Execution plan: %d steps, %d parallel groups", len(plan.steps), len(plan.parallel_groups))
+
+    # 3. Execute
+    orchestrator = ServiceOrchestrator(user_id=user_id, access_token=access_token, db=db)
+    step_results = await orchestrator.execute(plan)
+
+    # 4. Synthesize response
+    response_text, actions_taken, synthesis = await synthesize_response(
+        request.query, step_results, request.user_timezone
+    )
+    logger.info("Response synthesized via %s", synthesis)
+
+    return await _save_conversation(db, request, user_id, intent, plan, response_text, actions_taken, synthesis)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _query_events(
+    request: QueryRequest,
+    user_id: uuid.UUID,
+    access_token: str,
+    context: list,
+) -> AsyncIterator[str]:
+    """SSE stream for one query: ``intent``, one ``step`` per StepResult, ``token`` chunks, then ``done``.
+
+    Runs after the response has started, so it uses its own session rather than
+    the request's and reports failures as an ``error`` event.
+    """
+    run: asyncio.Task | None = None
+    try:
+        async with async_session_factory() as db:
+            intent = await classify_intent(
+                request.query, conversation_context=context, user_timezone=request.user_timezone
+            )
+            yield _sse("intent", intent.model_dump())
+
+            if _needs_clarification(intent):
+                plan = None
+                response_text = _clarification(intent)
+                actions_taken = []
+                synthesis = "clarification"
+                yield _sse("token", {"text": response_text})
+            else:
+                plan = build_execution_plan(intent)
+                orchestrator = ServiceOrchestrator(user_id=user_id, access_token=access_token, db=db)
+                finished: asyncio.Queue[StepResult | None] = asyncio.Queue()
+
+                async def execute() -> list[StepResult]:
+                    try:
+                        return await orchestrator.execute(plan, on_result=finished.put_nowait)
+                    finally:
+                        finished.put_nowait(None)
+
+                run = asyncio.create_task(execute())
+                while (result := await finished.get()) is not None:
+                    yield _sse("step", result.model_dump())
+                step_results = await run
+
+                chunks = []
+                synthesis = "llm"
+                async for synthesis, chunk in stream_response(request.query, step_results, request.user_timezone):
+                    chunks.append(chunk)
+                    yield _sse("token", {"text": chunk})
+                response_text = "".join(chunks)
+                actions_taken = summarize_actions(step_results)
+
+            response = await _save_conversation(
+                db, request, user_id, intent, plan, response_text, actions_taken, synthesis
+            )
+            yield _sse("done", response.model_dump(mode="json"))
+    except Exception as e:
+        logger.exception("Streaming query failed")
+        yield _sse("error", {"detail": str(e)})
+    finally:
+        # The client may disconnect mid-plan
+        if run is not None and not run.done():
+            run.cancel()
+
+
+@router.post("/query/stream")
+async def stream_query(
+    request: QueryRequest,
+    db: AsyncSession = Depends(get_db),
+    x_user_id: str = Header(..., description="Authenticated user ID"),
+):
+    """Process a query, streaming progress and the response as Server-Sent Events."""
+    user_id = uuid.UUID(x_user_id)
+    access_token = await _authorize(db, user_id)
+
+    context = await get_conversation_context(str(user_id))
+    await store_conversation_context(str(user_id), request.query)
+
+    return StreamingResponse(
+        _query_events(request, user_id, access_token, context),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
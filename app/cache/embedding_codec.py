@@ -0,0 +1,51 @@
+"""Compact binary encoding for cached embedding vectors.
+
+Layout: one version byte, one dtype byte (``f`` = float32, ``e`` = float16),
+then the little-endian packed components. Values written before the binary
+format existed are JSON arrays and are still decoded.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+
+CODEC_VERSION = 1
+_DTYPE_CODES = {"float32": b"f", "float16": b"e"}
+
+
+def encode_embedding(embedding: list[float], dtype: str = "float32") -> bytes:
+    code = _DTYPE_CODES.get(dtype)
+    if code is None:
+        raise ValueError(f"Unsupported embedding cache dtype '{dtype}'")
+    header = bytes([CODEC_VERSION]) + code
+    if code == b"e":
+        return header + struct.pack(f"<{len(embedding)}e", *embedding)
+    packed = array("f", embedding)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return header + packed.tobytes()
+
+
+def decode_embedding(raw: bytes | str) -> list[float]:
+    if isinstance(raw, str) or raw[:1] == b"[":
+        # Legacy JSON entry
+        return json.loads(raw)
+    if raw[0] != CODEC_VERSION:
+        raise ValueError(f"Unknown embedding codec version {raw[0]}")
+    code, body = raw[1:2], raw[2:]
+    if code == b"e":
+        return list(struct.unpack(f"<{len(body) // 2}e", body))
+    if code == b"f":
+        values = array("f")
+        values.frombytes(body)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values.tolist()
+    raise ValueError(f"Unknown embedding dtype code {code!r}")
+
+
+def is_legacy_entry(raw: bytes | str) -> bool:
+    return isinstance(raw, str) or raw[:1] == b"["
@@ -3,6 +3,8 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
+import time
+from collections import OrderedDict
 
 import redis.asyncio as redis
 
@@ -12,6 +14,7 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 _pool: redis.Redis | None = None
+_bytes_pool: redis.Redis | None = None
 
 
 async def get_redis() -> redis.Redis:
@@ -21,29 +24,171 @@ async def get_redis() -> redis.Redis:
     return _pool
 
 
+async def get_redis_bytes() -> redis.Redis:
+    """Connection that returns raw bytes, for binary values such as packed embeddings."""
+    global _bytes_pool
+    if _bytes_pool is None:
+        _bytes_pool = redis.from_url(settings.redis_url, decode_responses=False)
+    return _bytes_pool
+
+
 async def close_redis() -> None:
-    global _pool
+    global _pool, _bytes_pool
     if _pool is not None:
         await _pool.close()
         _pool = None
+    if _bytes_pool is not None:
+        await _bytes_pool.close()
+        _bytes_pool = None
+
+
+class LocalCache:
+    """Bounded in-process LRU with per-entry expiry, used as the L1 tier in front of Redis."""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, str | bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> str | bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: str | bytes, ttl: int | None = None) -> None:
+        ttl = min(ttl, self.ttl) if ttl else self.ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_local: dict[str, LocalCache] = {}
+
+
+def _local_cache(prefix: str) -> LocalCache | None:
+    """L1 cache for ``prefix``, or None when the prefix has opted out."""
+    cache = _local.get(prefix)
+    if cache is None:
+        max_entries = settings.l1_cache_max_entries.get(prefix, 0)
+        if max_entries <= 0 or settings.l1_cache_ttl <= 0:
+            return None
+        cache = _local[prefix] = LocalCache(max_entries, settings.l1_cache_ttl)
+    return cache
+
+
+def get_local_cache_stats() -> dict[str, dict]:
+    return {prefix: cache.stats() for prefix, cache in _local.items()}
+
+
+def clear_local_cache() -> None:
+    """Drop all L1 entries and counters (e.g. between tests)."""
+    _local.clear()
 
 
 def _hash_key(text: str) -> str:
     return hashlib.sha256(text.encode()).hexdigest()[:32]
 
 
-async def cache_get(prefix: str, key: str) -> str | None:
-    r = await get_redis()
-    return await r.get(f"{prefix}:{_hash_key(key)}")
-
-
-async def cache_set(prefix: str, key: str, value: str, ttl: int | None = None) -> None:
-    r = await get_redis()
+async def cache_get(prefix: str, key: str, *, binary: bool = False) -> str | bytes | None:
+    full_key = f"{prefix}:{_hash_key(key)}"
+    local = _local_cache(prefix)
+    if local is not None:
+        value = local.get(full_key)
+        if value is not None:
+            return value
+    r = await (get_redis_bytes() if binary else get_redis())
+    value = await r.get(full_key)
+    if value is not None and local is not None:
+        local.set(full_key, value)
+    return value
+
+
+async def cache_set(prefix: str, key: str, value: str | bytes, ttl: int | None = None, *, binary: bool = False) -> None:
+    r = await (get_redis_bytes() if binary else get_redis())
     full_key = f"{prefix}:{_hash_key(key)}"
     if ttl:
         await r.setex(full_key, ttl, value)
     else:
         await r.set(full_key, value)
+    local = _local_cache(prefix)
+    if local is not None:
+        local.set(full_key, value, ttl)
+
+
+async def cache_mget(prefix: str, keys: list[str], *, binary: bool = False) -> list[str | bytes | None]:
+    """Fetch many keys, serving L1 hits locally and the rest in one MGET round trip.
+
+    Results follow the order of ``keys``.
+    """
+    if not keys:
+        return []
+    full_keys = [f"{prefix}:{_hash_key(k)}" for k in keys]
+    local = _local_cache(prefix)
+    if local is None:
+        r = await (get_redis_bytes() if binary else get_redis())
+        return await r.mget(full_keys)
+
+    results = [local.get(k) for k in full_keys]
+    missing = [i for i, value in enumerate(results) if value is None]
+    if missing:
+        r = await (get_redis_bytes() if binary else get_redis())
+        fetched = await r.mget([full_keys[i] for i in missing])
+        for i, value in zip(missing, fetched):
+            if value is not None:
+                results[i] = value
+                local.set(full_keys[i], value)
+    return results
+
+
+async def cache_mset_with_ttl(
+    prefix: str,
+    items: dict[str, str | bytes],
+    ttl: int | None = None,
+    *,
+    binary: bool = False,
+) -> None:
+    """Write many keys in one pipelined round trip, each with the same TTL."""
+    if not items:
+        return
+    r = await (get_redis_bytes() if binary else get_redis())
+    pipe = r.pipeline(transaction=False)
+    for key, value in items.items():
+        full_key = f"{prefix}:{_hash_key(key)}"
+        if ttl:
+            pipe.setex(full_key, ttl, value)
+        else:
+            pipe.set(full_key, value)
+    await pipe.execute()
+    local = _local_cache(prefix)
+    if local is not None:
+        for key, value in items.items():
+            local.set(f"{prefix}:{_hash_key(key)}", value, ttl)
 
 
 async def cache_get_json(prefix: str, key: str) -> dict | list | None:
@@ -0,0 +1,91 @@
+"""Single-flight coalescing for expensive cache fills.
+
+Concurrent callers that miss the cache for the same key share one in-flight
+task instead of each calling the LLM. With ``single_flight_distributed`` the
+leader also takes a short Redis lock so other workers wait for its result to
+land in the cache rather than computing it themselves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+from app.cache.redis_client import _hash_key, get_redis
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_inflight: dict[str, asyncio.Task] = {}
+
+# Delete the lock only if we still own it
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+async def single_flight(
+    prefix: str,
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    recheck: Callable[[], Awaitable[Any]] | None = None,
+) -> Any:
+    """Run ``compute`` once for all concurrent callers of ``prefix``/``key``.
+
+    ``recheck`` reads the cache; it is used by the distributed variant to pick
+    up a value another worker produced. Both callables must return the same type.
+    """
+    full_key = f"{prefix}:{_hash_key(key)}"
+    loop = asyncio.get_running_loop()
+    task = _inflight.get(full_key)
+    if task is not None and task.get_loop() is loop:
+        logger.debug("Coalesced in-flight request for %s", full_key)
+        return await asyncio.shield(task)
+
+    if settings.single_flight_distributed and recheck is not None:
+        task = loop.create_task(_with_redis_lock(full_key, compute, recheck))
+    else:
+        task = loop.create_task(compute())
+    _inflight[full_key] = task
+    task.add_done_callback(lambda t: _inflight.pop(full_key, None) if _inflight.get(full_key) is t else None)
+    return await asyncio.shield(task)
+
+
+async def _with_redis_lock(
+    full_key: str,
+    compute: Callable[[], Awaitable[Any]],
+    recheck: Callable[[], Awaitable[Any]],
+) -> Any:
+    r = await get_redis()
+    lock_key = f"lock:{full_key}"
+    token = uuid.uuid4().hex
+    ttl_ms = int(settings.single_flight_lock_ttl * 1000)
+
+    if not await r.set(lock_key, token, nx=True, px=ttl_ms):
+        # Another worker is computing this value; wait for it to reach the cache.
+        deadline = time.monotonic() + settings.single_flight_lock_ttl
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.single_flight_poll_interval)
+            value = await recheck()
+            if value is not None:
+                return value
+            if not await r.exists(lock_key):
+                break
+        logger.info("Lock holder for %s did not fill the cache; computing locally", full_key)
+        return await compute()
+
+    try:
+        # The previous holder may have finished between our cache miss and the lock.
+        value = await recheck()
+        if value is not None:
+            return value
+        return await compute()
+    finally:
+        await r.eval(_RELEASE_SCRIPT, 1, lock_key, token)
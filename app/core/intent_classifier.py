@@ -2,13 +2,16 @@ from __future__ import annotations
 
 import json
 import logging
+from collections import Counter
 from datetime import datetime, timezone
 
 from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.core.intent_rules import classify_with_rules
 from app.schemas.query import ClassifiedIntent
 from app.cache.redis_client import cache_get_json, cache_set_json
+from app.cache.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -99,6 +102,12 @@ Response:
 """
 
 _client: AsyncOpenAI | None = None
+# Queries classified by the local rules vs sent on to the cache and LLM
+_path_counts: Counter[str] = Counter({"rules": 0, "llm": 0})
+
+
+def get_intent_stats() -> dict:
+    return dict(_path_counts)
 
 
 def _get_client() -> AsyncOpenAI:
@@ -113,10 +122,34 @@ async def classify_intent(
     conversation_context: list[str] | None = None,
     user_timezone: str = "UTC",
 ) -> ClassifiedIntent:
+    if settings.intent_rules_enabled:
+        local = classify_with_rules(query, conversation_context, user_timezone)
+        if local is not None:
+            _path_counts["rules"] += 1
+            logger.debug("Classified %r locally as %s", query, local.intent)
+            return local
+    _path_counts["llm"] += 1
+
     cached = await cache_get_json("intent", query)
     if cached is not None:
         return ClassifiedIntent(**cached)
 
+    async def recheck() -> ClassifiedIntent | None:
+        cached = await cache_get_json("intent", query)
+        return ClassifiedIntent(**cached) if cached is not None else None
+
+    return await single_flight(
+        "intent", query,
+        lambda: _classify_uncached(query, conversation_context, user_timezone),
+        recheck,
+    )
+
+
+async def _classify_uncached(
+    query: str,
+    conversation_context: list[str] | None,
+    user_timezone: str,
+) -> ClassifiedIntent:
     now = datetime.now(timezone.utc)
     ctx = "\n".join(f"- {q}" for q in (conversation_context or [])) or "(no previous queries)"
 
@@ -0,0 +1,227 @@
+"""Rule-based classification of formulaic search queries, tried before the LLM.
+
+A query is classified locally only when every word is accounted for: a
+service noun ("calendar", "emails", "PDFs"), a date expression, an email
+address in a recognised role, an ``about ...`` keyword, or a filler word.
+Anything else, such as a reference to earlier context ("that email"), an
+action verb ("move", "cancel", "draft") or nouns from two services, returns
+None and the query goes to the LLM classifier.
+
+Date ranges follow the LLM's ``{"from": "YYYY-MM-DD", "to": "YYYY-MM-DD"}``
+entity shape. ``to`` is the day after the range ends, because the agents
+compare it as a midnight timestamp. A month named without a year ("in May",
+"March 5") means this year, except in calendar queries, where a date that has
+already passed means next year's.
+"""
+
+from __future__ import annotations
+
+import calendar
+import re
+from collections.abc import Callable
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.schemas.query import ClassifiedIntent
+
+RULE_CONFIDENCE = 0.9
+
+WEEKDAYS = {name.lower(): i for i, name in enumerate(calendar.day_name)}
+MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+
+# service -> (intent, step name understood by the planner, nouns)
+SERVICES: dict[str, tuple[str, str, set[str]]] = {
+    "gcal": ("search_events", "search_calendar_events",
+             {"calendar", "schedule", "agenda", "meeting", "meetings", "event", "events",
+              "appointment", "appointments"}),
+    "gmail": ("search_emails", "search_emails",
+              {"email", "emails", "e-mail", "e-mails", "mail", "inbox", "message", "messages"}),
+    "drive": ("search_files", "search_drive",
+              {"drive", "file", "files", "doc", "docs", "document", "documents", "pdf", "pdfs",
+               "spreadsheet", "spreadsheets", "sheet", "sheets", "slides", "presentation", "presentations"}),
+}
+
+MIME_TYPES = {
+    "pdf": "application/pdf", "pdfs": "application/pdf",
+    "doc": "application/vnd.google-apps.document", "docs": "application/vnd.google-apps.document",
+    "spreadsheet": "application/vnd.google-apps.spreadsheet", "spreadsheets": "application/vnd.google-apps.spreadsheet",
+    "sheet": "application/vnd.google-apps.spreadsheet", "sheets": "application/vnd.google-apps.spreadsheet",
+    "slides": "application/vnd.google-apps.presentation",
+    "presentation": "application/vnd.google-apps.presentation",
+    "presentations": "application/vnd.google-apps.presentation",
+}
+
+FILLER = {
+    "what", "what's", "whats", "which", "is", "are", "was", "were", "do", "does", "did", "i", "have", "had",
+    "show", "find", "list", "get", "search", "look", "up", "see", "check", "give", "me", "my", "mine",
+    "on", "in", "for", "from", "during", "within", "at", "of", "the", "a", "an", "all", "any", "there",
+    "please", "can", "you", "could", "where", "invited", "attending", "including", "with",
+    "google",
+}
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+ABOUT = re.compile(r"\b(?:about|regarding|re)\s+(?:the\s+|my\s+|a\s+|an\s+)?(.+)$")
+_WEEKDAY = "|".join(WEEKDAYS)
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+
+def _month_bounds(year: int, month: int) -> tuple[date, date]:
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1)
+    return start, end
+
+
+def _relative_month(today: date, offset: int) -> tuple[date, date]:
+    index = today.year * 12 + today.month - 1 + offset
+    return _month_bounds(index // 12, index % 12 + 1)
+
+
+def _weekday(today: date, name: str, modifier: str | None) -> tuple[date, date]:
+    target = WEEKDAYS[name]
+    if modifier == "last":
+        day = today - timedelta(days=(today.weekday() - target - 1) % 7 + 1)
+    elif modifier == "next":
+        day = today + timedelta(days=(target - today.weekday() - 1) % 7 + 1)
+    else:  # "this Tuesday", "on Tuesday", "Tuesday": the coming one, today included
+        day = today + timedelta(days=(target - today.weekday()) % 7)
+    return day, day + timedelta(days=1)
+
+
+def _month_day(today: date, month: str, first: str, last: str | None) -> tuple[date, date] | None:
+    try:
+        start = date(today.year, MONTHS[month], int(first))
+        end = date(today.year, MONTHS[month], int(last or first))
+    except ValueError:
+        return None
+    return (start, end + timedelta(days=1)) if end >= start else None
+
+
+# (pattern, resolver(today, match) -> (start, end exclusive), names a month without a year), tried in order
+DATE_RULES: list[tuple[re.Pattern, Callable[[date, re.Match], tuple[date, date] | None], bool]] = [
+    (re.compile(r"\b(?:today|tonight)\b"), lambda t, m: (t, t + timedelta(days=1)), False),
+    (re.compile(r"\btomorrow(?:'s)?\b"), lambda t, m: (t + timedelta(days=1), t + timedelta(days=2)), False),
+    (re.compile(r"\byesterday(?:'s)?\b"), lambda t, m: (t - timedelta(days=1), t), False),
+    (re.compile(r"\b(this|next|last)\s+week\b"), lambda t, m: (
+        (monday := t - timedelta(days=t.weekday()) + timedelta(weeks={"this": 0, "next": 1, "last": -1}[m[1]])),
+        monday + timedelta(weeks=1),
+    ), False),
+    (re.compile(r"\b(this|next|last)\s+month\b"),
+     lambda t, m: _relative_month(t, {"this": 0, "next": 1, "last": -1}[m[1]]), False),
+    (re.compile(r"\b(?:in\s+the\s+)?(?:past|last)\s+(\d+)\s+(day|week)s?\b"), lambda t, m: (
+        t - timedelta(days=int(m[1]) * (7 if m[2] == "week" else 1)), t + timedelta(days=1),
+    ), False),
+    (re.compile(r"\b(?:in\s+the\s+)?next\s+(\d+)\s+(day|week)s?\b"), lambda t, m: (
+        t, t + timedelta(days=int(m[1]) * (7 if m[2] == "week" else 1)),
+    ), False),
+    (re.compile(rf"\b(?:(this|next|last|on)\s+)?({_WEEKDAY})\b"),
+     lambda t, m: _weekday(t, m[2], m[1] if m[1] in ("last", "next") else None), False),
+    (re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b"), lambda t, m: (
+        (day := date(int(m[1]), int(m[2]), int(m[3]))), day + timedelta(days=1),
+    ), False),
+    (re.compile(rf"\b({_MONTH})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:\s*(?:-|–|to|through)\s*(\d{{1,2}})(?:st|nd|rd|th)?)?\b"),
+     lambda t, m: _month_day(t, m[1], m[2], m[3]), True),
+    (re.compile(rf"\b(?:in|from|during)\s+({_MONTH})\b"), lambda t, m: _month_bounds(t.year, MONTHS[m[1]]), True),
+]
+
+
+def parse_date_range(text: str, today: date, upcoming: bool = False) -> tuple[tuple[date, date], str] | None:
+    """The first date expression in lower-cased ``text`` as ``((start, end_exclusive), remaining_text)``.
+
+    With ``upcoming``, a month named without a year that has already passed
+    resolves to next year's.
+    """
+    for pattern, resolve, yearless in DATE_RULES:
+        match = pattern.search(text)
+        if match is None:
+            continue
+        try:
+            bounds = resolve(today, match)
+            if bounds and upcoming and yearless and bounds[1] <= today:
+                bounds = tuple(d.replace(year=d.year + 1) for d in bounds)
+        except ValueError:  # e.g. 2026-02-30, or Feb 29 rolled into a common year
+            bounds = None
+        if bounds is None:
+            return None
+        return bounds, text[:match.start()] + " " + text[match.end():]
+    return None
+
+
+def _today(user_timezone: str) -> date:
+    try:
+        tz = ZoneInfo(user_timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        tz = timezone.utc
+    return datetime.now(tz).date()
+
+
+def classify_with_rules(
+    query: str,
+    conversation_context: list[str] | None = None,
+    user_timezone: str = "UTC",
+    today: date | None = None,
+) -> ClassifiedIntent | None:
+    """A ClassifiedIntent for a formulaic single-service search, or None to defer to the LLM."""
+    text = query.lower().strip().rstrip("?.!").strip()
+    entities: dict = {}
+
+    emails = EMAIL.findall(text)
+    senders = re.findall(rf"\bfrom\s+({EMAIL.pattern})", text)
+    text = EMAIL.sub(" ", text)
+
+    # Calendar queries look ahead: nouns of no other service, or none at all ("in May")
+    upcoming = not any(
+        nouns & set(re.findall(r"[\w'-]+", text)) for svc, (_, _, nouns) in SERVICES.items() if svc != "gcal"
+    )
+    parsed = parse_date_range(text, today or _today(user_timezone), upcoming)
+    if parsed:
+        (start, end), text = parsed
+        entities["date_range"] = {"from": start.isoformat(), "to": end.isoformat()}
+        # A second date expression ("from March 1 to next week") is beyond these rules
+        if parse_date_range(text, start):
+            return None
+
+    about = ABOUT.search(text)
+    if about:
+        keyword = about[1].split()
+        # "about the budget from last month": the date was removed, its preposition was not
+        while keyword and keyword[-1] in FILLER:
+            keyword.pop()
+        if not keyword:
+            return None
+        entities["keyword"] = " ".join(keyword)
+        text = text[:about.start()]
+
+    words = re.findall(r"[\w'-]+", text)
+    services = {svc for svc, (_, _, nouns) in SERVICES.items() if nouns & set(words)}
+    leftover = [w for w in words if w not in FILLER and not any(w in nouns for _, _, nouns in SERVICES.values())]
+    if leftover or len(services) > 1:
+        return None
+    if not services:
+        # A bare date ("Next Tuesday") reads as a calendar lookup, unless it answers an earlier question
+        if "date_range" not in entities or conversation_context or emails or about:
+            return None
+        services = {"gcal"}
+
+    service = services.pop()
+    if emails:
+        if service == "gmail" and senders == emails and len(emails) == 1:
+            entities["sender"] = emails[0]
+        elif service == "gcal" and not senders and len(emails) == 1:
+            entities["attendee_email"] = emails[0]
+        else:
+            return None
+    if service == "drive":
+        mime = {MIME_TYPES[w] for w in words if w in MIME_TYPES}
+        if len(mime) == 1:
+            entities["mime_type"] = mime.pop()
+
+    intent, step, _ = SERVICES[service]
+    return ClassifiedIntent(
+        services=[service],
+        intent=intent,
+        entities=entities,
+        steps=[step],
+        ambiguities=[],
+        confidence=RULE_CONFIDENCE,
+    )
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 import logging
+import math
+import time
+from collections import defaultdict
+from collections.abc import Callable
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,15 +15,66 @@ from app.agents.base import BaseAgent
 from app.agents.gmail_agent import GmailAgent
 from app.agents.gcal_agent import GCalAgent
 from app.agents.drive_agent import DriveAgent
+from app.config import get_settings
+from app.core.query_planner import SEARCH_ACTIONS
+from app.db.database import step_session
 from app.schemas.query import ExecutionPlan, ExecutionStep, StepResult
+from app.services.embedding import generate_embeddings_batch
+from app.services.vector_search import hybrid_search_all
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 STEP_TIMEOUT = 10.0  # seconds per step
 
+# Moving average of step run time per (agent, action), the weights for critical-path priority
+_step_seconds: dict[tuple[str, str], float] = {}
+_DEFAULT_STEP_SECONDS = 0.5
+_DURATION_SMOOTHING = 0.2
+
+
+def _agent_limit(agent: str) -> float:
+    return settings.orchestrator_agent_concurrency.get(agent) or math.inf
+
+
+def _record_duration(step: ExecutionStep, seconds: float) -> None:
+    key = (step.agent, step.action)
+    previous = _step_seconds.get(key)
+    _step_seconds[key] = seconds if previous is None else previous + _DURATION_SMOOTHING * (seconds - previous)
+
+
+def _critical_path(steps: list[ExecutionStep], dependents: dict[str, list[str]]) -> dict[str, float]:
+    """Expected seconds from each step's start to the end of the longest chain through it."""
+    step_map = {s.id: s for s in steps}
+    remaining: dict[str, float] = {}
+
+    def visit(step_id: str, path: frozenset[str]) -> float:
+        if step_id not in remaining:
+            step = step_map[step_id]
+            own = _step_seconds.get((step.agent, step.action), _DEFAULT_STEP_SECONDS)
+            # ``path`` guards against cycles, whose steps never become ready anyway
+            remaining[step_id] = own + max(
+                (visit(c, path | {step_id}) for c in dependents[step_id] if c not in path), default=0.0
+            )
+        return remaining[step_id]
+
+    for step in steps:
+        visit(step.id, frozenset())
+    return remaining
+
+
+def _search_text(step: ExecutionStep) -> str:
+    # Mirrors how the agents pick their search string
+    return step.params.get("keyword") or step.params.get("query") or ""
+
 
 class ServiceOrchestrator:
-    """Executes an ExecutionPlan by running steps in parallel groups."""
+    """Executes an ExecutionPlan, starting each step as soon as its dependencies finish.
+
+    Each step gets its own short-lived session from the pool, so the pgvector
+    queries of a parallel group overlap instead of queueing on the request's
+    session.
+    """
 
     def __init__(self, user_id: UUID, access_token: str, db: AsyncSession):
         self.user_id = user_id
@@ -30,31 +86,149 @@ class ServiceOrchestrator:
             "drive": DriveAgent(access_token=access_token, user_id=user_id, db=db),
         }
         self.results: dict[str, StepResult] = {}
+        self.query_embeddings: dict[str, list[float]] = {}
+        self.prefetched: dict[str, list[dict]] = {}
 
-    async def execute(self, plan: ExecutionPlan) -> list[StepResult]:
+    async def execute(
+        self,
+        plan: ExecutionPlan,
+        on_result: Callable[[StepResult], None] | None = None,
+    ) -> list[StepResult]:
+        """Run the plan as a dataflow graph.
+
+        Each step becomes ready as soon as its own dependencies finish. Ready
+        steps start longest-remaining-path first, up to the agent's
+        ``orchestrator_agent_concurrency`` limit. ``on_result`` is called with
+        each StepResult as it completes.
+        """
         step_map = {s.id: s for s in plan.steps}
+        order = {s.id: i for i, s in enumerate(plan.steps)}
+        self.query_embeddings = await self._embed_search_queries(plan)
+
+        waiting: dict[str, int] = {}
+        dependents: dict[str, list[str]] = defaultdict(list)
+        for step in plan.steps:
+            deps = [d for d in dict.fromkeys(step.depends_on) if d in step_map]
+            waiting[step.id] = len(deps)
+            for dep in deps:
+                dependents[dep].append(step.id)
+        priority = _critical_path(plan.steps, dependents)
+        batch_of = {sid: tuple(batch) for batch in plan.search_batches for sid in batch}
+
+        ready: list[tuple[float, int, str]] = []
+        ready_at: dict[str, float] = {}
+        prefetches: dict[tuple[str, ...], asyncio.Task] = {}
+        running: dict[asyncio.Task, str] = {}
+        busy: dict[str, int] = defaultdict(int)
+
+        def release(step_id: str) -> None:
+            ready_at[step_id] = time.perf_counter()
+            heapq.heappush(ready, (-priority[step_id], order[step_id], step_id))
+            # A combined search starts with its first ready step; the others pick up its results
+            batch = batch_of.get(step_id)
+            if batch and batch not in prefetches:
+                prefetches[batch] = asyncio.create_task(self._prefetch_searches([step_map[b] for b in batch]))
 
-        for group in plan.parallel_groups:
-            tasks = []
-            for step_id in group:
-                step = step_map[step_id]
-                tasks.append(self._execute_step(step))
-
-            group_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for step_id, result in zip(group, group_results):
-                if isinstance(result, Exception):
-                    self.results[step_id] = StepResult(
-                        step_id=step_id,
-                        agent=step_map[step_id].agent,
-                        action=step_map[step_id].action,
-                        status="failed",
-                        error=str(result),
+        for step_id, count in waiting.items():
+            if count == 0:
+                release(step_id)
+
+        try:
+            while ready or running:
+                blocked = []
+                while ready:
+                    entry = heapq.heappop(ready)
+                    step = step_map[entry[2]]
+                    if busy[step.agent] >= _agent_limit(step.agent):
+                        blocked.append(entry)
+                        continue
+                    busy[step.agent] += 1
+                    task = asyncio.create_task(
+                        self._run_step(step, ready_at[step.id], prefetches.get(batch_of.get(step.id)))
                     )
-                else:
-                    self.results[step_id] = result
+                    running[task] = step.id
+                for entry in blocked:
+                    heapq.heappush(ready, entry)
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step_id = running.pop(task)
+                    busy[step_map[step_id].agent] -= 1
+                    self.results[step_id] = task.result()
+                    if on_result is not None:
+                        on_result(self.results[step_id])
+                    for child in dependents[step_id]:
+                        waiting[child] -= 1
+                        if waiting[child] == 0:
+                            release(child)
+        finally:
+            for task in [*running, *prefetches.values()]:
+                task.cancel()
+
+        logger.info("Plan steps: %s", ", ".join(
+            f"{r.step_id} {r.status} queued {r.queue_ms}ms ran {r.run_ms}ms" for r in self.results.values()
+        ))
+        return [self.results[s.id] for s in plan.steps if s.id in self.results]
+
+    async def _run_step(self, step: ExecutionStep, ready_at: float, prefetch: asyncio.Task | None) -> StepResult:
+        """Execute one step and stamp its queue and run times. Never raises."""
+        if prefetch is not None:
+            # A failed prefetch only means the step searches on its own
+            await asyncio.gather(prefetch, return_exceptions=True)
+        started = time.perf_counter()
+        try:
+            result = await self._execute_step(step)
+        except Exception as e:
+            result = StepResult(step_id=step.id, agent=step.agent, action=step.action, status="failed", error=str(e))
+        finished = time.perf_counter()
+        _record_duration(step, finished - started)
+        result.queue_ms = round((started - ready_at) * 1000, 2)
+        result.run_ms = round((finished - started) * 1000, 2)
+        return result
+
+    async def _embed_search_queries(self, plan: ExecutionPlan) -> dict[str, list[float]]:
+        """Embed each distinct search string in the plan once, in a single batch.
 
-        return list(self.results.values())
+        On failure the steps fall back to embedding their own query.
+        """
+        texts = list(dict.fromkeys(
+            _search_text(s) for s in plan.steps if s.action in SEARCH_ACTIONS and _search_text(s)
+        ))
+        if not texts:
+            return {}
+        try:
+            return dict(zip(texts, await generate_embeddings_batch(texts)))
+        except Exception as e:
+            logger.warning("Precomputing query embeddings failed, steps will embed individually: %s", e)
+            return {}
+
+    async def _prefetch_searches(self, steps: list[ExecutionStep]) -> None:
+        """Run the cache lookups of sibling search steps as one ``hybrid_search_all`` query.
+
+        Each step then starts from its slice of the results; on failure the steps
+        search on their own. The query runs on its own session, like a step, so
+        batches released while another is still searching never share the
+        request's session, and its ``SET LOCAL`` settings end with it.
+        """
+        try:
+            # Bad params (e.g. an unparsable date) fail the batch here and each step on its own
+            searches = {
+                step.agent: self.agents[step.agent].search_params(
+                    **{k: v for k, v in step.params.items() if not k.startswith("_")}
+                )
+                for step in steps
+            }
+            async with step_session() as db:
+                grouped = await asyncio.wait_for(
+                    hybrid_search_all(db, self.user_id, searches, query_embeddings=self.query_embeddings),
+                    timeout=STEP_TIMEOUT,
+                )
+        except Exception as e:
+            logger.warning("Combined search for %s failed, steps will search individually: %s",
+                           [s.id for s in steps], e)
+            return
+        for step in steps:
+            self.prefetched[step.id] = grouped.get(step.agent, [])
 
     async def _execute_step(self, step: ExecutionStep) -> StepResult:
         agent = self.agents.get(step.agent)
@@ -75,11 +249,17 @@ class ServiceOrchestrator:
                 params["_context"] = params.get("_context", {})
                 params["_context"][dep_id] = dep_result.data
 
+        if step.action in SEARCH_ACTIONS and _search_text(step) in self.query_embeddings:
+            params.setdefault("query_embedding", self.query_embeddings[_search_text(step)])
+        if step.id in self.prefetched:
+            params["prefetched"] = self.prefetched[step.id]
+
         try:
-            result = await asyncio.wait_for(
-                agent.execute_action(step.action, params),
-                timeout=STEP_TIMEOUT,
-            )
+            async with step_session():
+                result = await asyncio.wait_for(
+                    agent.execute_action(step.action, params),
+                    timeout=STEP_TIMEOUT,
+                )
             return StepResult(
                 step_id=step.id,
                 agent=step.agent,
@@ -39,6 +39,9 @@ STEP_ACTION_MAP: dict[str, tuple[str, str]] = {
     "extract_ooo_dates": ("drive", "get_file"),
 }
 
+# Actions backed by hybrid vector search over the cache tables
+SEARCH_ACTIONS = {"search_emails", "search_events", "search_files"}
+
 # Steps that depend on output from a prior step
 DEPENDENCY_RULES: dict[str, list[str]] = {
     "draft_cancellation_email": ["search_gmail_for_booking", "extract_booking_reference"],
@@ -120,6 +123,21 @@ def _topological_sort(steps: list[ExecutionStep]) -> list[list[str]]:
     return groups
 
 
+def _search_batches(steps: list[ExecutionStep], parallel_groups: list[list[str]]) -> list[list[str]]:
+    """Pick search steps on different services within a parallel group to share one query."""
+    step_map = {s.id: s for s in steps}
+    batches: list[list[str]] = []
+    for group in parallel_groups:
+        by_agent: dict[str, str] = {}
+        for sid in group:
+            step = step_map[sid]
+            if step.action in SEARCH_ACTIONS:
+                by_agent.setdefault(step.agent, sid)
+        if len(by_agent) > 1:
+            batches.append(list(by_agent.values()))
+    return batches
+
+
 def build_execution_plan(intent: ClassifiedIntent) -> ExecutionPlan:
     """Convert a classified intent into an executable DAG."""
     steps: list[ExecutionStep] = []
@@ -146,4 +164,8 @@ def build_execution_plan(intent: ClassifiedIntent) -> ExecutionPlan:
 
     parallel_groups = _topological_sort(steps)
 
-    return ExecutionPlan(steps=steps, parallel_groups=parallel_groups)
+    return ExecutionPlan(
+        steps=steps,
+        parallel_groups=parallel_groups,
+        search_batches=_search_batches(steps, parallel_groups),
+    )
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import json
 import logging
+from collections import Counter
+from collections.abc import AsyncIterator
 
 from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.core.response_templates import render_template
 from app.schemas.query import StepResult, ActionTaken
 
 logger = logging.getLogger(__name__)
@@ -32,6 +35,8 @@ Operation results:
 Generate a natural language response:"""
 
 _client: AsyncOpenAI | None = None
+# Responses produced per synthesis path, for /health/synthesis
+_path_counts: Counter[str] = Counter({"template": 0, "llm": 0, "failed": 0})
 
 
 def _get_client() -> AsyncOpenAI:
@@ -54,12 +59,8 @@ def _format_results(step_results: list[StepResult]) -> str:
     return "\n---\n".join(parts)
 
 
-async def synthesize_response(
-    query: str,
-    step_results: list[StepResult],
-) -> tuple[str, list[ActionTaken]]:
-    """Generate a natural language response from step results."""
-    actions_taken = [
+def summarize_actions(step_results: list[StepResult]) -> list[ActionTaken]:
+    return [
         ActionTaken(
             service=r.agent,
             action=r.action,
@@ -69,29 +70,98 @@ async def synthesize_response(
         for r in step_results
     ]
 
-    # If all steps failed, provide a graceful fallback
-    if all(r.status == "failed" for r in step_results):
-        return (
-            "I wasn't able to complete your request. "
-            + " ".join(f"The {r.agent} service reported: {r.error}" for r in step_results)
-            + "\nPlease try again or rephrase your query.",
-            actions_taken,
-        )
 
+def _failure_message(step_results: list[StepResult]) -> str | None:
+    """Fixed reply when every step failed, so the LLM is not asked to summarize nothing."""
+    if not all(r.status == "failed" for r in step_results):
+        return None
+    return (
+        "I wasn't able to complete your request. "
+        + " ".join(f"The {r.agent} service reported: {r.error}" for r in step_results)
+        + "\nPlease try again or rephrase your query."
+    )
+
+
+def _local_response(step_results: list[StepResult], user_timezone: str = "UTC") -> tuple[str, str] | None:
+    """``(text, path)`` when the response needs no LLM call."""
+    failure = _failure_message(step_results)
+    if failure is not None:
+        return failure, "failed"
+    if settings.synthesis_templates_enabled:
+        text = render_template(step_results, user_timezone)
+        if text is not None:
+            return text, "template"
+    return None
+
+
+def get_synthesis_stats() -> dict:
+    return dict(_path_counts)
+
+
+def _messages(query: str, step_results: list[StepResult]) -> list[dict]:
     prompt = SYNTHESIS_PROMPT.format(
         query=query,
         results=_format_results(step_results),
     )
+    return [{"role": "user", "content": prompt}]
+
+
+async def synthesize_response(
+    query: str,
+    step_results: list[StepResult],
+    user_timezone: str = "UTC",
+) -> tuple[str, list[ActionTaken], str]:
+    """Generate a natural language response from step results.
+
+    Also returns the synthesis path used: "template", "failed" or "llm".
+    """
+    actions_taken = summarize_actions(step_results)
 
+    # All-failed fallback, or a single templated step
+    local = _local_response(step_results, user_timezone)
+    if local is not None:
+        _path_counts[local[1]] += 1
+        return local[0], actions_taken, local[1]
+
+    _path_counts["llm"] += 1
     client = _get_client()
     response = await client.chat.completions.create(
         model=settings.openai_model,
-        messages=[{"role": "user", "content": prompt}],
+        messages=_messages(query, step_results),
         temperature=0.3,
         max_tokens=1000,
     )
 
-    return response.choices[0].message.content or "", actions_taken
+    return response.choices[0].message.content or "", actions_taken, "llm"
+
+
+async def stream_response(
+    query: str,
+    step_results: list[StepResult],
+    user_timezone: str = "UTC",
+) -> AsyncIterator[tuple[str, str]]:
+    """Yield ``(path, chunk)`` pairs as the model generates the response text.
+
+    Responses that need no LLM call come back as a single chunk.
+    """
+    local = _local_response(step_results, user_timezone)
+    if local is not None:
+        _path_counts[local[1]] += 1
+        yield local[1], local[0]
+        return
+
+    _path_counts["llm"] += 1
+    client = _get_client()
+    stream = await client.chat.completions.create(
+        model=settings.openai_model,
+        messages=_messages(query, step_results),
+        temperature=0.3,
+        max_tokens=1000,
+        stream=True,
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield "llm", chunk.choices[0].delta.content
 
 
 def _summarize_data(data) -> str | None:
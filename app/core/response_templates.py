@@ -0,0 +1,154 @@
+"""Deterministic responses for single-step plans, rendered without the LLM.
+
+Each renderer takes the data of one successful step and returns the same
+✓/⚠ formatted text the synthesis prompt asks the model for. Steps whose action
+or data shape has no renderer return None and go to the LLM.
+
+Cached timestamps are UTC; they are shown in the user's timezone, and clock
+times carry the zone abbreviation.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timezone, tzinfo
+from email.utils import parsedate_to_datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.schemas.query import StepResult
+
+MAX_LISTED = 10
+
+_MIME_LABELS = {
+    "application/pdf": "PDF",
+    "application/vnd.google-apps.document": "Google Doc",
+    "application/vnd.google-apps.spreadsheet": "Google Sheet",
+    "application/vnd.google-apps.presentation": "Google Slides",
+    "application/vnd.google-apps.folder": "folder",
+}
+
+
+def _zone(user_timezone: str) -> tzinfo:
+    try:
+        return ZoneInfo(user_timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def _parse_time(value, tz: tzinfo) -> datetime | None:
+    """``value`` in ``tz``; naive values are taken as UTC, like the cache columns."""
+    if isinstance(value, datetime):
+        dt = value
+    elif not isinstance(value, str) or not value:
+        return None
+    else:
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                dt = parsedate_to_datetime(value)  # RFC 2822 email Date headers
+            except (TypeError, ValueError):
+                return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(tz)
+
+
+def _day(dt: datetime) -> str:
+    return f"{dt:%a, %b} {dt.day}"
+
+
+def _clock(dt: datetime) -> str:
+    return f"{dt.hour % 12 or 12}:{dt:%M} {dt:%p}"
+
+
+def _listing(noun: str, items: list[dict], line: Callable[[dict, tzinfo], str], tz: tzinfo) -> str:
+    if not items:
+        return f"⚠ I couldn't find any matching {noun}s."
+    lines = [f"✓ Found {len(items)} {noun}{'s' if len(items) != 1 else ''}:"]
+    lines += [f"- {line(item, tz)}" for item in items[:MAX_LISTED]]
+    if len(items) > MAX_LISTED:
+        lines.append(f"...and {len(items) - MAX_LISTED} more.")
+    return "\n".join(lines)
+
+
+def _event_line(event: dict, tz: tzinfo) -> str:
+    parts = [event.get("title") or "(untitled event)"]
+    raw_start = event.get("start_time")
+    if isinstance(raw_start, str) and len(raw_start) == 10:  # all-day events carry a bare date, no zone
+        parts.append(_day(datetime.fromisoformat(raw_start)))
+    elif (start := _parse_time(raw_start, tz)) is not None:
+        end = _parse_time(event.get("end_time"), tz)
+        if end and end.date() == start.date():
+            parts.append(f"{_day(start)}, {_clock(start)}–{_clock(end)} {start:%Z}")
+        else:
+            parts.append(f"{_day(start)} at {_clock(start)} {start:%Z}")
+    if event.get("location"):
+        parts.append(event["location"])
+    return " — ".join(parts)
+
+
+def _email_line(email: dict, tz: tzinfo) -> str:
+    parts = [email.get("subject") or "(no subject)"]
+    if email.get("sender"):
+        parts.append(f"from {email['sender']}")
+    received = _parse_time(email.get("received_at") or email.get("date"), tz)
+    if received:
+        parts.append(_day(received))
+    return " — ".join(parts)
+
+
+def _file_line(file: dict, tz: tzinfo) -> str:
+    name = file.get("name") or "(untitled file)"
+    label = _MIME_LABELS.get(file.get("mime_type") or "")
+    parts = [f"{name} ({label})" if label else name]
+    modified = _parse_time(file.get("modified_at"), tz)
+    if modified:
+        parts.append(f"modified {_day(modified)}")
+    return " — ".join(parts)
+
+
+def _draft(data: dict) -> str:
+    return (f"✓ Drafted an email to {data.get('to')} with the subject \"{data.get('subject')}\".\n"
+            "Would you like me to send it?")
+
+
+def _sent(data: dict) -> str:
+    return f"✓ Sent the email \"{data.get('subject')}\" to {data.get('to')}."
+
+
+def _created(data: dict) -> str:
+    return f"✓ Created the event \"{data.get('title')}\"."
+
+
+def _shared(data: dict) -> str:
+    return f"✓ Shared the file with {data.get('shared_with')} as {data.get('role', 'reader')}."
+
+
+_LISTS: dict[str, tuple[str, Callable[[dict, tzinfo], str]]] = {
+    "search_events": ("calendar event", _event_line),
+    "search_emails": ("email", _email_line),
+    "search_files": ("file", _file_line),
+}
+
+_WRITES: dict[str, Callable[[dict], str]] = {
+    "draft_email": _draft,
+    "send_email": _sent,
+    "create_event": _created,
+    "update_event": lambda data: "✓ Updated the event.",
+    "delete_event": lambda data: "✓ Deleted the event.",
+    "share_file": _shared,
+}
+
+
+def render_template(step_results: list[StepResult], user_timezone: str = "UTC") -> str | None:
+    """The response for a plan of one successful templated step, else None."""
+    if len(step_results) != 1 or step_results[0].status != "success":
+        return None
+    result = step_results[0]
+    if result.action in _LISTS and isinstance(result.data, list):
+        noun, line = _LISTS[result.action]
+        return _listing(noun, [item for item in result.data if isinstance(item, dict)], line, _zone(user_timezone))
+    if result.action in _WRITES and isinstance(result.data, dict):
+        return _WRITES[result.action](result.data)
+    return None
@@ -1,3 +1,6 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -30,3 +33,24 @@ async def get_db() -> AsyncSession:
             raise
         finally:
             await session.close()
+
+
+# The session bound to the running orchestrator step. Each step runs in its own
+# task, so concurrent steps see their own session instead of sharing the
+# request's AsyncSession, which cannot run statements concurrently.
+current_session: ContextVar[AsyncSession | None] = ContextVar("current_session", default=None)
+
+
+@asynccontextmanager
+async def step_session():
+    """Short-lived session for one orchestrator step, exposed through ``current_session``.
+
+    The pool connection is only checked out on the first statement, so steps
+    that never touch the cache tables cost nothing.
+    """
+    async with async_session_factory() as session:
+        token = current_session.set(session)
+        try:
+            yield session
+        finally:
+            current_session.reset(token)
@@ -0,0 +1,47 @@
+"""gin index on gcal_cache.attendees
+
+Revision ID: 3d9e7b25f1c0
+Revises: 8c3f1a6d2e74
+Create Date: 2026-10-17 11:40:03.271864
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9e7b25f1c0'
+down_revision: Union[str, Sequence[str], None] = '8c3f1a6d2e74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Attendee filters match the lower-cased email exactly, and incremental sync
+# never rewrites unchanged events, so existing rows are lower-cased here
+LOWERCASE_ATTENDEE_EMAILS = """
+UPDATE gcal_cache
+SET attendees = jsonb_set(attendees, '{list}', (
+    SELECT jsonb_agg(
+        CASE WHEN a ? 'email' THEN a || jsonb_build_object('email', lower(a->>'email')) ELSE a END
+        ORDER BY i
+    )
+    FROM jsonb_array_elements(attendees->'list') WITH ORDINALITY AS t(a, i)
+))
+WHERE jsonb_typeof(attendees->'list') = 'array'
+  AND EXISTS (
+      SELECT 1 FROM jsonb_array_elements(attendees->'list') AS t(a)
+      WHERE a->>'email' <> lower(a->>'email')
+  )
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(LOWERCASE_ATTENDEE_EMAILS)
+    op.create_index('ix_gcal_attendees', 'gcal_cache', ['attendees'], unique=False, postgresql_using='gin', postgresql_ops={'attendees': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_gcal_attendees', table_name='gcal_cache', postgresql_using='gin', postgresql_ops={'attendees': 'jsonb_path_ops'})
@@ -0,0 +1,31 @@
+"""add content_hash to cache tables
+
+Revision ID: 5b8e2d41c7a9
+Revises: 12fcc2cf93a6
+Create Date: 2026-10-16 23:05:12.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2d41c7a9'
+down_revision: Union[str, Sequence[str], None] = '12fcc2cf93a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('gmail_cache', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('gcal_cache', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('gdrive_cache', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('gdrive_cache', 'content_hash')
+    op.drop_column('gcal_cache', 'content_hash')
+    op.drop_column('gmail_cache', 'content_hash')
@@ -0,0 +1,36 @@
+"""settings-driven embedding dimensions and coarse-to-fine index
+
+Revision ID: 7a2c5e9d4b16
+Revises: e1f4c8a93b27
+Create Date: 2026-10-17 16:41:08.215730
+
+Resizes the embedding columns to EMBEDDING_DIMENSIONS and rebuilds the
+indexes, over the leading EMBEDDING_SEARCH_DIMENSIONS when set. Narrowing
+truncates and re-normalises the stored vectors (Matryoshka truncation);
+widening clears them. Run scripts/reembed_cache.py afterwards to refresh the
+affected rows.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.vector_index import rebuild_vector_indexes
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2c5e9d4b16'
+down_revision: Union[str, Sequence[str], None] = 'e1f4c8a93b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rebuild_vector_indexes(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Dimensions follow the settings; downgrade by restoring the previous
+    # EMBEDDING_DIMENSIONS and re-running the rebuild.
+    rebuild_vector_indexes(op.get_bind())
@@ -0,0 +1,34 @@
+"""configurable vector index type and size
+
+Revision ID: 8c3f1a6d2e74
+Revises: 5b8e2d41c7a9
+Create Date: 2026-10-17 09:12:40.553118
+
+Rebuilds the embedding indexes from VECTOR_INDEX_TYPE / IVFFLAT_LISTS /
+HNSW_M / HNSW_EF_CONSTRUCTION. To switch index type later, change the
+settings and run ``python scripts/rebuild_vector_indexes.py``.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.vector_index import VECTOR_INDEXES, rebuild_vector_indexes
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3f1a6d2e74'
+down_revision: Union[str, Sequence[str], None] = '5b8e2d41c7a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rebuild_vector_indexes(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, name in VECTOR_INDEXES.items():
+        op.drop_index(name, table_name=table, if_exists=True)
+        op.create_index(name, table, ['embedding'], unique=False, postgresql_using='ivfflat', postgresql_with={'lists': 100}, postgresql_ops={'embedding': 'vector_cosine_ops'})
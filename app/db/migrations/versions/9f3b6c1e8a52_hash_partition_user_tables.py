@@ -0,0 +1,45 @@
+"""hash-partition user tables by user_id
+
+Revision ID: 9f3b6c1e8a52
+Revises: 7a2c5e9d4b16
+Create Date: 2026-10-17 19:12:44.503918
+
+Rebuilds gmail_cache, gcal_cache, gdrive_cache and conversations as
+PARTITION BY HASH (user_id) with PARTITION_MODULUS partitions, primary keys
+(id, user_id) and one ANN index per partition. Rows are copied in place and
+writes are blocked while this runs; use scripts/repartition.py to change the
+modulus of a live database later.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.partitioning import current_modulus, partition_modulus, repartition
+from app.models.cache import GCalCache, GDriveCache, GmailCache
+from app.models.conversation import Conversation
+
+# revision identifiers, used by Alembic.
+revision: str = '9f3b6c1e8a52'
+down_revision: Union[str, Sequence[str], None] = '7a2c5e9d4b16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = [GmailCache.__table__, GCalCache.__table__, GDriveCache.__table__, Conversation.__table__]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    modulus = partition_modulus()
+    for table in TABLES:
+        if current_modulus(conn, table.name) != modulus:
+            repartition(conn, table, modulus)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    for table in TABLES:
+        if current_modulus(conn, table.name):
+            repartition(conn, table, 0)
@@ -0,0 +1,35 @@
+"""halfvec storage and binary-quantized embedding indexes
+
+Revision ID: e1f4c8a93b27
+Revises: 3d9e7b25f1c0
+Create Date: 2026-10-17 14:02:57.904415
+
+Converts the embedding columns to VECTOR_STORAGE_TYPE and rebuilds the
+indexes, over binary_quantize(embedding) when VECTOR_BINARY_QUANTIZE is
+set. Requires pgvector >= 0.7.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.vector_index import EMBEDDING_DIM, VECTOR_INDEXES, rebuild_vector_indexes
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f4c8a93b27'
+down_revision: Union[str, Sequence[str], None] = '3d9e7b25f1c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rebuild_vector_indexes(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, name in VECTOR_INDEXES.items():
+        op.drop_index(name, table_name=table, if_exists=True)
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN embedding TYPE vector({EMBEDDING_DIM}) USING embedding::vector({EMBEDDING_DIM})")
+        op.create_index(name, table, ['embedding'], unique=False, postgresql_using='ivfflat', postgresql_with={'lists': 100}, postgresql_ops={'embedding': 'vector_cosine_ops'})
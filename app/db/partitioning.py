@@ -0,0 +1,216 @@
+"""Hash partitioning of the per-user tables by ``user_id``.
+
+``gmail_cache``, ``gcal_cache``, ``gdrive_cache`` and ``conversations`` are
+``PARTITION BY HASH (user_id)`` with ``partition_modulus`` partitions named
+``{table}_p{remainder}``. Every query filters on ``user_id``, so the planner
+prunes to one partition, and each partition has its own ANN index. Postgres
+requires the partition key in every unique constraint, so primary keys are
+``(id, user_id)``.
+
+Repartitioning (a modulus change, or converting plain tables) copies into a
+shadow table:
+
+1. ``create_shadow`` builds ``{table}_repart`` with the new layout, plus a
+   trigger that mirrors writes on the live table into it.
+2. ``backfill_shadow`` copies existing rows in primary-key batches.
+3. ``build_shadow_indexes`` builds the ANN indexes, one per partition.
+4. ``swap_shadow`` briefly locks the live table, drops it and renames the
+   shadow table and its objects into place.
+
+The steps are sync so they run from an Alembic migration or via
+``AsyncConnection.run_sync``. ``scripts/repartition.py`` runs each in its own
+transaction so the live table stays writable until the swap.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import DDL, Index, Table, UniqueConstraint, event, text
+from sqlalchemy.engine import Connection
+
+from app.config import get_settings
+from app.db.vector_index import VECTOR_INDEXES, _partitions, create_vector_index
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PARTITIONED_TABLES = ("gmail_cache", "gcal_cache", "gdrive_cache", "conversations")
+PARTITION_KEY = "user_id"
+
+_SHADOW = "_repart"
+
+
+def partition_modulus() -> int:
+    if settings.partition_modulus < 0:
+        raise ValueError(f"Unsupported partition_modulus {settings.partition_modulus}")
+    return settings.partition_modulus
+
+
+def partition_table_args() -> dict:
+    """Dialect options for a partitioned model's ``__table_args__``."""
+    if not partition_modulus():
+        return {}
+    return {"postgresql_partition_by": f"HASH ({PARTITION_KEY})"}
+
+
+def partitions_ddl(table: str, modulus: int) -> list[str]:
+    return [
+        f"CREATE TABLE IF NOT EXISTS {table}_p{r} PARTITION OF {table} "
+        f"FOR VALUES WITH (MODULUS {modulus}, REMAINDER {r})"
+        for r in range(modulus)
+    ]
+
+
+def create_partitions_with(table: Table) -> None:
+    """Create ``table``'s partitions whenever ``metadata.create_all`` creates it."""
+    for statement in partitions_ddl(table.name, partition_modulus()):
+        event.listen(table, "after_create", DDL(statement))
+
+
+def current_modulus(conn: Connection, table: str) -> int:
+    """Number of hash partitions ``table`` has; 0 when it is a plain table."""
+    return len(_partitions(conn, table))
+
+
+def _vector_index(table: Table) -> str | None:
+    return VECTOR_INDEXES.get(table.name)
+
+
+def _index_sql(index: Index, table: str, name: str) -> str:
+    options = index.dialect_options["postgresql"]
+    ops = options["ops"] or {}
+    columns = ", ".join(f"{c.name} {ops[c.name]}" if c.name in ops else c.name for c in index.columns)
+    return f"CREATE INDEX {name} ON {table} USING {options['using'] or 'btree'} ({columns})"
+
+
+def create_shadow(conn: Connection, table: Table, modulus: int) -> str:
+    """Create ``{table}_repart`` with ``modulus`` partitions (0 = unpartitioned).
+
+    Columns come from the live table; keys and secondary indexes from the model.
+    Every object gets the ``_repart`` suffix until the swap. A trigger mirrors
+    inserts, updates and deletes on the live table from here on.
+    """
+    name, shadow = table.name, f"{table.name}{_SHADOW}"
+    conn.execute(text(f"DROP TABLE IF EXISTS {shadow}"))
+    partition_by = f" PARTITION BY HASH ({PARTITION_KEY})" if modulus else ""
+    conn.execute(text(f"CREATE TABLE {shadow} (LIKE {name} INCLUDING DEFAULTS INCLUDING STORAGE){partition_by}"))
+    for statement in partitions_ddl(shadow, modulus):
+        conn.execute(text(statement))
+
+    pk = ", ".join(c.name for c in table.primary_key.columns)
+    conn.execute(text(f"ALTER TABLE {shadow} ADD CONSTRAINT {name}_pkey{_SHADOW} PRIMARY KEY ({pk})"))
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            columns = ", ".join(c.name for c in constraint.columns)
+            conn.execute(text(f"ALTER TABLE {shadow} ADD CONSTRAINT {constraint.name}{_SHADOW} UNIQUE ({columns})"))
+    for fk in table.foreign_keys:
+        conn.execute(text(
+            f"ALTER TABLE {shadow} ADD CONSTRAINT {name}_{fk.parent.name}_fkey{_SHADOW} "
+            f"FOREIGN KEY ({fk.parent.name}) REFERENCES {fk.column.table.name} ({fk.column.name})"
+        ))
+    for index in table.indexes:
+        if index.name != _vector_index(table):
+            conn.execute(text(_index_sql(index, shadow, f"{index.name}{_SHADOW}")))
+
+    key = " AND ".join(f"{c.name} = OLD.{c.name}" for c in table.primary_key.columns)
+    updates = ", ".join(f"{c.name} = EXCLUDED.{c.name}" for c in table.columns if not c.primary_key)
+    conn.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {shadow}_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {shadow} WHERE {key};
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {shadow} SELECT NEW.* ON CONFLICT ({pk}) DO UPDATE SET {updates};
+            END IF;
+            RETURN NULL;
+        END $$
+    """))
+    conn.execute(text(
+        f"CREATE TRIGGER {shadow}_sync AFTER INSERT OR UPDATE OR DELETE ON {name} "
+        f"FOR EACH ROW EXECUTE FUNCTION {shadow}_sync()"
+    ))
+    logger.info("Created %s with %d partitions", shadow, modulus)
+    return shadow
+
+
+def backfill_shadow(conn: Connection, table: Table, after_id=None, batch_size: int = 5000):
+    """Copy the next ``batch_size`` rows by ``id`` into the shadow table.
+
+    Returns the last id copied, or None when the table is exhausted. Rows the
+    trigger already mirrored are left alone.
+    """
+    name, shadow = table.name, f"{table.name}{_SHADOW}"
+    where, params = "", {"batch_size": batch_size}
+    if after_id is not None:
+        where, params["after_id"] = "WHERE id > :after_id", after_id
+    return conn.execute(text(f"""
+        WITH batch AS (SELECT * FROM {name} {where} ORDER BY id LIMIT :batch_size),
+             copied AS (INSERT INTO {shadow} SELECT * FROM batch ON CONFLICT DO NOTHING)
+        SELECT id FROM batch ORDER BY id DESC LIMIT 1
+    """), params).scalar_one_or_none()
+
+
+def build_shadow_indexes(conn: Connection, table: Table) -> None:
+    index = _vector_index(table)
+    if index:
+        create_vector_index(conn, f"{table.name}{_SHADOW}", index, suffix=_SHADOW)
+
+
+def _strip_suffix(conn: Connection, relation: str) -> None:
+    """Rename ``relation``'s suffixed constraints and indexes to their final names.
+
+    Constraints a partition inherited from its parent keep their names.
+    """
+    constraints = conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:rel AS regclass) "
+        "AND conparentid = 0 AND conname LIKE :pattern"
+    ), {"rel": relation, "pattern": f"%{_SHADOW}"}).scalars().all()
+    for constraint in constraints:
+        conn.execute(text(f"ALTER TABLE {relation} RENAME CONSTRAINT {constraint} TO {constraint[:-len(_SHADOW)]}"))
+    indexes = conn.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE i.indrelid = CAST(:rel AS regclass) AND c.relname LIKE :pattern"
+    ), {"rel": relation, "pattern": f"%{_SHADOW}"}).scalars().all()
+    for index in indexes:
+        conn.execute(text(f"ALTER INDEX {index} RENAME TO {index[:-len(_SHADOW)]}"))
+
+
+def swap_shadow(conn: Connection, table: Table) -> None:
+    """Replace the live table with its shadow. Holds an exclusive lock for the rest of the transaction."""
+    name, shadow = table.name, f"{table.name}{_SHADOW}"
+    conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+    live = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar_one()
+    copied = conn.execute(text(f"SELECT count(*) FROM {shadow}")).scalar_one()
+    if live != copied:
+        raise RuntimeError(f"{shadow} has {copied} rows but {name} has {live}; not swapping")
+
+    conn.execute(text(f"DROP TRIGGER {shadow}_sync ON {name}"))
+    conn.execute(text(f"DROP FUNCTION {shadow}_sync()"))
+    conn.execute(text(f"DROP TABLE {name}"))
+    conn.execute(text(f"ALTER TABLE {shadow} RENAME TO {name}"))
+    _strip_suffix(conn, name)
+    for partition in _partitions(conn, name):
+        final = partition.replace(shadow, name, 1)
+        conn.execute(text(f"ALTER TABLE {partition} RENAME TO {final}"))
+        _strip_suffix(conn, final)
+    logger.info("Swapped %s into place (%d rows)", name, live)
+
+
+def drop_shadow(conn: Connection, table: Table) -> None:
+    """Abandon a repartition: remove the trigger and the shadow table."""
+    shadow = f"{table.name}{_SHADOW}"
+    conn.execute(text(f"DROP TRIGGER IF EXISTS {shadow}_sync ON {table.name}"))
+    conn.execute(text(f"DROP FUNCTION IF EXISTS {shadow}_sync()"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {shadow}"))
+
+
+def repartition(conn: Connection, table: Table, modulus: int, batch_size: int = 5000) -> None:
+    """All four steps in the caller's transaction. Used by migrations; blocks writes throughout."""
+    create_shadow(conn, table, modulus)
+    last_id = None
+    while (last_id := backfill_shadow(conn, table, last_id, batch_size)) is not None:
+        pass
+    build_shadow_indexes(conn, table)
+    swap_shadow(conn, table)
@@ -0,0 +1,248 @@
+"""Settings-driven pgvector storage, index definitions and query-time tuning.
+
+Embeddings are stored as ``vector`` (float32) or ``halfvec`` (float16), per
+``vector_storage_type``. The cache tables share one embedding index layout,
+chosen by ``vector_index_type``:
+
+- ``ivfflat``: ``lists`` is taken from ``ivfflat_lists``, or sized from the
+  table's row count when that is 0. Queries set ``ivfflat.probes``.
+- ``hnsw``: built with ``hnsw_m``/``hnsw_ef_construction``. Queries set
+  ``hnsw.ef_search``.
+
+The column width is ``embedding_dimensions``. Two options make the index
+smaller than the stored vectors:
+
+- ``embedding_search_dimensions``: index only the leading N dimensions, using
+  Matryoshka truncation via ``subvector``.
+- ``vector_binary_quantize``: index ``binary_quantize(...)`` with Hamming
+  distance.
+
+Either one makes searches two-stage. They take ``limit * vector_rerank_factor``
+candidates from the index, then re-rank them by exact cosine distance on the
+full vector.
+
+On hash-partitioned tables (``app/db/partitioning.py``) each partition has its
+own index, sized from its own row count.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+
+from pgvector.sqlalchemy import HALFVEC, Vector
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+EMBEDDING_DIM = settings.embedding_dimensions
+
+# table -> embedding index name
+VECTOR_INDEXES: dict[str, str] = {
+    "gmail_cache": "ix_gmail_embedding",
+    "gcal_cache": "ix_gcal_embedding",
+    "gdrive_cache": "ix_gdrive_embedding",
+}
+
+DEFAULT_IVFFLAT_LISTS = 100
+
+
+def storage_type() -> str:
+    if settings.vector_storage_type not in ("vector", "halfvec"):
+        raise ValueError(f"Unsupported vector_storage_type '{settings.vector_storage_type}'")
+    return settings.vector_storage_type
+
+
+def embedding_sql_type() -> str:
+    return f"{storage_type()}({EMBEDDING_DIM})"
+
+
+def embedding_column_type():
+    """SQLAlchemy type of the ``embedding`` column."""
+    return HALFVEC(EMBEDDING_DIM) if storage_type() == "halfvec" else Vector(EMBEDDING_DIM)
+
+
+def coarse_dimensions() -> int:
+    """Leading dimensions used by the ANN pass, or 0 when it uses the full vector."""
+    n = settings.embedding_search_dimensions
+    return n if 0 < n < EMBEDDING_DIM else 0
+
+
+def is_two_stage() -> bool:
+    """Whether the index orders an approximation that needs an exact re-rank."""
+    return bool(coarse_dimensions()) or settings.vector_binary_quantize
+
+
+def index_expression(vector: str = "embedding") -> str:
+    """The indexed form of ``vector``: optionally truncated, then optionally binary-quantized.
+
+    Applied to the column for the index and to the query vector for the ANN pass.
+    """
+    expr, dim = vector, EMBEDDING_DIM
+    n = coarse_dimensions()
+    if n:
+        expr, dim = f"subvector({expr}, 1, {n})::{storage_type()}({n})", n
+    if settings.vector_binary_quantize:
+        expr = f"binary_quantize({expr})::bit({dim})"
+    return f"({expr})"
+
+
+def index_distance_operator() -> str:
+    return "<~>" if settings.vector_binary_quantize else "<=>"
+
+
+def _opclass() -> str:
+    return "bit_hamming_ops" if settings.vector_binary_quantize else f"{storage_type()}_cosine_ops"
+
+
+def ivfflat_lists_for(row_count: int) -> int:
+    """pgvector's guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond."""
+    if row_count <= 1_000_000:
+        return max(10, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def vector_index_expression():
+    """Indexed expression for ``sqlalchemy.Index``: the column, or its reduced form."""
+    if is_two_stage():
+        return text(f"{index_expression()} {_opclass()}")
+    return "embedding"
+
+
+def vector_index_kwargs(row_count: int | None = None) -> dict:
+    """Keyword arguments for ``sqlalchemy.Index`` / ``op.create_index`` on ``embedding``."""
+    kwargs: dict = {}
+    if not is_two_stage():
+        kwargs["postgresql_ops"] = {"embedding": _opclass()}
+    if settings.vector_index_type == "hnsw":
+        return {
+            "postgresql_using": "hnsw",
+            "postgresql_with": {"m": settings.hnsw_m, "ef_construction": settings.hnsw_ef_construction},
+            **kwargs,
+        }
+    if settings.vector_index_type != "ivfflat":
+        raise ValueError(f"Unsupported vector_index_type '{settings.vector_index_type}'")
+    if settings.ivfflat_lists:
+        lists = settings.ivfflat_lists
+    elif row_count is not None:
+        lists = ivfflat_lists_for(row_count)
+    else:
+        lists = DEFAULT_IVFFLAT_LISTS
+    return {"postgresql_using": "ivfflat", "postgresql_with": {"lists": lists}, **kwargs}
+
+
+def _create_index_sql(table: str, name: str, kwargs: dict) -> str:
+    options = ", ".join(f"{k} = {v}" for k, v in kwargs["postgresql_with"].items())
+    target = f"{index_expression()} {_opclass()}" if is_two_stage() else f"embedding {_opclass()}"
+    return f"CREATE INDEX {name} ON {table} USING {kwargs['postgresql_using']} ({target}) WITH ({options})"
+
+
+def _convert_column_sql(table: str, current_type: str, target_type: str) -> str:
+    """ALTER for a storage or width change.
+
+    Narrowing uses Matryoshka truncation: the leading dimensions of a
+    text-embedding-3 vector, re-normalised, match a natively shorter embedding.
+    Widening cannot be derived, so those embeddings are cleared for re-embedding.
+    """
+    current_dim = int(current_type[current_type.index("(") + 1 : -1])
+    if current_dim == EMBEDDING_DIM:
+        using = f"embedding::{target_type}"
+    elif current_dim > EMBEDDING_DIM:
+        using = f"l2_normalize(subvector(embedding, 1, {EMBEDDING_DIM}))::{target_type}"
+    else:
+        using = "NULL"
+    return f"ALTER TABLE {table} ALTER COLUMN embedding TYPE {target_type} USING {using}"
+
+
+def _partitions(conn: Connection, table: str) -> list[str]:
+    """Partitions of ``table``, or an empty list when it is not partitioned."""
+    return list(conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:table AS regclass) ORDER BY c.relname"
+    ), {"table": table}).scalars())
+
+
+def create_vector_index(conn: Connection, table: str, name: str, *, suffix: str = "") -> None:
+    """Create the embedding index ``name + suffix`` on ``table`` from the settings.
+
+    On a partitioned table every partition gets its own index, sized from that
+    partition's row count, attached to an index on the parent.
+    """
+    partitions = _partitions(conn, table)
+    if not partitions:
+        row_count = conn.execute(text(f"SELECT count(*) FROM {table}")).scalar_one()
+        kwargs = vector_index_kwargs(row_count)
+        logger.info("Building %s on %s (%d rows): %s %s on %s", name + suffix, table, row_count,
+                    kwargs["postgresql_using"], kwargs["postgresql_with"],
+                    index_expression() if is_two_stage() else "embedding")
+        conn.execute(text(_create_index_sql(table, name + suffix, kwargs)))
+        return
+
+    parent_sql = _create_index_sql(table, name + suffix, vector_index_kwargs())
+    conn.execute(text(parent_sql.replace(f" ON {table} ", f" ON ONLY {table} ", 1)))
+    for i, partition in enumerate(partitions):
+        row_count = conn.execute(text(f"SELECT count(*) FROM {partition}")).scalar_one()
+        kwargs = vector_index_kwargs(row_count)
+        child = f"{name}_p{i}{suffix}"
+        logger.info("Building %s on %s (%d rows): %s %s", child, partition, row_count,
+                    kwargs["postgresql_using"], kwargs["postgresql_with"])
+        conn.execute(text(_create_index_sql(partition, child, kwargs)))
+        conn.execute(text(f"ALTER INDEX {name + suffix} ATTACH PARTITION {child}"))
+
+
+def rebuild_vector_indexes(conn: Connection) -> None:
+    """Bring the cache tables' embedding storage and indexes in line with the settings.
+
+    Converts the column type and width when needed, then drops and recreates
+    the index (per partition on partitioned tables). Sync so it can run from
+    an Alembic migration or via ``AsyncConnection.run_sync``.
+    """
+    target_type = embedding_sql_type()
+    for table, name in VECTOR_INDEXES.items():
+        current_type = conn.execute(text(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = CAST(:table AS regclass) AND attname = 'embedding'"
+        ), {"table": table}).scalar_one()
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        if current_type != target_type:
+            logger.info("Converting %s.embedding from %s to %s", table, current_type, target_type)
+            conn.execute(text(_convert_column_sql(table, current_type, target_type)))
+            # Hashes include the dimensions, so rows are re-embedded by
+            # scripts/reembed_cache.py or on their next sync.
+        create_vector_index(conn, table, name)
+
+
+async def apply_search_settings(
+    db: AsyncSession,
+    *,
+    probes: int | None = None,
+    ef_search: int | None = None,
+    scale: int = 1,
+) -> None:
+    """Set the ANN search breadth for the current transaction (``SET LOCAL``).
+
+    ``scale`` multiplies the configured breadth, used to widen a filtered
+    search that came back short.
+    """
+    if settings.vector_index_type == "hnsw":
+        value = int(ef_search or settings.hnsw_ef_search) * scale
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {min(value, 1000)}"))
+    else:
+        value = int(probes or settings.ivfflat_probes) * scale
+        await db.execute(text(f"SET LOCAL ivfflat.probes = {value}"))
+    if settings.vector_iterative_scan != "off":
+        if settings.vector_iterative_scan not in ("strict_order", "relaxed_order"):
+            raise ValueError(f"Unsupported vector_iterative_scan '{settings.vector_iterative_scan}'")
+        await db.execute(text(
+            f"SET LOCAL {settings.vector_index_type}.iterative_scan = {settings.vector_iterative_scan}"
+        ))
+
+
+async def set_exact_scan(db: AsyncSession, enabled: bool) -> None:
+    """Disable index scans so ORDER BY distance is computed exactly over the filtered rows."""
+    await db.execute(text(f"SET LOCAL enable_indexscan = {'off' if enabled else 'on'}"))
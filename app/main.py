@@ -6,8 +6,13 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.cache.redis_client import close_redis
+from app.cache.redis_client import close_redis, get_local_cache_stats
 from app.config import get_settings
+from app.core.intent_classifier import get_intent_stats
+from app.core.response_synthesizer import get_synthesis_stats
+from app.services.embedding import get_embedding_batcher_stats
+from app.services.http_client import close_http_client, get_pool_stats
+from app.services.user_vector_index import get_user_index_stats
 
 settings = get_settings()
 
@@ -21,6 +26,7 @@ logging.basicConfig(
 async def lifespan(app: FastAPI):
     logging.getLogger(__name__).info("Starting Google Workspace Orchestrator")
     yield
+    await close_http_client()
     await close_redis()
     logging.getLogger(__name__).info("Shutting down")
 
@@ -52,3 +58,33 @@ app.include_router(sync_router, prefix="/api/v1")
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/health/http-pool")
+async def http_pool_stats():
+    return get_pool_stats()
+
+
+@app.get("/health/cache")
+async def local_cache_stats():
+    return get_local_cache_stats()
+
+
+@app.get("/health/embeddings")
+async def embedding_batcher_stats():
+    return get_embedding_batcher_stats()
+
+
+@app.get("/health/user-index")
+async def user_index_stats():
+    return get_user_index_stats()
+
+
+@app.get("/health/intent")
+async def intent_stats():
+    return get_intent_stats()
+
+
+@app.get("/health/synthesis")
+async def synthesis_stats():
+    return get_synthesis_stats()
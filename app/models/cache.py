@@ -1,31 +1,32 @@
 import uuid
 from datetime import datetime
 
-from pgvector.sqlalchemy import Vector
 from sqlalchemy import String, Text, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.database import Base
-
-EMBEDDING_DIM = 1536
+from app.db.partitioning import create_partitions_with, partition_table_args
+from app.db.vector_index import embedding_column_type, vector_index_expression, vector_index_kwargs
 
 
 class GmailCache(Base):
     __tablename__ = "gmail_cache"
     __table_args__ = (
         UniqueConstraint("user_id", "email_id", name="uq_gmail_user_email"),
-        Index("ix_gmail_embedding", "embedding", postgresql_using="ivfflat", postgresql_with={"lists": 100}, postgresql_ops={"embedding": "vector_cosine_ops"}),
+        Index("ix_gmail_embedding", vector_index_expression(), **vector_index_kwargs()),
+        partition_table_args(),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True, index=True)
     email_id: Mapped[str] = mapped_column(String(255), nullable=False)
     subject: Mapped[str | None] = mapped_column(Text, nullable=True)
     sender: Mapped[str | None] = mapped_column(String(255), nullable=True)
     recipients: Mapped[str | None] = mapped_column(Text, nullable=True)
     body_preview: Mapped[str | None] = mapped_column(Text, nullable=True)
-    embedding = mapped_column(Vector(EMBEDDING_DIM), nullable=True)
+    embedding = mapped_column(embedding_column_type(), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     received_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     synced_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
@@ -34,11 +35,13 @@ class GCalCache(Base):
     __tablename__ = "gcal_cache"
     __table_args__ = (
         UniqueConstraint("user_id", "event_id", name="uq_gcal_user_event"),
-        Index("ix_gcal_embedding", "embedding", postgresql_using="ivfflat", postgresql_with={"lists": 100}, postgresql_ops={"embedding": "vector_cosine_ops"}),
+        Index("ix_gcal_embedding", vector_index_expression(), **vector_index_kwargs()),
+        Index("ix_gcal_attendees", "attendees", postgresql_using="gin", postgresql_ops={"attendees": "jsonb_path_ops"}),
+        partition_table_args(),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True, index=True)
     event_id: Mapped[str] = mapped_column(String(255), nullable=False)
     title: Mapped[str | None] = mapped_column(Text, nullable=True)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -46,7 +49,8 @@ class GCalCache(Base):
     end_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     attendees: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     location: Mapped[str | None] = mapped_column(Text, nullable=True)
-    embedding = mapped_column(Vector(EMBEDDING_DIM), nullable=True)
+    embedding = mapped_column(embedding_column_type(), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     synced_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
 
@@ -54,20 +58,26 @@ class GDriveCache(Base):
     __tablename__ = "gdrive_cache"
     __table_args__ = (
         UniqueConstraint("user_id", "file_id", name="uq_gdrive_user_file"),
-        Index("ix_gdrive_embedding", "embedding", postgresql_using="ivfflat", postgresql_with={"lists": 100}, postgresql_ops={"embedding": "vector_cosine_ops"}),
+        Index("ix_gdrive_embedding", vector_index_expression(), **vector_index_kwargs()),
+        partition_table_args(),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True, index=True)
     file_id: Mapped[str] = mapped_column(String(255), nullable=False)
     name: Mapped[str | None] = mapped_column(Text, nullable=True)
     mime_type: Mapped[str | None] = mapped_column(String(255), nullable=True)
     content_preview: Mapped[str | None] = mapped_column(Text, nullable=True)
     modified_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
-    embedding = mapped_column(Vector(EMBEDDING_DIM), nullable=True)
+    embedding = mapped_column(embedding_column_type(), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     synced_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
 
+for _model in (GmailCache, GCalCache, GDriveCache):
+    create_partitions_with(_model.__table__)
+
+
 class SyncStatus(Base):
     __tablename__ = "sync_status"
     __table_args__ = (
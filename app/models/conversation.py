@@ -6,13 +6,15 @@ from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.database import Base
+from app.db.partitioning import create_partitions_with, partition_table_args
 
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (partition_table_args(),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True, index=True)
     query: Mapped[str] = mapped_column(Text, nullable=False)
     intent: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     execution_plan: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
@@ -20,3 +22,6 @@ class Conversation(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
     user: Mapped["User"] = relationship(back_populates="conversations")
+
+
+create_partitions_with(Conversation.__table__)
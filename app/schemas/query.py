@@ -9,6 +9,7 @@ from pydantic import BaseModel, Field
 class QueryRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=2000)
     conversation_id: uuid.UUID | None = None
+    user_timezone: str = Field("UTC", max_length=64, description="IANA timezone, e.g. America/New_York")
 
 
 class ActionTaken(BaseModel):
@@ -23,6 +24,7 @@ class QueryResponse(BaseModel):
     query: str
     response: str
     actions_taken: list[ActionTaken] = []
+    synthesis: str | None = None  # "template" | "llm" | "failed" | "clarification"
     created_at: datetime
 
 
@@ -46,6 +48,10 @@ class ExecutionStep(BaseModel):
 class ExecutionPlan(BaseModel):
     steps: list[ExecutionStep]
     parallel_groups: list[list[str]] = Field(description="Groups of step IDs that can run in parallel")
+    search_batches: list[list[str]] = Field(
+        default_factory=list,
+        description="Sibling search steps whose cache lookups run as one cross-service query",
+    )
 
 
 class StepResult(BaseModel):
@@ -55,6 +61,8 @@ class StepResult(BaseModel):
     status: str  # "success" | "failed" | "skipped"
     data: dict | list | str | None = None
     error: str | None = None
+    queue_ms: float | None = None  # from dependencies met to start (agent slot, combined search)
+    run_ms: float | None = None
 
 
 class SyncStatusResponse(BaseModel):
@@ -0,0 +1,159 @@
+"""Bulk writers for the gmail/gcal/gdrive cache tables.
+
+Rows are plain dicts keyed by column name. Each page is written with one
+``INSERT ... ON CONFLICT DO UPDATE`` per chunk; large backfills go through a
+COPY into a temporary staging table followed by a single merge.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.db.vector_index import embedding_sql_type
+from app.models.cache import GCalCache, GDriveCache, GmailCache
+from app.services.embedding import embedding_text_hash, generate_embeddings_batch
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# model -> (unique constraint, natural key column, columns only written on insert)
+UPSERT_KEYS: dict[type, tuple[str, str, frozenset[str]]] = {
+    GmailCache: ("uq_gmail_user_email", "email_id", frozenset({"received_at"})),
+    GCalCache: ("uq_gcal_user_event", "event_id", frozenset()),
+    GDriveCache: ("uq_gdrive_user_file", "file_id", frozenset()),
+}
+
+
+def _prepare(model: type, rows: list[dict]) -> list[dict]:
+    """Fill ``id``/``synced_at`` and drop duplicate keys (last one wins).
+
+    Postgres rejects an upsert that touches the same conflict target twice.
+    """
+    _, key, _ = UPSERT_KEYS[model]
+    now = datetime.now(timezone.utc)
+    unique: dict[tuple, dict] = {}
+    for row in rows:
+        row = {"id": uuid.uuid4(), "synced_at": now, **row}
+        unique[(row["user_id"], row[key])] = row
+    return list(unique.values())
+
+
+def _update_columns(model: type, columns: list[str]) -> list[str]:
+    _, key, insert_only = UPSERT_KEYS[model]
+    return [c for c in columns if c not in {"id", "user_id", key} | insert_only]
+
+
+async def attach_embeddings(db: AsyncSession, model: type, rows: list[dict], texts: list[str]) -> int:
+    """Embed the rows whose text changed since the last sync, in one batched call.
+
+    Stored ``content_hash`` values for the page are read with a single query. Rows
+    with a matching hash are left without an ``embedding`` key so the upsert keeps
+    the existing vector. Returns the number of rows that were embedded.
+    """
+    if not rows:
+        return 0
+    _, key, _ = UPSERT_KEYS[model]
+    key_column = getattr(model, key)
+    result = await db.execute(
+        select(key_column, model.content_hash).where(
+            model.user_id == rows[0]["user_id"],
+            key_column.in_([row[key] for row in rows]),
+        )
+    )
+    stored = {k: h for k, h in result.all()}
+
+    changed: list[tuple[dict, str]] = []
+    for row, text_ in zip(rows, texts):
+        digest = embedding_text_hash(text_)
+        if stored.get(row[key]) != digest:
+            row["content_hash"] = digest
+            changed.append((row, text_))
+
+    if changed:
+        embeddings = await generate_embeddings_batch([t for _, t in changed])
+        for (row, _), embedding in zip(changed, embeddings):
+            row["embedding"] = embedding
+    logger.info("%s: embedded %d of %d synced rows", model.__tablename__, len(changed), len(rows))
+    return len(changed)
+
+
+async def upsert_cache_rows(db: AsyncSession, model: type, rows: list[dict]) -> int:
+    """Insert or update ``rows`` in ``model``'s table; returns the number of rows written.
+
+    Rows may carry different column sets (e.g. with or without ``embedding``); each
+    set is written as its own statement so absent columns keep their stored values.
+    """
+    if not rows:
+        return 0
+    rows = _prepare(model, rows)
+    groups: dict[tuple[str, ...], list[dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(row), []).append(row)
+
+    constraint, _, _ = UPSERT_KEYS[model]
+    chunk_size = settings.bulk_upsert_chunk_size
+    for columns, group in groups.items():
+        if len(group) >= settings.bulk_copy_threshold:
+            await copy_upsert_cache_rows(db, model, group)
+            continue
+
+        for start in range(0, len(group), chunk_size):
+            stmt = insert(model).values(group[start : start + chunk_size])
+            stmt = stmt.on_conflict_do_update(
+                constraint=constraint,
+                set_={c: stmt.excluded[c] for c in _update_columns(model, list(columns))},
+            )
+            await db.execute(stmt)
+    return len(rows)
+
+
+async def copy_upsert_cache_rows(db: AsyncSession, model: type, rows: list[dict]) -> int:
+    """Backfill path: COPY rows into a temp staging table, then merge with one upsert.
+
+    The embedding column is staged as text and cast back to ``vector`` (or
+    ``halfvec``) during the merge so COPY does not need a pgvector binary codec
+    on the connection.
+    """
+    if not rows:
+        return 0
+    rows = _prepare(model, rows)
+    table = model.__tablename__
+    stage = f"_stage_{table}"
+    constraint, _, _ = UPSERT_KEYS[model]
+    columns = list(rows[0])
+    updates = _update_columns(model, columns)
+
+    await db.execute(text(f"DROP TABLE IF EXISTS {stage}"))
+    await db.execute(text(f"CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"))
+    if "embedding" in columns:
+        await db.execute(text(f"ALTER TABLE {stage} ALTER COLUMN embedding TYPE text"))
+
+    records = [tuple(_copy_value(row[c]) for c in columns) for row in rows]
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(stage, records=records, columns=columns)
+
+    select_cols = ", ".join(f"embedding::{embedding_sql_type()}" if c == "embedding" else c for c in columns)
+    set_clause = ", ".join(f"{c} = EXCLUDED.{c}" for c in updates)
+    await db.execute(text(
+        f"INSERT INTO {table} ({', '.join(columns)}) SELECT {select_cols} FROM {stage} "
+        f"ON CONFLICT ON CONSTRAINT {constraint} DO UPDATE SET {set_clause}"
+    ))
+    await db.execute(text(f"DROP TABLE {stage}"))
+    return len(rows)
+
+
+def _copy_value(value):
+    if isinstance(value, dict):
+        return json.dumps(value, default=str)
+    if isinstance(value, list):
+        return str(value)
+    return value
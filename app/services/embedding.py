@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
-import json
 
 from openai import AsyncOpenAI
 
 from app.config import get_settings
-from app.cache.redis_client import cache_get, cache_set
+from app.cache.embedding_codec import decode_embedding, encode_embedding
+from app.cache.redis_client import cache_get, cache_mget, cache_mset_with_ttl
+from app.cache.single_flight import single_flight
+from app.services.embedding_batcher import EmbeddingBatcher
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 _client: AsyncOpenAI | None = None
+_batcher: EmbeddingBatcher | None = None
 
 
 def _get_client() -> AsyncOpenAI:
@@ -21,39 +26,84 @@ def _get_client() -> AsyncOpenAI:
     return _client
 
 
+def _get_batcher() -> EmbeddingBatcher:
+    """Batcher bound to the running loop; rebuilt when a worker starts a new loop."""
+    global _batcher
+    if _batcher is None or _batcher.loop is not asyncio.get_running_loop():
+        _batcher = EmbeddingBatcher(
+            _embed_texts,
+            window=settings.embedding_batch_window_ms / 1000,
+            max_batch_size=settings.embedding_batch_max_size,
+        )
+    return _batcher
+
+
+def _cache_key(text: str) -> str:
+    """Cache key for ``text``; model and dimensions are included so a resize never serves stale vectors."""
+    return f"{settings.embedding_model}:{settings.embedding_dimensions}:{text}"
+
+
+def get_embedding_batcher_stats() -> dict:
+    return _batcher.stats() if _batcher is not None else {}
+
+
 async def generate_embedding(text: str) -> list[float]:
     """Generate embedding for a single text, with Redis caching."""
-    cached = await cache_get("emb", text)
+    key = _cache_key(text)
+    cached = await cache_get("emb", key, binary=True)
     if cached is not None:
-        return json.loads(cached)
+        return decode_embedding(cached)
+
+    async def recheck() -> list[float] | None:
+        cached = await cache_get("emb", key, binary=True)
+        return decode_embedding(cached) if cached is not None else None
+
+    return await single_flight("emb", key, lambda: _embed_uncached(text), recheck)
+
 
+async def _embed_uncached(text: str) -> list[float]:
+    if settings.embedding_batch_window_ms > 0:
+        return await _get_batcher().embed(text)
+    return (await _embed_texts([text]))[0]
+
+
+async def _embed_texts(texts: list[str]) -> list[list[float]]:
+    """One ``embeddings.create`` call for ``texts``; results are written to the cache."""
     client = _get_client()
     response = await client.embeddings.create(
         model=settings.embedding_model,
-        input=text,
+        input=texts,
         dimensions=settings.embedding_dimensions,
     )
-    embedding = response.data[0].embedding
-
-    await cache_set("emb", text, json.dumps(embedding), ttl=settings.embedding_cache_ttl)
-    return embedding
+    embeddings = [item.embedding for item in response.data]
+    await cache_mset_with_ttl(
+        "emb",
+        {_cache_key(t): encode_embedding(e, settings.embedding_cache_dtype) for t, e in zip(texts, embeddings)},
+        ttl=settings.embedding_cache_ttl,
+        binary=True,
+    )
+    return embeddings
 
 
 async def generate_embeddings_batch(texts: list[str]) -> list[list[float]]:
-    """Generate embeddings for a batch of texts. Uses cache where possible."""
+    """Generate embeddings for a batch of texts. Uses cache where possible.
+
+    Cache reads and writes are batched: one MGET up front and one pipelined
+    write at the end, regardless of batch size.
+    """
     results: list[list[float] | None] = [None] * len(texts)
     uncached_indices: list[int] = []
     uncached_texts: list[str] = []
 
-    for i, text in enumerate(texts):
-        cached = await cache_get("emb", text)
+    for i, (text, cached) in enumerate(zip(texts, await cache_mget("emb", [_cache_key(t) for t in texts], binary=True))):
         if cached is not None:
-            results[i] = json.loads(cached)
+            results[i] = decode_embedding(cached)
         else:
             uncached_indices.append(i)
             uncached_texts.append(text)
 
     if uncached_texts:
+        new_entries: dict[str, bytes] = {}
         client = _get_client()
         # OpenAI supports up to 2048 inputs per batch
         for batch_start in range(0, len(uncached_texts), 2048):
@@ -68,11 +118,18 @@ async def generate_embeddings_batch(texts: list[str]) -> list[list[float]]:
             for j, item in enumerate(response.data):
                 idx = batch_indices[j]
                 results[idx] = item.embedding
-                await cache_set("emb", texts[idx], json.dumps(item.embedding), ttl=settings.embedding_cache_ttl)
+                new_entries[_cache_key(texts[idx])] = encode_embedding(item.embedding, settings.embedding_cache_dtype)
+
+        await cache_mset_with_ttl("emb", new_entries, ttl=settings.embedding_cache_ttl, binary=True)
 
     return results  # type: ignore[return-value]
 
 
+def embedding_text_hash(text: str) -> str:
+    """Fingerprint of an embedding input; changes when the text, model or dimensions do."""
+    return hashlib.sha256(_cache_key(text).encode()).hexdigest()
+
+
 def build_email_text(subject: str, sender: str, body_preview: str) -> str:
     return f"{subject} | From: {sender} | {body_preview[:500]}"
 
@@ -82,7 +139,8 @@ def build_event_text(title: str, description: str | None, attendees: list[str] |
     if description:
         parts.append(description[:300])
     if attendees:
-        parts.append(f"Attendees: {', '.join(attendees)}")
+        # Lower-cased as stored in gcal_cache, so re-embedding from the row gives the same text as sync
+        parts.append(f"Attendees: {', '.join(a.lower() for a in attendees)}")
     return " | ".join(parts)
 
 
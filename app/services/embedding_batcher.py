@@ -0,0 +1,104 @@
+"""Micro-batching for single-text embedding requests.
+
+Requests that arrive within a short window are merged into one
+``embeddings.create`` call. Identical texts in the same window share one
+input slot and one result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch-size histogram buckets; larger batches land in "+Inf".
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embed_many: Callable[[list[str]], Awaitable[list[list[float]]]],
+        window: float,
+        max_batch_size: int,
+    ):
+        self.loop = asyncio.get_running_loop()
+        self._embed_many = embed_many
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._pending: dict[str, asyncio.Future] = {}
+        self._enqueued_at: list[float] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+        self._batches = 0
+        self._requests = 0  # callers whose batch has been dispatched
+        self._inputs = 0  # distinct texts sent to the API
+        self._size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self._delay_total = 0.0
+        self._delay_max = 0.0
+
+    async def embed(self, text: str) -> list[float]:
+        self._enqueued_at.append(time.monotonic())
+        future = self._pending.get(text)
+        if future is None:
+            future = self._pending[text] = self.loop.create_future()
+            if len(self._pending) >= self._max_batch_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = self.loop.call_later(self._window, self._dispatch)
+        # Shield so one cancelled caller does not cancel the result for the others.
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        enqueued_at, self._enqueued_at = self._enqueued_at, []
+        if not batch:
+            return
+
+        now = time.monotonic()
+        for ts in enqueued_at:
+            delay = now - ts
+            self._delay_total += delay
+            self._delay_max = max(self._delay_max, delay)
+        self._batches += 1
+        self._requests += len(enqueued_at)
+        self._inputs += len(batch)
+        self._size_counts[bisect.bisect_left(BATCH_SIZE_BUCKETS, len(batch))] += 1
+
+        task = self.loop.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[str, asyncio.Future]) -> None:
+        try:
+            vectors = await self._embed_many(list(batch))
+        except Exception as exc:
+            logger.warning("Embedding batch of %d failed: %s", len(batch), exc)
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for future, vector in zip(batch.values(), vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> dict:
+        labels = [str(b) for b in BATCH_SIZE_BUCKETS] + ["+Inf"]
+        return {
+            "batches": self._batches,
+            "requests": self._requests,
+            "inputs": self._inputs,
+            "deduplicated": self._requests - self._inputs,
+            "batch_size_histogram": dict(zip(labels, self._size_counts)),
+            "avg_batch_size": round(self._inputs / self._batches, 2) if self._batches else 0.0,
+            "avg_queue_delay_ms": round(1000 * self._delay_total / self._requests, 3) if self._requests else 0.0,
+            "max_queue_delay_ms": round(1000 * self._delay_max, 3),
+        }
@@ -3,13 +3,13 @@ from __future__ import annotations
 import logging
 from datetime import datetime, timezone
 
-import httpx
 from cryptography.fernet import Fernet
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.models.user import User
+from app.services.http_client import pooled_request
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -47,44 +47,44 @@ def get_auth_url(state: str | None = None) -> str:
 
 
 async def exchange_code(code: str) -> dict:
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            GOOGLE_TOKEN_URL,
-            data={
-                "code": code,
-                "client_id": settings.google_client_id,
-                "client_secret": settings.google_client_secret,
-                "redirect_uri": settings.google_redirect_uri,
-                "grant_type": "authorization_code",
-            },
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = await pooled_request(
+        "POST",
+        GOOGLE_TOKEN_URL,
+        data={
+            "code": code,
+            "client_id": settings.google_client_id,
+            "client_secret": settings.google_client_secret,
+            "redirect_uri": settings.google_redirect_uri,
+            "grant_type": "authorization_code",
+        },
+    )
+    resp.raise_for_status()
+    return resp.json()
 
 
 async def refresh_access_token(refresh_token: str) -> dict:
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            GOOGLE_TOKEN_URL,
-            data={
-                "client_id": settings.google_client_id,
-                "client_secret": settings.google_client_secret,
-                "refresh_token": refresh_token,
-                "grant_type": "refresh_token",
-            },
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = await pooled_request(
+        "POST",
+        GOOGLE_TOKEN_URL,
+        data={
+            "client_id": settings.google_client_id,
+            "client_secret": settings.google_client_secret,
+            "refresh_token": refresh_token,
+            "grant_type": "refresh_token",
+        },
+    )
+    resp.raise_for_status()
+    return resp.json()
 
 
 async def get_user_email(access_token: str) -> str:
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            GOOGLE_USERINFO_URL,
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        resp.raise_for_status()
-        return resp.json()["email"]
+    resp = await pooled_request(
+        "GET",
+        GOOGLE_USERINFO_URL,
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    resp.raise_for_status()
+    return resp.json()["email"]
 
 
 async def get_valid_token(user: User, db: AsyncSession) -> str:
@@ -0,0 +1,110 @@
+"""Process-wide pooled HTTP client shared by the Google API agents and OAuth calls."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import httpx
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_http2_enabled: bool = False
+_host_limits: dict[str, asyncio.Semaphore] = {}
+_stats: dict[str, int] = {"requests": 0, "connections_opened": 0, "http2_requests": 0}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def _trace(event_name: str, info: dict) -> None:
+    if event_name == "connection.connect_tcp.complete":
+        _stats["connections_opened"] += 1
+    elif event_name == "http2.send_request_headers.started":
+        _stats["http2_requests"] += 1
+
+
+async def _on_request(request: httpx.Request) -> None:
+    _stats["requests"] += 1
+    request.extensions["trace"] = _trace
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use.
+
+    Connections are bound to the event loop that opened them, so a new client is
+    built whenever the running loop changes (e.g. each Celery task run).
+    """
+    global _client, _client_loop, _http2_enabled
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        http2 = settings.google_api_http2 and _http2_available()
+        if settings.google_api_http2 and not http2:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        _client = httpx.AsyncClient(
+            http2=http2,
+            timeout=settings.google_api_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.google_api_max_connections,
+                max_keepalive_connections=settings.google_api_max_keepalive_connections,
+                keepalive_expiry=settings.google_api_keepalive_expiry,
+            ),
+            event_hooks={"request": [_on_request]},
+        )
+        _client_loop = loop
+        _http2_enabled = http2
+        _host_limits.clear()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _client_loop = None
+    _host_limits.clear()
+
+
+async def pooled_request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request through the shared pool, capping in-flight requests per host."""
+    client = await get_http_client()
+    host = httpx.URL(url).host
+    limit = _host_limits.get(host)
+    if limit is None:
+        limit = _host_limits[host] = asyncio.Semaphore(settings.google_api_max_connections_per_host)
+    async with limit:
+        return await client.request(method, url, **kwargs)
+
+
+def get_pool_stats() -> dict:
+    """Counters describing how often pooled connections are reused."""
+    requests = _stats["requests"]
+    opened = _stats["connections_opened"]
+    reused = max(requests - opened, 0)
+    return {
+        "requests": requests,
+        "connections_opened": opened,
+        "connections_reused": reused,
+        "reuse_ratio": round(reused / requests, 4) if requests else 0.0,
+        "http2_requests": _stats["http2_requests"],
+        "http2_enabled": _http2_enabled,
+        "max_connections": settings.google_api_max_connections,
+        "max_keepalive_connections": settings.google_api_max_keepalive_connections,
+        "max_connections_per_host": settings.google_api_max_connections_per_host,
+    }
+
+
+def reset_pool_stats() -> None:
+    for key in _stats:
+        _stats[key] = 0
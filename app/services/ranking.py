@@ -0,0 +1,54 @@
+"""Recency weighting for search results, per service.
+
+``score = similarity * decay(days)``, where ``days`` is the distance from now
+to the row's timestamp (past or future) and a missing timestamp counts as 0.
+The same function is rendered as SQL for pgvector searches and evaluated with
+NumPy for the in-process user index, so both rank identically.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# service -> timestamp column the decay is measured from
+DECAY_COLUMNS: dict[str, str] = {
+    "gmail": "received_at",
+    "gcal": "start_time",
+    "drive": "modified_at",
+}
+
+DECAY_FUNCTIONS = ("none", "log", "exp")
+
+
+def decay_kind(service: str) -> str:
+    kind = settings.temporal_decay.get(service, "none")
+    if kind not in DECAY_FUNCTIONS:
+        raise ValueError(f"Unsupported temporal_decay '{kind}' for {service}")
+    return kind
+
+
+def decay_sql(service: str) -> str | None:
+    """SQL factor for ``service``'s decay, or None when results are ranked by similarity alone."""
+    kind = decay_kind(service)
+    if kind == "none":
+        return None
+    column = DECAY_COLUMNS[service]
+    days = f"coalesce(abs(extract(epoch FROM (now() - {column})))::float8 / 86400, 0)"
+    if kind == "log":
+        return f"(1 / ln({days} + 2))"
+    return f"power(0.5, {days} / {float(settings.temporal_decay_half_life_days)})"
+
+
+def decay_weights(service: str, days: np.ndarray) -> np.ndarray | None:
+    """NumPy counterpart of ``decay_sql``; ``days`` is NaN where the timestamp is NULL."""
+    kind = decay_kind(service)
+    if kind == "none":
+        return None
+    days = np.nan_to_num(np.abs(days), nan=0.0)
+    if kind == "log":
+        return 1.0 / np.log(days + 2)
+    return np.power(0.5, days / settings.temporal_decay_half_life_days)
@@ -0,0 +1,99 @@
+"""Re-embed cached rows after an embedding model or dimension change.
+
+Rows are walked in primary-key order, one page at a time. The embedding text
+is rebuilt from the stored columns, and rows whose ``content_hash`` does not
+match the current model and dimensions are re-embedded in one batch per page.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Callable
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.cache import GCalCache, GDriveCache, GmailCache
+from app.services.embedding import (
+    build_email_text,
+    build_event_text,
+    build_file_text,
+    embedding_text_hash,
+    generate_embeddings_batch,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _event_text(row) -> str:
+    attendees = [a.get("email", "") for a in (row.attendees or {}).get("list", [])]
+    return build_event_text(row.title or "", row.description, attendees)
+
+
+# model -> (columns the text is built from, text builder)
+REEMBED_SOURCES: dict[type, tuple[tuple[str, ...], Callable]] = {
+    GmailCache: (
+        ("subject", "sender", "body_preview"),
+        lambda r: build_email_text(r.subject or "", r.sender or "", r.body_preview or ""),
+    ),
+    GCalCache: (("title", "description", "attendees"), _event_text),
+    GDriveCache: (
+        ("name", "mime_type", "content_preview"),
+        lambda r: build_file_text(r.name or "", r.mime_type, r.content_preview),
+    ),
+}
+
+
+async def reembed_table(
+    db: AsyncSession,
+    model: type,
+    *,
+    batch_size: int = 500,
+    missing_only: bool = False,
+) -> int:
+    """Re-embed stale rows of one cache table. Returns the number of rows updated.
+
+    With ``missing_only`` only rows without an embedding are considered, e.g.
+    after a dimension increase cleared them. Each page is committed, so an
+    interrupted run resumes where it stopped.
+    """
+    columns, build_text = REEMBED_SOURCES[model]
+    last_id = None
+    updated = 0
+    while True:
+        stmt = select(model.id, model.user_id, model.content_hash, *(getattr(model, c) for c in columns))
+        if missing_only:
+            stmt = stmt.where(model.embedding.is_(None))
+        if last_id is not None:
+            stmt = stmt.where(model.id > last_id)
+        rows = (await db.execute(stmt.order_by(model.id).limit(batch_size))).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        stale = []
+        for row in rows:
+            text_ = build_text(row)
+            digest = embedding_text_hash(text_)
+            if missing_only or row.content_hash != digest:
+                stale.append((row, text_, digest))
+        if stale:
+            embeddings = await generate_embeddings_batch([t for _, t, _ in stale])
+            await db.execute(
+                update(model),
+                [
+                    {"id": row.id, "user_id": row.user_id, "embedding": emb, "content_hash": digest}
+                    for (row, _, digest), emb in zip(stale, embeddings)
+                ],
+            )
+            await db.commit()
+            updated += len(stale)
+        logger.info("%s: re-embedded %d rows so far", model.__tablename__, updated)
+    return updated
+
+
+async def reembed_all(db: AsyncSession, *, batch_size: int = 500, missing_only: bool = False) -> dict[str, int]:
+    return {
+        model.__tablename__: await reembed_table(db, model, batch_size=batch_size, missing_only=missing_only)
+        for model in REEMBED_SOURCES
+    }
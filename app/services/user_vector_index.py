@@ -0,0 +1,281 @@
+"""In-process vector index for hot users.
+
+A user's cache rows for one service are held as a matrix of L2-normalised
+float32 embeddings, with the row metadata alongside. A search computes cosine
+similarity for every row with one matrix-vector product and applies the
+service's temporal decay as a vector multiply. Filters become
+boolean masks and the top ``limit`` rows come from ``argpartition``, so a warm
+user never round-trips to pgvector.
+
+Indexes load on a user's first search and live in an LRU that is capped by
+``user_vector_index_max_bytes``. Users with more than
+``user_vector_index_max_rows`` rows stay on pgvector. Syncs run in Celery
+workers, so invalidation goes through Redis: each completed sync writes a new
+version token for ``(user, service)``, and a search only uses a cached index
+whose token still matches.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.redis_client import cache_get, cache_set
+from app.cache.single_flight import single_flight
+from app.config import get_settings
+from app.services.ranking import DECAY_COLUMNS, decay_weights
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# service -> (table, selected columns, timestamp columns kept as epoch arrays)
+INDEX_SOURCES: dict[str, tuple[str, tuple[str, ...], tuple[str, ...]]] = {
+    "gmail": ("gmail_cache", ("id", "email_id", "subject", "sender", "recipients", "body_preview", "received_at"),
+              ("received_at",)),
+    "gcal": ("gcal_cache", ("id", "event_id", "title", "description", "start_time", "end_time", "attendees",
+                            "location"), ("start_time", "end_time")),
+    "drive": ("gdrive_cache", ("id", "file_id", "name", "mime_type", "content_preview", "modified_at"),
+              ("modified_at",)),
+}
+
+_ROW_OVERHEAD_BYTES = 200  # dict + per-value object overhead, roughly
+
+
+@dataclass
+class UserVectorIndex:
+    service: str
+    version: str | None
+    rows: list[dict]
+    matrix: np.ndarray  # (n, dim) float32, unit rows
+    times: dict[str, np.ndarray]  # column -> epoch seconds, NaN where NULL
+    senders: np.ndarray | None = None  # lower-cased, for the ILIKE filter
+    mime_types: np.ndarray | None = None
+    attendees: list[frozenset[str]] = field(default_factory=list)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def nbytes(self) -> int:
+        metadata = sum(len(str(v)) for row in self.rows for v in row.values())
+        return self.matrix.nbytes + metadata + _ROW_OVERHEAD_BYTES * len(self.rows)
+
+    def search(self, query_embedding: list[float], limit: int, mask: np.ndarray | None = None) -> list[dict]:
+        """Top ``limit`` rows by score, as ``hybrid_search_*`` row mappings.
+
+        Scores are cosine similarity times the service's temporal decay, taken
+        over every row rather than an over-fetched candidate set.
+        """
+        if not self.rows or limit <= 0:
+            return []
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        similarity = self.matrix @ q
+        days = (time.time() - self.times[DECAY_COLUMNS[self.service]]) / 86400
+        weights = decay_weights(self.service, days)
+        score = similarity * weights if weights is not None else similarity
+        if mask is not None:
+            score = np.where(mask, score, -np.inf)
+            limit = min(limit, int(mask.sum()))
+            if limit == 0:
+                return []
+        limit = min(limit, len(self.rows))
+        top = np.argpartition(-score, limit - 1)[:limit]
+        top = top[np.argsort(-score[top])]
+        return [
+            {**self.rows[i], "similarity": float(similarity[i]), "score": float(score[i])}
+            for i in top
+        ]
+
+    def _range(self, column: str, date_from: datetime | None, date_to: datetime | None, mask: np.ndarray):
+        # NaN (NULL) fails both comparisons, matching SQL
+        if date_from:
+            mask &= self.times[column] >= date_from.timestamp()
+        if date_to:
+            mask &= self.times[column] <= date_to.timestamp()
+        return mask
+
+    def email_mask(self, sender: str | None, date_from: datetime | None, date_to: datetime | None):
+        mask = np.ones(len(self.rows), dtype=bool)
+        if sender:
+            needle = sender.lower()
+            mask &= np.fromiter((needle in s for s in self.senders), dtype=bool, count=len(self.rows))
+        return self._range("received_at", date_from, date_to, mask)
+
+    def event_mask(self, date_from: datetime | None, date_to: datetime | None, attendees: list[str] | None):
+        mask = np.ones(len(self.rows), dtype=bool)
+        if attendees:
+            wanted = {a.lower() for a in attendees}
+            mask &= np.fromiter((bool(wanted & a) for a in self.attendees), dtype=bool, count=len(self.rows))
+        mask = self._range("start_time", date_from, None, mask)
+        return self._range("end_time", None, date_to, mask)
+
+    def file_mask(self, mime_type: str | None, date_from: datetime | None, date_to: datetime | None):
+        mask = np.ones(len(self.rows), dtype=bool)
+        if mime_type:
+            mask &= self.mime_types == mime_type
+        return self._range("modified_at", date_from, date_to, mask)
+
+
+class _IndexCache:
+    """LRU of loaded indexes keyed by ``(user_id, service)``, bounded by total bytes."""
+
+    def __init__(self):
+        self._entries: OrderedDict[tuple[str, str], UserVectorIndex] = OrderedDict()
+        self._sizes: dict[tuple[str, str], int] = {}
+        self.bytes = 0
+        self.hits = self.misses = self.loads = self.evictions = self.too_large = 0
+
+    def get(self, key: tuple[str, str], version: str | None) -> UserVectorIndex | None:
+        index = self._entries.get(key)
+        if index is None:
+            return None
+        if index.version != version or time.monotonic() - index.loaded_at > settings.user_vector_index_ttl:
+            self.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return index
+
+    def put(self, key: tuple[str, str], index: UserVectorIndex) -> None:
+        self.pop(key)
+        size = index.nbytes
+        if size > settings.user_vector_index_max_bytes:
+            return
+        self._entries[key] = index
+        self._sizes[key] = size
+        self.bytes += size
+        while self.bytes > settings.user_vector_index_max_bytes:
+            oldest = next(iter(self._entries))
+            self.pop(oldest)
+            self.evictions += 1
+
+    def pop(self, key: tuple[str, str]) -> None:
+        if self._entries.pop(key, None) is not None:
+            self.bytes -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._sizes.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "users": len({user for user, _ in self._entries}),
+            "indexes": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": settings.user_vector_index_max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "too_large": self.too_large,
+        }
+
+
+_cache = _IndexCache()
+# (user_id, service) -> index version that exceeded max_rows, so it is not reloaded every query
+_oversized: dict[tuple[str, str], str | None] = {}
+
+
+def get_user_index_stats() -> dict:
+    return _cache.stats() if settings.user_vector_index_enabled else {}
+
+
+def clear_user_indexes() -> None:
+    _cache.clear()
+    _oversized.clear()
+
+
+def _parse_vector(value) -> np.ndarray:
+    # Raw text queries return pgvector values in their text form, "[0.1,0.2,...]"
+    if isinstance(value, str):
+        return np.array(value[1:-1].split(","), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+def _epoch(values: list[datetime | None]) -> np.ndarray:
+    return np.array([v.timestamp() if v else np.nan for v in values], dtype=np.float64)
+
+
+async def _load(db: AsyncSession, user_id: UUID, service: str, version: str | None) -> UserVectorIndex | None:
+    table, columns, time_columns = INDEX_SOURCES[service]
+    result = await db.execute(text(
+        f"SELECT {', '.join(columns)}, embedding FROM {table} "
+        f"WHERE user_id = :user_id AND embedding IS NOT NULL LIMIT :max_rows"
+    ), {"user_id": str(user_id), "max_rows": settings.user_vector_index_max_rows + 1})
+    records = result.mappings().all()
+    if len(records) > settings.user_vector_index_max_rows:
+        return None
+
+    rows = [{c: r[c] for c in columns} for r in records]
+    if records:
+        matrix = np.vstack([_parse_vector(r["embedding"]) for r in records])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+    else:
+        matrix = np.empty((0, settings.embedding_dimensions), dtype=np.float32)
+    index = UserVectorIndex(
+        service=service,
+        version=version,
+        rows=rows,
+        matrix=matrix,
+        times={c: _epoch([r[c] for r in rows]) for c in time_columns},
+    )
+    if service == "gmail":
+        index.senders = np.array([(r["sender"] or "").lower() for r in rows], dtype=object)
+    elif service == "gcal":
+        index.attendees = [
+            frozenset(a.get("email", "").lower() for a in (r["attendees"] or {}).get("list", [])) for r in rows
+        ]
+    elif service == "drive":
+        index.mime_types = np.array([r["mime_type"] for r in rows], dtype=object)
+    return index
+
+
+async def get_user_index(db: AsyncSession, user_id: UUID, service: str) -> UserVectorIndex | None:
+    """The user's index for ``service``, loading it on first use. None when disabled or too large."""
+    if not settings.user_vector_index_enabled or service not in INDEX_SOURCES:
+        return None
+    key = (str(user_id), service)
+    try:
+        version = await cache_get("uvi", f"{key[0]}:{service}")
+    except Exception:
+        # Without the version token a cached index might be stale; use pgvector
+        logger.warning("Could not read user index version for %s/%s", user_id, service, exc_info=True)
+        return None
+    index = _cache.get(key, version)
+    if index is not None:
+        _cache.hits += 1
+        return index
+    _cache.misses += 1
+    if key in _oversized and _oversized[key] == version:
+        return None
+
+    index = await single_flight("uvi", f"{key[0]}:{service}:{version}", lambda: _load(db, user_id, service, version))
+    if index is None:
+        _cache.too_large += 1
+        _oversized[key] = version
+        return None
+    if _cache.get(key, version) is None:
+        _cache.loads += 1
+        _cache.put(key, index)
+    return index
+
+
+async def invalidate_user_index(user_id: UUID, service: str) -> None:
+    """Mark ``(user, service)`` stale in every process after a sync wrote new rows."""
+    key = (str(user_id), service)
+    _cache.pop(key)
+    _oversized.pop(key, None)
+    try:
+        await cache_set("uvi", f"{key[0]}:{service}", uuid.uuid4().hex, ttl=settings.user_vector_index_version_ttl)
+    except Exception:
+        # Readers still drop the index after user_vector_index_ttl
+        logger.warning("Could not publish user index invalidation for %s/%s", user_id, service, exc_info=True)
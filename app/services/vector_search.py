@@ -1,65 +1,183 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-import math
-from datetime import datetime, timezone
+from datetime import datetime
 from uuid import UUID
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
+from app.db.vector_index import (
+    apply_search_settings,
+    index_distance_operator,
+    index_expression,
+    is_two_stage,
+    set_exact_scan,
+    storage_type,
+)
 from app.services.embedding import generate_embedding
+from app.services.ranking import decay_sql
+from app.services.user_vector_index import UserVectorIndex, get_user_index
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
+# service -> (table, selected columns)
+SEARCH_SOURCES: dict[str, tuple[str, tuple[str, ...]]] = {
+    "gmail": ("gmail_cache", ("id", "email_id", "subject", "sender", "recipients", "body_preview", "received_at")),
+    "gcal": ("gcal_cache", ("id", "event_id", "title", "description", "start_time", "end_time", "attendees", "location")),
+    "drive": ("gdrive_cache", ("id", "file_id", "name", "mime_type", "content_preview", "modified_at")),
+}
 
-def _temporal_decay(days_ago: float) -> float:
-    """Weight recent items higher: score * 1/log(days_ago + 2)."""
-    return 1.0 / math.log(days_ago + 2)
+# Column types for the UNION ALL in hybrid_search_all; sources fill columns they lack with NULL.
+_UNION_COLUMNS: dict[str, str] = {
+    "id": "uuid",
+    "email_id": "text", "subject": "text", "sender": "text", "recipients": "text",
+    "body_preview": "text", "received_at": "timestamptz",
+    "event_id": "text", "title": "text", "description": "text", "start_time": "timestamptz",
+    "end_time": "timestamptz", "attendees": "jsonb", "location": "text",
+    "file_id": "text", "name": "text", "mime_type": "text", "content_preview": "text",
+    "modified_at": "timestamptz",
+}
 
 
-async def hybrid_search_emails(
-    db: AsyncSession,
+def _email_filters(sender: str | None, date_from: datetime | None, date_to: datetime | None, p: str):
+    where, params = [], {}
+    if sender:
+        where.append(f"sender ILIKE :{p}sender")
+        params[f"{p}sender"] = f"%{sender}%"
+    if date_from:
+        where.append(f"received_at >= :{p}date_from")
+        params[f"{p}date_from"] = date_from
+    if date_to:
+        where.append(f"received_at <= :{p}date_to")
+        params[f"{p}date_to"] = date_to
+    return where, params
+
+
+def _event_filters(
+    date_from: datetime | None,
+    date_to: datetime | None,
+    attendees: list[str] | None,
+    p: str,
+):
+    where, params = [], {}
+    if attendees:
+        # JSONB containment, served by the GIN index on attendees
+        clauses = []
+        for i, email in enumerate(attendees):
+            clauses.append(f"attendees @> CAST(:{p}attendee_{i} AS jsonb)")
+            params[f"{p}attendee_{i}"] = json.dumps({"list": [{"email": email.lower()}]})
+        where.append(f"({' OR '.join(clauses)})")
+    if date_from:
+        where.append(f"start_time >= :{p}date_from")
+        params[f"{p}date_from"] = date_from
+    if date_to:
+        where.append(f"end_time <= :{p}date_to")
+        params[f"{p}date_to"] = date_to
+    return where, params
+
+
+def _file_filters(mime_type: str | None, date_from: datetime | None, date_to: datetime | None, p: str):
+    where, params = [], {}
+    if mime_type:
+        where.append(f"mime_type = :{p}mime_type")
+        params[f"{p}mime_type"] = mime_type
+    if date_from:
+        where.append(f"modified_at >= :{p}date_from")
+        params[f"{p}date_from"] = date_from
+    if date_to:
+        where.append(f"modified_at <= :{p}date_to")
+        params[f"{p}date_to"] = date_to
+    return where, params
+
+
+def _search_sql(
+    source: str,
     user_id: UUID,
-    query: str,
+    query_embedding: list[float],
+    where: list[str],
+    params: dict,
+    limit: int,
     *,
-    sender: str | None = None,
-    date_from: datetime | None = None,
-    date_to: datetime | None = None,
-    limit: int = 5,
-) -> list[dict]:
-    query_embedding = await generate_embedding(query)
+    p: str = "",
+    union: bool = False,
+) -> tuple[str, dict]:
+    """Nearest-neighbour SELECT for one source.
 
-    sql = """
-        SELECT id, email_id, subject, sender, recipients, body_preview, received_at,
-               1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
-        FROM gmail_cache
-        WHERE user_id = :user_id AND embedding IS NOT NULL
+    ``p`` prefixes bind parameter names so several sources can share one
+    statement; ``union`` selects the full ``_UNION_COLUMNS`` set. When the
+    index holds a reduced form of the vector (truncated and/or binary-quantized),
+    the inner query takes candidates from it and the outer query re-ranks them
+    by exact cosine distance. With temporal decay configured for ``source``, the
+    nearest ``limit * temporal_decay_overfetch`` rows are scored in SQL and the
+    best ``limit`` by score are returned.
     """
-    params: dict = {"user_id": str(user_id), "embedding": str(query_embedding)}
+    table, columns = SEARCH_SOURCES[source]
+    if union:
+        select = [f"'{source}' AS source"] + [
+            c if c in columns else f"NULL::{t} AS {c}" for c, t in _UNION_COLUMNS.items()
+        ]
+    else:
+        select = list(columns)
+    query_vector = f"CAST(:{p}embedding AS {storage_type()})"
+    distance = f"embedding <=> {query_vector}"
+    conditions = " AND ".join([f"user_id = :{p}user_id", "embedding IS NOT NULL", *where])
+    decay = decay_sql(source)
+    fetch = limit * max(1, settings.temporal_decay_overfetch) if decay else limit
+    params = {
+        f"{p}user_id": str(user_id),
+        f"{p}embedding": str(query_embedding),
+        f"{p}limit": limit,
+        **params,
+    }
+    if decay:
+        params[f"{p}fetch"] = fetch
+    nearest_limit = f"{p}fetch" if decay else f"{p}limit"
+    scores = f"1 - ({distance}) AS similarity"
+    if not decay:
+        scores += f", 1 - ({distance}) AS score"
 
-    if sender:
-        sql += " AND sender ILIKE :sender"
-        params["sender"] = f"%{sender}%"
-    if date_from:
-        sql += " AND received_at >= :date_from"
-        params["date_from"] = date_from
-    if date_to:
-        sql += " AND received_at <= :date_to"
-        params["date_to"] = date_to
+    if is_two_stage():
+        inner = ", ".join(columns if union else select)
+        outer = ", ".join(select)
+        sql = f"""
+            SELECT {outer},
+                   {scores}
+            FROM (
+                SELECT {inner}, embedding
+                FROM {table}
+                WHERE {conditions}
+                ORDER BY {index_expression()} {index_distance_operator()} {index_expression(query_vector)}
+                LIMIT :{p}candidates
+            ) candidates
+            ORDER BY {distance} LIMIT :{nearest_limit}
+        """
+        params[f"{p}candidates"] = fetch * max(1, settings.vector_rerank_factor)
+    else:
+        sql = f"""
+            SELECT {', '.join(select)},
+                   {scores}
+            FROM {table}
+            WHERE {conditions}
+            ORDER BY {distance} LIMIT :{nearest_limit}
+        """
 
-    sql += " ORDER BY embedding <=> CAST(:embedding AS vector) LIMIT :limit"
-    params["limit"] = limit
+    if decay:
+        sql = f"""
+            SELECT *, similarity * {decay} AS score
+            FROM ({sql}) nearest
+            ORDER BY score DESC LIMIT :{p}limit
+        """
+    return sql, params
 
-    result = await db.execute(text(sql), params)
-    rows = result.mappings().all()
 
-    now = datetime.now(timezone.utc)
-    results = []
-    for row in rows:
-        days_ago = (now - row["received_at"]).total_seconds() / 86400 if row["received_at"] else 0
-        score = float(row["similarity"]) * _temporal_decay(days_ago)
-        results.append({
+def _email_results(rows) -> list[dict]:
+    return [
+        {
             "id": str(row["id"]),
             "email_id": row["email_id"],
             "subject": row["subject"],
@@ -67,66 +185,122 @@ async def hybrid_search_emails(
             "body_preview": row["body_preview"],
             "received_at": row["received_at"].isoformat() if row["received_at"] else None,
             "similarity": float(row["similarity"]),
-            "score": score,
-        })
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results
+            "score": float(row["score"]),
+        }
+        for row in rows
+    ]
+
+
+def _event_results(rows) -> list[dict]:
+    return [
+        {
+            "id": str(row["id"]),
+            "event_id": row["event_id"],
+            "title": row["title"],
+            "description": row["description"],
+            "start_time": row["start_time"].isoformat() if row["start_time"] else None,
+            "end_time": row["end_time"].isoformat() if row["end_time"] else None,
+            "attendees": row["attendees"],
+            "location": row["location"],
+            "similarity": float(row["similarity"]),
+            "score": float(row["score"]),
+        }
+        for row in rows
+    ]
 
 
-async def hybrid_search_events(
+async def _fetch(db: AsyncSession, sql: str, params: dict, limit: int) -> list:
+    """Run a nearest-neighbour query, refilling when filters leave it short.
+
+    An approximate index only visits part of the table, so the ``user_id`` and
+    metadata filters can leave fewer than ``limit`` rows even though more
+    matches exist. A short result is retried with a wider search
+    (``vector_search_refill_factor``), then as an exact scan. This guarantees
+    ``limit`` rows whenever that many rows match.
+    """
+    await apply_search_settings(db)
+    rows = (await db.execute(text(sql), params)).mappings().all()
+    if len(rows) >= limit:
+        return rows
+    return await _refill(db, sql, params, limit, rows)
+
+
+async def _refill(db: AsyncSession, sql: str, params: dict, limit: int, rows: list) -> list:
+    if settings.vector_search_refill_factor > 1:
+        await apply_search_settings(db, scale=settings.vector_search_refill_factor)
+        rows = (await db.execute(text(sql), params)).mappings().all()
+        if len(rows) >= limit:
+            return rows
+
+    if settings.vector_search_exact_fallback:
+        await set_exact_scan(db, True)
+        try:
+            rows = (await db.execute(text(sql), params)).mappings().all()
+        finally:
+            await set_exact_scan(db, False)
+    return rows
+
+
+def _file_results(rows) -> list[dict]:
+    return [
+        {
+            "id": str(row["id"]),
+            "file_id": row["file_id"],
+            "name": row["name"],
+            "mime_type": row["mime_type"],
+            "content_preview": row["content_preview"],
+            "modified_at": row["modified_at"].isoformat() if row["modified_at"] else None,
+            "similarity": float(row["similarity"]),
+            "score": float(row["score"]),
+        }
+        for row in rows
+    ]
+
+
+async def hybrid_search_emails(
     db: AsyncSession,
     user_id: UUID,
     query: str,
     *,
+    sender: str | None = None,
     date_from: datetime | None = None,
     date_to: datetime | None = None,
-    attendees: list[str] | None = None,
     limit: int = 5,
+    query_embedding: list[float] | None = None,
 ) -> list[dict]:
-    query_embedding = await generate_embedding(query)
+    if query_embedding is None:
+        query_embedding = await generate_embedding(query)
 
-    sql = """
-        SELECT id, event_id, title, description, start_time, end_time, attendees, location,
-               1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
-        FROM gcal_cache
-        WHERE user_id = :user_id AND embedding IS NOT NULL
-    """
-    params: dict = {"user_id": str(user_id), "embedding": str(query_embedding)}
+    index = await get_user_index(db, user_id, "gmail")
+    if index is not None:
+        return _email_results(index.search(query_embedding, limit, index.email_mask(sender, date_from, date_to)))
 
-    if date_from:
-        sql += " AND start_time >= :date_from"
-        params["date_from"] = date_from
-    if date_to:
-        sql += " AND end_time <= :date_to"
-        params["date_to"] = date_to
+    where, params = _email_filters(sender, date_from, date_to, "")
+    sql, params = _search_sql("gmail", user_id, query_embedding, where, params, limit)
+    return _email_results(await _fetch(db, sql, params, limit))
 
-    sql += " ORDER BY embedding <=> CAST(:embedding AS vector) LIMIT :limit"
-    params["limit"] = limit
 
-    result = await db.execute(text(sql), params)
-    rows = result.mappings().all()
+async def hybrid_search_events(
+    db: AsyncSession,
+    user_id: UUID,
+    query: str,
+    *,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    attendees: list[str] | None = None,
+    limit: int = 5,
+    query_embedding: list[float] | None = None,
+) -> list[dict]:
+    if query_embedding is None:
+        query_embedding = await generate_embedding(query)
 
-    results = []
-    for row in rows:
-        event = {
-            "id": str(row["id"]),
-            "event_id": row["event_id"],
-            "title": row["title"],
-            "description": row["description"],
-            "start_time": row["start_time"].isoformat() if row["start_time"] else None,
-            "end_time": row["end_time"].isoformat() if row["end_time"] else None,
-            "attendees": row["attendees"],
-            "location": row["location"],
-            "similarity": float(row["similarity"]),
-        }
-        if attendees:
-            event_attendees = row["attendees"] or []
-            if isinstance(event_attendees, dict):
-                event_attendees = [a.get("email", "") for a in event_attendees.get("list", [])]
-            if not any(att in str(event_attendees) for att in attendees):
-                continue
-        results.append(event)
-    return results
+    index = await get_user_index(db, user_id, "gcal")
+    if index is not None:
+        return _event_results(index.search(query_embedding, limit, index.event_mask(date_from, date_to, attendees)))
+
+    where, params = _event_filters(date_from, date_to, attendees, "")
+    sql, params = _search_sql("gcal", user_id, query_embedding, where, params, limit)
+    return _event_results(await _fetch(db, sql, params, limit))
 
 
 async def hybrid_search_files(
@@ -138,42 +312,103 @@ async def hybrid_search_files(
     date_from: datetime | None = None,
     date_to: datetime | None = None,
     limit: int = 5,
+    query_embedding: list[float] | None = None,
 ) -> list[dict]:
-    query_embedding = await generate_embedding(query)
+    if query_embedding is None:
+        query_embedding = await generate_embedding(query)
+
+    index = await get_user_index(db, user_id, "drive")
+    if index is not None:
+        return _file_results(index.search(query_embedding, limit, index.file_mask(mime_type, date_from, date_to)))
+
+    where, params = _file_filters(mime_type, date_from, date_to, "")
+    sql, params = _search_sql("drive", user_id, query_embedding, where, params, limit)
+    return _file_results(await _fetch(db, sql, params, limit))
+
 
-    sql = """
-        SELECT id, file_id, name, mime_type, content_preview, modified_at,
-               1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
-        FROM gdrive_cache
-        WHERE user_id = :user_id AND embedding IS NOT NULL
+async def hybrid_search_all(
+    db: AsyncSession,
+    user_id: UUID,
+    searches: dict[str, dict],
+    *,
+    query_embeddings: dict[str, list[float]] | None = None,
+) -> dict[str, list[dict]]:
+    """Search several services in one ``UNION ALL`` round trip.
+
+    ``searches`` maps a service ("gmail", "gcal", "drive") to the keyword
+    arguments of its ``hybrid_search_*`` function, including ``query``.
+    ``query_embeddings`` maps query strings to precomputed vectors. Each branch
+    keeps its own filters, ORDER BY and LIMIT, so per-table ANN indexes are
+    still used. Returns results per service, shaped as the single-service
+    functions return them.
     """
-    params: dict = {"user_id": str(user_id), "embedding": str(query_embedding)}
+    if not searches:
+        return {}
+    embeddings = dict(query_embeddings or {})
+    missing = list(dict.fromkeys(s["query"] for s in searches.values() if s["query"] not in embeddings))
+    for query, vector in zip(missing, await asyncio.gather(*(generate_embedding(q) for q in missing))):
+        embeddings[query] = vector
 
-    if mime_type:
-        sql += " AND mime_type = :mime_type"
-        params["mime_type"] = mime_type
-    if date_from:
-        sql += " AND modified_at >= :date_from"
-        params["date_from"] = date_from
-    if date_to:
-        sql += " AND modified_at <= :date_to"
-        params["date_to"] = date_to
+    rows_by_source: dict[str, list] = {}
+    for service, search in searches.items():
+        index = await get_user_index(db, user_id, service)
+        if index is not None:
+            rows_by_source[service] = _indexed_rows(index, embeddings[search["query"]], search)
 
-    sql += " ORDER BY embedding <=> CAST(:embedding AS vector) LIMIT :limit"
-    params["limit"] = limit
+    branches, params = [], {}
+    statements: dict[str, tuple[str, dict, int]] = {}
+    for service, search in searches.items():
+        if service in rows_by_source:
+            continue
+        p = f"{service}_"
+        if service == "gmail":
+            where, filter_params = _email_filters(search.get("sender"), search.get("date_from"), search.get("date_to"), p)
+        elif service == "gcal":
+            where, filter_params = _event_filters(
+                search.get("date_from"), search.get("date_to"), search.get("attendees"), p
+            )
+        elif service == "drive":
+            where, filter_params = _file_filters(search.get("mime_type"), search.get("date_from"), search.get("date_to"), p)
+        else:
+            raise ValueError(f"Unknown search source '{service}'")
+        limit = search.get("limit", 5)
+        sql, branch_params = _search_sql(
+            service, user_id, embeddings[search["query"]], where, filter_params, limit, p=p, union=True,
+        )
+        statements[service] = (sql, branch_params, limit)
+        branches.append(f"({sql})")
+        params.update(branch_params)
 
-    result = await db.execute(text(sql), params)
-    rows = result.mappings().all()
+    if branches:
+        await apply_search_settings(db)
+        result = await db.execute(text(" UNION ALL ".join(branches)), params)
+        for service in statements:
+            rows_by_source[service] = []
+        for row in result.mappings().all():
+            rows_by_source[row["source"]].append(row)
 
-    return [
-        {
-            "id": str(row["id"]),
-            "file_id": row["file_id"],
-            "name": row["name"],
-            "mime_type": row["mime_type"],
-            "content_preview": row["content_preview"],
-            "modified_at": row["modified_at"].isoformat() if row["modified_at"] else None,
-            "similarity": float(row["similarity"]),
-        }
-        for row in rows
-    ]
+    for service, (sql, branch_params, limit) in statements.items():
+        if len(rows_by_source[service]) < limit:
+            rows_by_source[service] = await _refill(db, sql, branch_params, limit, rows_by_source[service])
+
+    grouped: dict[str, list[dict]] = {}
+    for service in searches:
+        rows = rows_by_source[service]
+        if service == "gmail":
+            grouped[service] = _email_results(rows)
+        elif service == "gcal":
+            grouped[service] = _event_results(rows)
+        else:
+            grouped[service] = _file_results(rows)
+    return grouped
+
+
+def _indexed_rows(index: UserVectorIndex, query_embedding: list[float], search: dict) -> list[dict]:
+    """Serve one ``hybrid_search_all`` branch from a warm in-process index."""
+    if index.service == "gmail":
+        mask = index.email_mask(search.get("sender"), search.get("date_from"), search.get("date_to"))
+    elif index.service == "gcal":
+        mask = index.event_mask(search.get("date_from"), search.get("date_to"), search.get("attendees"))
+    else:
+        mask = index.file_mask(search.get("mime_type"), search.get("date_from"), search.get("date_to"))
+    return index.search(query_embedding, search.get("limit", 5), mask)
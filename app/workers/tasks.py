@@ -5,19 +5,24 @@ import logging
 from datetime import datetime, timezone
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import delete, select
 
+from app.config import get_settings
 from app.workers.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 def _run_async(coro):
     """Run an async function from a sync Celery task."""
+    from app.services.http_client import close_http_client
+
     loop = asyncio.new_event_loop()
     try:
         return loop.run_until_complete(coro)
     finally:
+        loop.run_until_complete(close_http_client())
         loop.close()
 
 
@@ -75,194 +80,192 @@ async def _sync_user(user_id: UUID):
 
 async def _sync_gmail(db, user_id: UUID, access_token: str):
     import httpx
-    from app.models.cache import GmailCache, SyncStatus
-    from app.services.embedding import generate_embedding, build_email_text
-
-    headers = {"Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.get(
-            "https://www.googleapis.com/gmail/v1/users/me/messages",
-            headers=headers,
-            params={"maxResults": 50},
-        )
-        if resp.status_code != 200:
-            logger.error("Gmail sync failed: %s", resp.text)
-            return
-
-        messages = resp.json().get("messages", [])
-        for msg in messages:
-            msg_resp = await client.get(
-                f"https://www.googleapis.com/gmail/v1/users/me/messages/{msg['id']}",
-                headers=headers,
-                params={"format": "metadata"},
-            )
-            if msg_resp.status_code != 200:
-                continue
-
-            data = msg_resp.json()
-            hdrs = {h["name"]: h["value"] for h in data.get("payload", {}).get("headers", [])}
-
-            text = build_email_text(
-                hdrs.get("Subject", ""),
-                hdrs.get("From", ""),
-                data.get("snippet", ""),
+    from app.agents.gmail_agent import GmailAgent
+    from app.models.cache import GmailCache
+    from app.services.cache_writer import attach_embeddings, upsert_cache_rows
+    from app.services.embedding import build_email_text
+    from app.services.user_vector_index import invalidate_user_index
+
+    agent = GmailAgent(access_token=access_token, user_id=user_id, db=db)
+    status = await _get_sync_status(db, user_id, "gmail")
+    changed_ids: list[str] | None = None
+    deleted_ids: list[str] = []
+    try:
+        if status and status.sync_token:
+            try:
+                changed_ids, deleted_ids, history_id = await agent.list_history(status.sync_token)
+            except httpx.HTTPStatusError as e:
+                if not _cursor_expired(e):
+                    raise
+                logger.info("Gmail history ID expired for user %s, running full resync", user_id)
+
+        if changed_ids is None:
+            # Read the cursor before listing so changes made mid-sync are picked up next run
+            history_id = await agent.get_history_id()
+            changed_ids = await agent.list_message_ids(settings.max_emails_per_sync)
+
+        messages = await agent.get_emails(changed_ids)
+    except httpx.HTTPError as e:
+        logger.error("Gmail sync failed: %s", e)
+        return
+
+    if deleted_ids:
+        await db.execute(
+            delete(GmailCache).where(
+                GmailCache.user_id == user_id,
+                GmailCache.email_id.in_(deleted_ids),
             )
-            embedding = await generate_embedding(text)
+        )
 
-            existing = await db.execute(
-                select(GmailCache).where(
-                    GmailCache.user_id == user_id,
-                    GmailCache.email_id == msg["id"],
-                )
-            )
-            cache_entry = existing.scalar_one_or_none()
-
-            if cache_entry:
-                cache_entry.subject = hdrs.get("Subject", "")
-                cache_entry.sender = hdrs.get("From", "")
-                cache_entry.body_preview = data.get("snippet", "")
-                cache_entry.embedding = embedding
-                cache_entry.synced_at = datetime.now(timezone.utc)
-            else:
-                cache_entry = GmailCache(
-                    user_id=user_id,
-                    email_id=msg["id"],
-                    subject=hdrs.get("Subject", ""),
-                    sender=hdrs.get("From", ""),
-                    body_preview=data.get("snippet", ""),
-                    embedding=embedding,
-                    received_at=datetime.now(timezone.utc),
-                    synced_at=datetime.now(timezone.utc),
-                )
-                db.add(cache_entry)
-
-        await _update_sync_status(db, user_id, "gmail")
-        await db.commit()
+    rows, texts = [], []
+    for msg in messages:
+        texts.append(build_email_text(msg["subject"], msg["sender"], msg["snippet"]))
+        rows.append({
+            "user_id": user_id,
+            "email_id": msg["email_id"],
+            "subject": msg["subject"],
+            "sender": msg["sender"],
+            "body_preview": msg["snippet"],
+            "received_at": datetime.now(timezone.utc),
+        })
+    await attach_embeddings(db, GmailCache, rows, texts)
+    await upsert_cache_rows(db, GmailCache, rows)
+
+    await _update_sync_status(db, user_id, "gmail", sync_token=history_id)
+    await db.commit()
+    await invalidate_user_index(user_id, "gmail")
 
 
 async def _sync_gcal(db, user_id: UUID, access_token: str):
     import httpx
+    from app.agents.gcal_agent import GCalAgent
     from app.models.cache import GCalCache
-    from app.services.embedding import generate_embedding, build_event_text
-
-    headers = {"Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.get(
-            "https://www.googleapis.com/calendar/v3/calendars/primary/events",
-            headers=headers,
-            params={"maxResults": 100, "singleEvents": "true", "orderBy": "startTime",
-                     "timeMin": datetime.now(timezone.utc).isoformat()},
-        )
-        if resp.status_code != 200:
-            logger.error("GCal sync failed: %s", resp.text)
-            return
+    from app.services.cache_writer import attach_embeddings, upsert_cache_rows
+    from app.services.embedding import build_event_text
+    from app.services.user_vector_index import invalidate_user_index
 
-        events = resp.json().get("items", [])
-        for ev in events:
-            attendees = [a.get("email", "") for a in ev.get("attendees", [])]
-            text = build_event_text(ev.get("summary", ""), ev.get("description"), attendees)
-            embedding = await generate_embedding(text)
-
-            start = ev.get("start", {}).get("dateTime", ev.get("start", {}).get("date"))
-            end = ev.get("end", {}).get("dateTime", ev.get("end", {}).get("date"))
-
-            existing = await db.execute(
-                select(GCalCache).where(
-                    GCalCache.user_id == user_id,
-                    GCalCache.event_id == ev["id"],
-                )
+    agent = GCalAgent(access_token=access_token, user_id=user_id, db=db)
+    status = await _get_sync_status(db, user_id, "gcal")
+    events: list[dict] | None = None
+    try:
+        if status and status.sync_token:
+            try:
+                events, next_token = await agent.list_event_changes(sync_token=status.sync_token)
+            except httpx.HTTPStatusError as e:
+                if not _cursor_expired(e):
+                    raise
+                logger.info("Calendar sync token expired for user %s, running full resync", user_id)
+
+        if events is None:
+            events, next_token = await agent.list_event_changes(max_results=settings.max_events_per_sync)
+            if next_token is None:
+                logger.info("Calendar full sync for user %s hit max_events_per_sync, no sync token stored", user_id)
+    except httpx.HTTPError as e:
+        logger.error("GCal sync failed: %s", e)
+        return
+
+    cancelled_ids = [ev["id"] for ev in events if ev.get("status") == "cancelled"]
+    if cancelled_ids:
+        await db.execute(
+            delete(GCalCache).where(
+                GCalCache.user_id == user_id,
+                GCalCache.event_id.in_(cancelled_ids),
             )
-            cache_entry = existing.scalar_one_or_none()
-
-            if cache_entry:
-                cache_entry.title = ev.get("summary", "")
-                cache_entry.description = ev.get("description", "")
-                cache_entry.start_time = datetime.fromisoformat(start) if start else None
-                cache_entry.end_time = datetime.fromisoformat(end) if end else None
-                cache_entry.attendees = {"list": ev.get("attendees", [])}
-                cache_entry.embedding = embedding
-                cache_entry.synced_at = datetime.now(timezone.utc)
-            else:
-                cache_entry = GCalCache(
-                    user_id=user_id,
-                    event_id=ev["id"],
-                    title=ev.get("summary", ""),
-                    description=ev.get("description", ""),
-                    start_time=datetime.fromisoformat(start) if start else None,
-                    end_time=datetime.fromisoformat(end) if end else None,
-                    attendees={"list": ev.get("attendees", [])},
-                    location=ev.get("location", ""),
-                    embedding=embedding,
-                    synced_at=datetime.now(timezone.utc),
-                )
-                db.add(cache_entry)
-
-        await _update_sync_status(db, user_id, "gcal")
-        await db.commit()
+        )
+
+    rows, texts = [], []
+    for ev in events:
+        if ev.get("status") == "cancelled":
+            continue
+        attendees = [a.get("email", "") for a in ev.get("attendees", [])]
+        texts.append(build_event_text(ev.get("summary", ""), ev.get("description"), attendees))
+
+        start = ev.get("start", {}).get("dateTime", ev.get("start", {}).get("date"))
+        end = ev.get("end", {}).get("dateTime", ev.get("end", {}).get("date"))
+
+        rows.append({
+            "user_id": user_id,
+            "event_id": ev["id"],
+            "title": ev.get("summary", ""),
+            "description": ev.get("description", ""),
+            "start_time": datetime.fromisoformat(start) if start else None,
+            "end_time": datetime.fromisoformat(end) if end else None,
+            # Lower-cased so attendee filters can use exact JSONB containment
+            "attendees": {"list": [{**a, "email": a.get("email", "").lower()} for a in ev.get("attendees", [])]},
+            "location": ev.get("location", ""),
+        })
+    await attach_embeddings(db, GCalCache, rows, texts)
+    await upsert_cache_rows(db, GCalCache, rows)
+
+    # An empty token forces the next run back to a full sync
+    await _update_sync_status(db, user_id, "gcal", sync_token=next_token or "")
+    await db.commit()
+    await invalidate_user_index(user_id, "gcal")
 
 
 async def _sync_drive(db, user_id: UUID, access_token: str):
     import httpx
+    from app.agents.drive_agent import DriveAgent
     from app.models.cache import GDriveCache
-    from app.services.embedding import generate_embedding, build_file_text
-
-    headers = {"Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.get(
-            "https://www.googleapis.com/drive/v3/files",
-            headers=headers,
-            params={
-                "pageSize": 100,
-                "fields": "files(id,name,mimeType,modifiedTime,description)",
-                "q": "trashed = false",
-                "orderBy": "modifiedTime desc",
-            },
+    from app.services.cache_writer import attach_embeddings, upsert_cache_rows
+    from app.services.embedding import build_file_text
+    from app.services.user_vector_index import invalidate_user_index
+
+    agent = DriveAgent(access_token=access_token, user_id=user_id, db=db)
+    status = await _get_sync_status(db, user_id, "drive")
+    files: list[dict] | None = None
+    removed_ids: list[str] = []
+    try:
+        if status and status.sync_token:
+            try:
+                files, removed_ids, next_token = await agent.list_changes(status.sync_token)
+            except httpx.HTTPStatusError as e:
+                if not _cursor_expired(e):
+                    raise
+                logger.info("Drive page token expired for user %s, running full resync", user_id)
+
+        if files is None:
+            # Read the cursor before listing so changes made mid-sync are picked up next run
+            next_token = await agent.get_start_page_token()
+            files = await agent.list_all_files(settings.max_files_per_sync)
+    except httpx.HTTPError as e:
+        logger.error("Drive sync failed: %s", e)
+        return
+
+    if removed_ids:
+        await db.execute(
+            delete(GDriveCache).where(
+                GDriveCache.user_id == user_id,
+                GDriveCache.file_id.in_(removed_ids),
+            )
         )
-        if resp.status_code != 200:
-            logger.error("Drive sync failed: %s", resp.text)
-            return
 
-        files = resp.json().get("files", [])
-        for f in files:
-            text = build_file_text(f.get("name", ""), f.get("mimeType"), f.get("description"))
-            embedding = await generate_embedding(text)
+    rows, texts = [], []
+    for f in files:
+        texts.append(build_file_text(f.get("name", ""), f.get("mimeType"), f.get("description")))
+        mod_time = f.get("modifiedTime")
+        rows.append({
+            "user_id": user_id,
+            "file_id": f["id"],
+            "name": f.get("name", ""),
+            "mime_type": f.get("mimeType", ""),
+            "content_preview": f.get("description", ""),
+            "modified_at": datetime.fromisoformat(mod_time) if mod_time else None,
+        })
+    await attach_embeddings(db, GDriveCache, rows, texts)
+    await upsert_cache_rows(db, GDriveCache, rows)
 
-            existing = await db.execute(
-                select(GDriveCache).where(
-                    GDriveCache.user_id == user_id,
-                    GDriveCache.file_id == f["id"],
-                )
-            )
-            cache_entry = existing.scalar_one_or_none()
-
-            mod_time = f.get("modifiedTime")
-            modified_at = datetime.fromisoformat(mod_time) if mod_time else None
-
-            if cache_entry:
-                cache_entry.name = f.get("name", "")
-                cache_entry.mime_type = f.get("mimeType", "")
-                cache_entry.content_preview = f.get("description", "")
-                cache_entry.modified_at = modified_at
-                cache_entry.embedding = embedding
-                cache_entry.synced_at = datetime.now(timezone.utc)
-            else:
-                cache_entry = GDriveCache(
-                    user_id=user_id,
-                    file_id=f["id"],
-                    name=f.get("name", ""),
-                    mime_type=f.get("mimeType", ""),
-                    content_preview=f.get("description", ""),
-                    modified_at=modified_at,
-                    embedding=embedding,
-                    synced_at=datetime.now(timezone.utc),
-                )
-                db.add(cache_entry)
-
-        await _update_sync_status(db, user_id, "drive")
-        await db.commit()
-
-
-async def _update_sync_status(db, user_id: UUID, service: str):
+    await _update_sync_status(db, user_id, "drive", sync_token=next_token)
+    await db.commit()
+    await invalidate_user_index(user_id, "drive")
+
+
+def _cursor_expired(exc) -> bool:
+    """Google answers 404 (Gmail, Drive) or 410 Gone (Calendar) for stale sync cursors."""
+    return exc.response.status_code in (404, 410)
+
+
+async def _get_sync_status(db, user_id: UUID, service: str):
     from app.models.cache import SyncStatus
 
     existing = await db.execute(
@@ -271,14 +274,23 @@ async def _update_sync_status(db, user_id: UUID, service: str):
             SyncStatus.service == service,
         )
     )
-    status = existing.scalar_one_or_none()
+    return existing.scalar_one_or_none()
+
+
+async def _update_sync_status(db, user_id: UUID, service: str, sync_token: str | None = None):
+    from app.models.cache import SyncStatus
+
+    status = await _get_sync_status(db, user_id, service)
     if status:
         status.last_sync_at = datetime.now(timezone.utc)
         status.status = "completed"
+        if sync_token is not None:
+            status.sync_token = sync_token
     else:
         db.add(SyncStatus(
             user_id=user_id,
             service=service,
             last_sync_at=datetime.now(timezone.utc),
+            sync_token=sync_token,
             status="completed",
         ))
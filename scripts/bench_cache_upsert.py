@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark cache-table writes: per-item ORM loop vs bulk upsert vs COPY.
+
+Writes N synthetic gmail_cache rows for a throwaway user twice (insert pass,
+then update pass) with each strategy and prints wall-clock timings.
+
+Usage:
+    docker compose up -d db
+    uv run alembic upgrade head
+    uv run python scripts/bench_cache_upsert.py [N]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _rows(user_id: uuid.UUID, n: int, dim: int, tag: str) -> list[dict]:
+    return [
+        {
+            "user_id": user_id,
+            "email_id": f"bench_{i}",
+            "subject": f"Benchmark message {i} ({tag})",
+            "sender": "bench@example.com",
+            "body_preview": "lorem ipsum " * 20,
+            "embedding": [random.random() for _ in range(dim)],
+            "received_at": datetime.now(timezone.utc),
+        }
+        for i in range(n)
+    ]
+
+
+async def _orm_loop(db, rows: list[dict]) -> None:
+    """The pre-bulk sync pattern: one SELECT per item, then mutate or add."""
+    from sqlalchemy import select
+    from app.models.cache import GmailCache
+
+    for row in rows:
+        existing = await db.execute(
+            select(GmailCache).where(
+                GmailCache.user_id == row["user_id"],
+                GmailCache.email_id == row["email_id"],
+            )
+        )
+        entry = existing.scalar_one_or_none()
+        if entry:
+            entry.subject = row["subject"]
+            entry.sender = row["sender"]
+            entry.body_preview = row["body_preview"]
+            entry.embedding = row["embedding"]
+            entry.synced_at = datetime.now(timezone.utc)
+        else:
+            db.add(GmailCache(**row, synced_at=datetime.now(timezone.utc)))
+
+
+async def main(n: int):
+    from sqlalchemy import delete
+    from app.config import get_settings
+    from app.db.database import async_session_factory, engine
+    from app.models.cache import GmailCache
+    from app.models.user import User
+    from app.services.cache_writer import copy_upsert_cache_rows, upsert_cache_rows
+
+    settings = get_settings()
+    dim = settings.embedding_dimensions
+    user_id = uuid.uuid4()
+
+    async with async_session_factory() as db:
+        db.add(User(id=user_id, email=f"bench-{user_id}@example.com"))
+        await db.commit()
+
+    strategies = [
+        ("orm loop", _orm_loop),
+        ("bulk upsert", lambda db, rows: upsert_cache_rows(db, GmailCache, rows)),
+        ("copy + merge", lambda db, rows: copy_upsert_cache_rows(db, GmailCache, rows)),
+    ]
+
+    print(f"Writing {n} rows x {dim}-dim embeddings per pass\n")
+    print(f"{'strategy':<14} {'insert (s)':>12} {'update (s)':>12} {'rows/s':>10}")
+    try:
+        for name, write in strategies:
+            timings = []
+            for tag in ("insert", "update"):
+                rows = _rows(user_id, n, dim, tag)
+                async with async_session_factory() as db:
+                    start = time.perf_counter()
+                    await write(db, rows)
+                    await db.commit()
+                    timings.append(time.perf_counter() - start)
+            print(f"{name:<14} {timings[0]:>12.3f} {timings[1]:>12.3f} {2 * n / sum(timings):>10.0f}")
+
+            async with async_session_factory() as db:
+                await db.execute(delete(GmailCache).where(GmailCache.user_id == user_id))
+                await db.commit()
+    finally:
+        async with async_session_factory() as db:
+            await db.execute(delete(GmailCache).where(GmailCache.user_id == user_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
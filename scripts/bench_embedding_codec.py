@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: JSON vs packed binary encoding of cached embeddings.
+
+No Redis needed; measures value size and encode/decode time per vector.
+
+Usage:
+    uv run python scripts/bench_embedding_codec.py [DIMENSIONS] [ITERATIONS]
+"""
+
+import json
+import os
+import random
+import sys
+import timeit
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.cache.embedding_codec import decode_embedding, encode_embedding
+
+
+def main(dim: int, iterations: int):
+    vector = [random.uniform(-0.1, 0.1) for _ in range(dim)]
+
+    codecs = {
+        "json": (lambda: json.dumps(vector), json.loads),
+        "float32": (lambda: encode_embedding(vector, "float32"), decode_embedding),
+        "float16": (lambda: encode_embedding(vector, "float16"), decode_embedding),
+    }
+
+    print(f"{dim}-dim vector, {iterations} iterations\n")
+    print(f"{'codec':<9} {'bytes':>8} {'encode (us)':>12} {'decode (us)':>12}")
+    for name, (encode, decode) in codecs.items():
+        value = encode()
+        enc = timeit.timeit(encode, number=iterations) / iterations * 1e6
+        dec = timeit.timeit(lambda: decode(value), number=iterations) / iterations * 1e6
+        print(f"{name:<9} {len(value):>8} {enc:>12.1f} {dec:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1536,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000,
+    )
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Measure result counts and latency of filtered vector search.
+
+Seeds a throwaway user with N synthetic events and N emails. A small share
+of them carry the attendee/sender that the benchmark filters on. The
+benchmark then runs the filtered hybrid searches under three strategies:
+
+- plain:     one approximate query (the pre-refill behaviour)
+- refill:    widen probes/ef_search, then exact-scan fallback (default)
+- iterative: pgvector >= 0.8 iterative index scans, plus refill
+
+Usage:
+    docker compose up -d db
+    uv run alembic upgrade head
+    uv run python scripts/bench_filtered_search.py [N] [--selectivity 0.02] [--limit 10]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TARGET = "target@example.com"
+
+STRATEGIES = {
+    "plain": {"vector_search_refill_factor": 1, "vector_search_exact_fallback": False, "vector_iterative_scan": "off"},
+    "refill": {"vector_search_refill_factor": 4, "vector_search_exact_fallback": True, "vector_iterative_scan": "off"},
+    "iterative": {"vector_search_refill_factor": 4, "vector_search_exact_fallback": True,
+                  "vector_iterative_scan": "relaxed_order"},
+}
+
+
+def _vector(dim: int) -> list[float]:
+    return [random.gauss(0, 1) for _ in range(dim)]
+
+
+async def main(args):
+    from sqlalchemy import delete
+    from app.config import get_settings
+    from app.db.database import async_session_factory, engine
+    from app.models.cache import GCalCache, GmailCache
+    from app.models.user import User
+    from app.services.cache_writer import upsert_cache_rows
+    from app.services.vector_search import hybrid_search_emails, hybrid_search_events
+
+    settings = get_settings()
+    dim = settings.embedding_dimensions
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+
+    def pick() -> bool:
+        return random.random() < args.selectivity
+
+    emails = [
+        {"user_id": user_id, "email_id": f"bench_{i}", "subject": f"Message {i}",
+         "sender": TARGET if pick() else f"other{i}@example.com", "body_preview": "",
+         "embedding": _vector(dim), "received_at": now - timedelta(days=i % 90)}
+        for i in range(args.rows)
+    ]
+    events = [
+        {"user_id": user_id, "event_id": f"bench_{i}", "title": f"Meeting {i}", "description": "",
+         "start_time": now + timedelta(hours=i), "end_time": now + timedelta(hours=i + 1),
+         "attendees": {"list": [{"email": TARGET if pick() else f"other{i}@example.com"}]},
+         "location": "", "embedding": _vector(dim)}
+        for i in range(args.rows)
+    ]
+    expected_emails = min(args.limit, sum(e["sender"] == TARGET for e in emails))
+    expected_events = min(args.limit, sum(TARGET in str(e["attendees"]) for e in events))
+
+    async with async_session_factory() as db:
+        db.add(User(id=user_id, email=f"bench-{user_id}@example.com"))
+        await db.flush()
+        await upsert_cache_rows(db, GmailCache, emails)
+        await upsert_cache_rows(db, GCalCache, events)
+        await db.commit()
+
+    print(f"{args.rows} emails + {args.rows} events, selectivity {args.selectivity:.1%}, limit {args.limit}")
+    print(f"matching rows available: emails {expected_emails}, events {expected_events}\n")
+    print(f"{'strategy':<10} {'search':<7} {'rows (min/avg)':>15} {'p50 ms':>8} {'p95 ms':>8}")
+
+    searches = {
+        "emails": lambda db, q: hybrid_search_emails(db, user_id, "", sender=TARGET, limit=args.limit, query_embedding=q),
+        "events": lambda db, q: hybrid_search_events(db, user_id, "", attendees=[TARGET], limit=args.limit,
+                                                     query_embedding=q),
+    }
+    try:
+        for name, overrides in STRATEGIES.items():
+            for key, value in overrides.items():
+                setattr(settings, key, value)
+            for label, search in searches.items():
+                counts, latencies = [], []
+                for _ in range(args.queries):
+                    async with async_session_factory() as db:
+                        start = time.perf_counter()
+                        try:
+                            results = await search(db, _vector(dim))
+                        except Exception as e:  # iterative_scan needs pgvector >= 0.8
+                            print(f"{name:<10} {label:<7} failed: {e.__class__.__name__}")
+                            break
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        counts.append(len(results))
+                else:
+                    latencies.sort()
+                    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+                    print(f"{name:<10} {label:<7} {min(counts):>6}/{statistics.mean(counts):<8.1f}"
+                          f"{statistics.median(latencies):>8.2f} {p95:>8.2f}")
+    finally:
+        async with async_session_factory() as db:
+            await db.execute(delete(GmailCache).where(GmailCache.user_id == user_id))
+            await db.execute(delete(GCalCache).where(GCalCache.user_id == user_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", nargs="?", type=int, default=5000)
+    parser.add_argument("--selectivity", type=float, default=0.02)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=30)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Measure coverage and accuracy of the rule-based intent classifier.
+
+Runs ``classify_with_rules`` over the queries in sample_queries.json. Coverage
+is the share of queries the rules classify instead of deferring to the LLM.
+Accuracy is the share of covered queries whose intent and services match the
+expected ones. Needs no database, Redis or OpenAI key.
+
+Usage:
+    uv run python scripts/bench_intent_rules.py [--queries sample_queries.json] [--repeat 1000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(args):
+    from app.core.intent_rules import classify_with_rules
+
+    with open(args.queries) as f:
+        samples = json.load(f)
+
+    covered = correct = 0
+    print(f"{'id':>3} {'expected':<16} {'rules':<16} {'ok':<3} query")
+    for sample in samples:
+        intent = classify_with_rules(sample["query"])
+        ok = ""
+        if intent is not None:
+            covered += 1
+            match = (intent.intent == sample["expected_intent"]
+                     and set(intent.services) == set(sample["expected_services"]))
+            correct += match
+            ok = "yes" if match else "NO"
+        print(f"{sample['id']:>3} {sample['expected_intent']:<16} {intent.intent if intent else '(llm)':<16} "
+              f"{ok:<3} {sample['query']}")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for sample in samples:
+            classify_with_rules(sample["query"])
+    per_query_us = (time.perf_counter() - start) / (args.repeat * len(samples)) * 1e6
+
+    print(f"\ncoverage: {covered}/{len(samples)} ({covered / len(samples):.0%})")
+    if covered:
+        print(f"accuracy: {correct}/{covered} ({correct / covered:.0%}) of covered queries")
+    print(f"latency:  {per_query_us:.1f} us per query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", default=os.path.join(ROOT, "sample_queries.json"))
+    parser.add_argument("--repeat", type=int, default=1000)
+    main(parser.parse_args())
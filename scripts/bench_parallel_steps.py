@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Measure wall-clock time of three-service plans with shared vs per-step sessions.
+
+Seeds a throwaway user with N emails, events and files, then runs a plan with
+one search step per service in a single parallel group (no combined search
+batch, so every step queries pgvector itself) under two modes:
+
+- shared:   every step uses the request's session. An AsyncSession cannot run
+            statements concurrently, so the steps run one after another
+- per-step: each step checks out its own session (the orchestrator default)
+
+Usage:
+    docker compose up -d db
+    uv run alembic upgrade head
+    uv run python scripts/bench_parallel_steps.py [N] [--queries 30]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _vector(dim: int) -> list[float]:
+    return [random.gauss(0, 1) for _ in range(dim)]
+
+
+async def main(args):
+    from sqlalchemy import delete
+    from app.config import get_settings
+    from app.core.orchestrator import ServiceOrchestrator
+    from app.db.database import async_session_factory, engine
+    from app.models.cache import GCalCache, GDriveCache, GmailCache
+    from app.models.user import User
+    from app.schemas.query import ExecutionPlan, ExecutionStep
+    from app.services.cache_writer import upsert_cache_rows
+
+    settings = get_settings()
+    settings.user_vector_index_enabled = False
+    dim = settings.embedding_dimensions
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+
+    tables = {
+        GmailCache: [
+            {"user_id": user_id, "email_id": f"bench_{i}", "subject": f"Message {i}", "sender": f"s{i}@example.com",
+             "body_preview": "", "embedding": _vector(dim), "received_at": now - timedelta(days=i % 90)}
+            for i in range(args.rows)
+        ],
+        GCalCache: [
+            {"user_id": user_id, "event_id": f"bench_{i}", "title": f"Meeting {i}", "description": "",
+             "start_time": now + timedelta(hours=i), "end_time": now + timedelta(hours=i + 1),
+             "attendees": {"list": []}, "location": "", "embedding": _vector(dim)}
+            for i in range(args.rows)
+        ],
+        GDriveCache: [
+            {"user_id": user_id, "file_id": f"bench_{i}", "name": f"File {i}", "mime_type": "text/plain",
+             "content_preview": "", "embedding": _vector(dim), "modified_at": now - timedelta(days=i % 90)}
+            for i in range(args.rows)
+        ],
+    }
+    async with async_session_factory() as db:
+        db.add(User(id=user_id, email=f"bench-{user_id}@example.com"))
+        await db.flush()
+        for model, rows in tables.items():
+            await upsert_cache_rows(db, model, rows)
+        await db.commit()
+
+    steps = [
+        ExecutionStep(id="step_0", agent="gmail", action="search_emails", params={"keyword": "q", "limit": 10}),
+        ExecutionStep(id="step_1", agent="gcal", action="search_events", params={"keyword": "q", "limit": 10}),
+        ExecutionStep(id="step_2", agent="drive", action="search_files", params={"keyword": "q", "limit": 10}),
+    ]
+    modes = {
+        # One session can only run one statement at a time, so with a shared session the steps are chained
+        "shared": (ExecutionPlan(
+            steps=[s.model_copy(update={"depends_on": [steps[i - 1].id] if i else []}) for i, s in enumerate(steps)],
+            parallel_groups=[[s.id] for s in steps],
+        ), patch("app.core.orchestrator.step_session", contextlib.nullcontext)),
+        "per-step": (ExecutionPlan(steps=steps, parallel_groups=[[s.id for s in steps]]), contextlib.nullcontext()),
+    }
+
+    async def embed(texts):
+        return [_vector(dim) for _ in texts]
+
+    print(f"{args.rows} rows per service, {args.queries} three-step plans per mode\n")
+    print(f"{'mode':<10} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    try:
+        with patch("app.core.orchestrator.generate_embeddings_batch", embed):
+            for name, (plan, session_mode) in modes.items():
+                latencies = []
+                with session_mode:
+                    for _ in range(args.queries):
+                        async with async_session_factory() as db:
+                            orchestrator = ServiceOrchestrator(user_id, "bench-token", db)
+                            start = time.perf_counter()
+                            results = await orchestrator.execute(plan)
+                            latencies.append((time.perf_counter() - start) * 1000)
+                        failed = [r for r in results if r.status != "success"]
+                        if failed:
+                            print(f"{name:<10} step failed: {failed[0].error}")
+                            break
+                latencies.sort()
+                p95 = latencies[int(0.95 * (len(latencies) - 1))]
+                print(f"{name:<10} {statistics.median(latencies):>8.2f} {p95:>8.2f} {statistics.mean(latencies):>8.2f}")
+    finally:
+        async with async_session_factory() as db:
+            for model in tables:
+                await db.execute(delete(model).where(model.user_id == user_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", nargs="?", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=30)
+    asyncio.run(main(parser.parse_args()))
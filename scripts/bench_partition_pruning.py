@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Show hash-partition pruning for per-user vector search.
+
+Builds two scratch copies of the same synthetic multi-tenant corpus: a plain
+table with one IVFFlat index over every tenant, and a table hash-partitioned
+by user_id with one index per partition. Each query runs the cache-table
+search shape (``WHERE user_id = :u ORDER BY embedding <=> :q LIMIT :k``) under
+EXPLAIN ANALYZE. The benchmark reports how many partitions the plan touched,
+how many of the k slots were filled, and execution time. It also prints one
+partitioned plan so the pruning can be seen.
+
+Usage:
+    docker compose up -d db
+    uv run python scripts/bench_partition_pruning.py [--users 200] [--rows-per-user 100] [--dim 256] [--modulus 16]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import uuid
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SEARCH = "SELECT id FROM {table} WHERE user_id = :u ORDER BY embedding <=> CAST(:q AS vector) LIMIT :k"
+
+
+def _vector(dim: int) -> str:
+    v = [random.gauss(0, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(x * x for x in v)) or 1.0
+    return str([x / norm for x in v])
+
+
+def _scanned_relations(plan: dict) -> set[str]:
+    found = {plan["Relation Name"]} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", []):
+        found |= _scanned_relations(child)
+    return found
+
+
+async def main(args):
+    from sqlalchemy import text
+    from app.db.database import engine
+    from app.db.partitioning import partitions_ddl
+    from app.db.vector_index import ivfflat_lists_for
+
+    users = [uuid.uuid4() for _ in range(args.users)]
+    rows = [{"u": u, "e": _vector(args.dim)} for u in users for _ in range(args.rows_per_user)]
+    total = len(rows)
+    print(f"Corpus: {args.users} users x {args.rows_per_user} rows, {args.dim}-dim, "
+          f"modulus {args.modulus}, k={args.k}, probes={args.probes}\n")
+
+    try:
+        async with engine.begin() as conn:
+            for table, partition_by in (("bench_plain", ""), ("bench_hash", " PARTITION BY HASH (user_id)")):
+                await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+                await conn.execute(text(
+                    f"CREATE TABLE {table} (id bigserial, user_id uuid NOT NULL, "
+                    f"embedding vector({args.dim}), PRIMARY KEY (id, user_id)){partition_by}"
+                ))
+            for statement in partitions_ddl("bench_hash", args.modulus):
+                await conn.execute(text(statement))
+            for table in ("bench_plain", "bench_hash"):
+                await conn.execute(
+                    text(f"INSERT INTO {table} (user_id, embedding) VALUES (:u, CAST(:e AS vector))"), rows,
+                )
+            await conn.execute(text(
+                f"CREATE INDEX ON bench_plain USING ivfflat (embedding vector_cosine_ops) "
+                f"WITH (lists = {ivfflat_lists_for(total)})"
+            ))
+            await conn.execute(text(
+                f"CREATE INDEX ON bench_hash USING ivfflat (embedding vector_cosine_ops) "
+                f"WITH (lists = {ivfflat_lists_for(total // args.modulus)})"
+            ))
+            await conn.execute(text("ANALYZE bench_plain"))
+            await conn.execute(text("ANALYZE bench_hash"))
+
+        queries = [(random.choice(users), _vector(args.dim)) for _ in range(args.queries)]
+        print(f"{'table':<12} {'partitions':>10} {'filled':>7} {'p50 ms':>8} {'p95 ms':>8}")
+        sample_plan = None
+        for table in ("bench_plain", "bench_hash"):
+            scanned, filled, timings = [], [], []
+            async with engine.begin() as conn:
+                await conn.execute(text(f"SET LOCAL ivfflat.probes = {args.probes}"))
+                for user_id, q in queries:
+                    plan = (await conn.execute(
+                        text(f"EXPLAIN (ANALYZE, FORMAT JSON) {SEARCH.format(table=table)}"),
+                        {"u": user_id, "q": q, "k": args.k},
+                    )).scalar_one()
+                    plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]
+                    scanned.append(len(_scanned_relations(plan["Plan"])))
+                    filled.append(plan["Plan"]["Actual Rows"] / args.k)
+                    timings.append(plan["Execution Time"])
+                if table == "bench_hash":
+                    sample_plan = (await conn.execute(
+                        text(f"EXPLAIN (COSTS OFF) {SEARCH.format(table=table)}"),
+                        {"u": queries[0][0], "q": queries[0][1], "k": args.k},
+                    )).scalars().all()
+            timings.sort()
+            p95 = timings[int(0.95 * (len(timings) - 1))]
+            print(f"{table:<12} {statistics.mean(scanned):>10.1f} {statistics.mean(filled):>7.0%} "
+                  f"{statistics.median(timings):>8.2f} {p95:>8.2f}")
+
+        print("\nPartitioned plan:")
+        for line in sample_plan:
+            print(f"  {line}")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP TABLE IF EXISTS bench_plain"))
+            await conn.execute(text("DROP TABLE IF EXISTS bench_hash"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rows-per-user", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--modulus", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
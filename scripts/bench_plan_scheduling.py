@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Compare layer-by-layer and dataflow scheduling of multi-step plans.
+
+Builds the planner's plans for the multi-service example intents and runs
+them through ``ServiceOrchestrator`` with simulated agents. Each action sleeps
+for a jittered latency, so no database, Redis or Google account is needed.
+There are two modes:
+
+- layered:  every step waits for the whole previous topological layer, which
+            was the orchestrator's behaviour before the dataflow scheduler
+- dataflow: every step waits only for its own ``depends_on``
+
+Usage:
+    uv run python scripts/bench_plan_scheduling.py [--runs 50] [--seed 0] [--scale 1.0]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from unittest.mock import patch
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Median simulated latency per action, in ms
+LATENCY_MS = {
+    "search_emails": 120, "search_events": 250, "search_files": 180,
+    "get_email": 90, "get_file": 300, "draft_email": 150,
+}
+
+INTENTS = {
+    "cancel_flight": {
+        "services": ["gmail", "gcal"], "intent": "cancel_flight", "entities": {"airline": "Turkish Airlines"},
+        "steps": ["search_gmail_for_booking", "find_calendar_event", "extract_booking_reference",
+                  "draft_cancellation_email"],
+    },
+    "find_conflicts": {
+        "services": ["gcal", "drive"], "intent": "find_conflicts",
+        "entities": {"date_range": {"from": "2026-03-02", "to": "2026-03-08"}, "document_type": "out-of-office"},
+        "steps": ["search_drive_ooo_document", "extract_ooo_dates", "search_calendar_next_week",
+                  "find_conflicting_events"],
+    },
+    "prepare_meeting": {
+        "services": ["gcal", "gmail", "drive"], "intent": "prepare_meeting",
+        "entities": {"company": "Acme Corp", "date": "tomorrow"},
+        "steps": ["find_calendar_event_tomorrow_acme", "search_emails_acme_corp", "search_drive_acme_documents"],
+    },
+}
+
+
+class SimulatedAgent:
+    scale = 1.0
+
+    def search_params(self, **params) -> dict:
+        return params
+
+    async def execute_action(self, action: str, params: dict):
+        await asyncio.sleep(random.lognormvariate(0, 0.4) * LATENCY_MS.get(action, 100) / 1000 * self.scale)
+        return [{"action": action}]
+
+
+def _layered(plan):
+    """The same plan with every step also depending on the whole previous layer."""
+    barrier = {sid: prev for prev, group in zip(plan.parallel_groups, plan.parallel_groups[1:]) for sid in group}
+    steps = [
+        s.model_copy(update={"depends_on": list(dict.fromkeys(s.depends_on + barrier.get(s.id, [])))})
+        for s in plan.steps
+    ]
+    return plan.model_copy(update={"steps": steps})
+
+
+async def main(args):
+    from app.core.orchestrator import ServiceOrchestrator
+    from app.core.query_planner import build_execution_plan
+    from app.schemas.query import ClassifiedIntent
+
+    random.seed(args.seed)
+    SimulatedAgent.scale = args.scale
+
+    async def combined_search(db, user_id, searches, **kwargs):
+        await asyncio.sleep(random.lognormvariate(0, 0.4) * 0.15 * args.scale)
+        return {agent: [{"agent": agent}] for agent in searches}
+
+    async def embed(texts):
+        return [[0.0] for _ in texts]
+
+    print(f"{args.runs} runs per plan and mode, simulated latencies x{args.scale}\n")
+    print(f"{'plan':<16} {'mode':<9} {'p50 ms':>8} {'p95 ms':>8} {'queued ms':>10}")
+    with patch("app.core.orchestrator.generate_embeddings_batch", embed), \
+         patch("app.core.orchestrator.hybrid_search_all", combined_search):
+        for name, intent in INTENTS.items():
+            plan = build_execution_plan(ClassifiedIntent(**intent))
+            for mode, mode_plan in (("layered", _layered(plan)), ("dataflow", plan)):
+                latencies, queued = [], []
+                for _ in range(args.runs):
+                    orchestrator = ServiceOrchestrator(uuid.uuid4(), "bench-token", db=None)
+                    orchestrator.agents = {agent: SimulatedAgent() for agent in ("gmail", "gcal", "drive")}
+                    start = time.perf_counter()
+                    results = await orchestrator.execute(mode_plan)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    queued.append(sum(r.queue_ms or 0 for r in results))
+                latencies.sort()
+                p95 = latencies[int(0.95 * (len(latencies) - 1))]
+                print(f"{name:<16} {mode:<9} {statistics.median(latencies):>8.1f} {p95:>8.1f} "
+                      f"{statistics.mean(queued):>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier on the simulated latencies")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Benchmark pgvector recall vs latency for IVFFlat and HNSW.
+
+Loads a synthetic clustered corpus into a scratch table. Exact top-k for a
+set of queries is computed by sequential scan. Then each index type is built
+and its search breadth (ivfflat.probes / hnsw.ef_search) is swept, printing
+recall@k and per-query latency.
+
+Usage:
+    docker compose up -d db
+    uv run python scripts/bench_vector_index.py [--rows 20000] [--dim 256] [--queries 50] [--k 10]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TABLE = "bench_vectors"
+
+
+def _normalize(v: list[float]) -> list[float]:
+    norm = math.sqrt(sum(x * x for x in v)) or 1.0
+    return [x / norm for x in v]
+
+
+def _corpus(rows: int, dim: int, clusters: int = 50) -> list[list[float]]:
+    """Gaussian blobs around random centroids, roughly like topic-clustered mail."""
+    centroids = [[random.gauss(0, 1) for _ in range(dim)] for _ in range(clusters)]
+    return [
+        _normalize([c + random.gauss(0, 0.35) for c in random.choice(centroids)])
+        for _ in range(rows)
+    ]
+
+
+async def _top_k(conn, query: list[float], k: int) -> list[int]:
+    from sqlalchemy import text
+
+    result = await conn.execute(
+        text(f"SELECT id FROM {TABLE} ORDER BY embedding <=> CAST(:q AS vector) LIMIT :k"),
+        {"q": str(query), "k": k},
+    )
+    return [r[0] for r in result.all()]
+
+
+async def _sweep(engine, queries, truth, k: int, setting: str, values: list[int]) -> None:
+    from sqlalchemy import text
+
+    for value in values:
+        latencies, recalls = [], []
+        async with engine.connect() as conn:
+            await conn.execute(text(f"SET {setting} = {value}"))
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                found = await _top_k(conn, query, k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(len(set(found) & set(expected)) / k)
+        latencies.sort()
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(f"  {setting:<18} {value:>5}  recall@{k} {statistics.mean(recalls):6.3f}  "
+              f"p50 {statistics.median(latencies):7.2f} ms  p95 {p95:7.2f} ms")
+
+
+async def main(args):
+    from sqlalchemy import text
+    from app.db.database import engine
+    from app.db.vector_index import ivfflat_lists_for
+
+    print(f"Corpus: {args.rows} x {args.dim}-dim, {args.queries} queries, k={args.k}\n")
+    vectors = _corpus(args.rows, args.dim)
+    queries = [_normalize([x + random.gauss(0, 0.1) for x in random.choice(vectors)]) for _ in range(args.queries)]
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+            await conn.execute(text(f"CREATE TABLE {TABLE} (id serial PRIMARY KEY, embedding vector({args.dim}))"))
+            await conn.execute(
+                text(f"INSERT INTO {TABLE} (embedding) VALUES (CAST(:e AS vector))"),
+                [{"e": str(v)} for v in vectors],
+            )
+            await conn.execute(text(f"ANALYZE {TABLE}"))
+
+        # Exact neighbours: no index exists yet, so this is a sequential scan.
+        async with engine.connect() as conn:
+            start = time.perf_counter()
+            truth = [await _top_k(conn, q, args.k) for q in queries]
+            exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        print(f"exact (seq scan)    mean {exact_ms:7.2f} ms/query\n")
+
+        lists = ivfflat_lists_for(args.rows)
+        configs = [
+            (f"ivfflat lists={lists}", f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})",
+             "ivfflat.probes", [1, 5, 10, 20, 40]),
+            ("hnsw m=16 ef_construction=64", "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)",
+             "hnsw.ef_search", [10, 20, 40, 80, 160]),
+        ]
+        for label, index_sql, setting, values in configs:
+            async with engine.begin() as conn:
+                start = time.perf_counter()
+                await conn.execute(text(f"CREATE INDEX bench_vectors_idx ON {TABLE} {index_sql}"))
+                build_s = time.perf_counter() - start
+            print(f"{label}  (build {build_s:.1f}s)")
+            await _sweep(engine, queries, truth, args.k, setting, values)
+            async with engine.begin() as conn:
+                await conn.execute(text("DROP INDEX bench_vectors_idx"))
+            print()
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
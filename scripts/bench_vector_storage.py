@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Compare embedding storage options: vector vs halfvec vs binary quantization vs truncated indexes.
+
+Each variant gets a scratch table holding the same synthetic clustered
+corpus and an HNSW index. The benchmark prints heap and index size, then
+recall@k against exact float32 neighbours and per-query latency. Binary
+variants index binary_quantize(embedding) and re-rank k * RERANK candidates
+by exact cosine distance, the same query shape as app/services/vector_search.py.
+``--coarse 256,512`` adds coarse-to-fine variants that index only the leading
+N dimensions. The synthetic corpus has no Matryoshka structure, so their
+recall here is a lower bound. Real text-embedding-3 vectors keep most of their
+signal in the leading dimensions.
+
+Requires pgvector >= 0.7.
+
+Usage:
+    docker compose up -d db
+    uv run python scripts/bench_vector_storage.py [--rows 20000] [--dim 1536] [--queries 50] [--k 10] [--coarse 256,512]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RERANK = 4
+
+# name -> (storage type, binary quantized index, indexed leading dimensions or 0)
+VARIANTS = {
+    "vector": ("vector", False, 0),
+    "halfvec": ("halfvec", False, 0),
+    "vector+bq": ("vector", True, 0),
+    "halfvec+bq": ("halfvec", True, 0),
+}
+
+
+def _normalize(v: list[float]) -> list[float]:
+    norm = math.sqrt(sum(x * x for x in v)) or 1.0
+    return [x / norm for x in v]
+
+
+def _corpus(rows: int, dim: int, clusters: int = 50) -> list[list[float]]:
+    centroids = [[random.gauss(0, 1) for _ in range(dim)] for _ in range(clusters)]
+    return [
+        _normalize([c + random.gauss(0, 0.35) for c in random.choice(centroids)])
+        for _ in range(rows)
+    ]
+
+
+def _reduced(expr: str, storage: str, binary: bool, dim: int, coarse: int) -> str:
+    if coarse:
+        expr, dim = f"subvector({expr}, 1, {coarse})::{storage}({coarse})", coarse
+    if binary:
+        expr = f"binary_quantize({expr})::bit({dim})"
+    return f"({expr})"
+
+
+def _query_sql(table: str, storage: str, binary: bool, dim: int, coarse: int) -> str:
+    q = f"CAST(:q AS {storage})"
+    if not binary and not coarse:
+        return f"SELECT id FROM {table} ORDER BY embedding <=> {q} LIMIT :k"
+    op = "<~>" if binary else "<=>"
+    return (
+        f"SELECT id FROM (SELECT id, embedding FROM {table} "
+        f"ORDER BY {_reduced('embedding', storage, binary, dim, coarse)} {op} "
+        f"{_reduced(q, storage, binary, dim, coarse)} LIMIT :candidates) c "
+        f"ORDER BY embedding <=> {q} LIMIT :k"
+    )
+
+
+async def main(args):
+    from sqlalchemy import text
+    from app.db.database import engine
+
+    print(f"Corpus: {args.rows} x {args.dim}-dim, {args.queries} queries, k={args.k}, hnsw m=16\n")
+    vectors = _corpus(args.rows, args.dim)
+    queries = [_normalize([x + random.gauss(0, 0.1) for x in random.choice(vectors)]) for _ in range(args.queries)]
+    rows = [{"e": str(v)} for v in vectors]
+    variants = dict(VARIANTS)
+    for n in args.coarse:
+        variants[f"vector@{n}"] = ("vector", False, n)
+        variants[f"halfvec@{n}+bq"] = ("halfvec", True, n)
+    tables = [f"bench_storage_{i}" for i in range(len(variants))]
+
+    try:
+        # Ground truth: exact float32 neighbours from a sequential scan.
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP TABLE IF EXISTS bench_storage_exact"))
+            await conn.execute(text(f"CREATE TABLE bench_storage_exact (id int PRIMARY KEY, embedding vector({args.dim}))"))
+            await conn.execute(
+                text("INSERT INTO bench_storage_exact (id, embedding) VALUES (:id, CAST(:e AS vector))"),
+                [{"id": i, **r} for i, r in enumerate(rows)],
+            )
+            truth = []
+            for q in queries:
+                result = await conn.execute(
+                    text("SELECT id FROM bench_storage_exact ORDER BY embedding <=> CAST(:q AS vector) LIMIT :k"),
+                    {"q": str(q), "k": args.k},
+                )
+                truth.append({r[0] for r in result.all()})
+
+        print(f"{'variant':<16} {'heap MB':>8} {'index MB':>9} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for table, (name, (storage, binary, coarse)) in zip(tables, variants.items()):
+            opclass = "bit_hamming_ops" if binary else f"{storage}_cosine_ops"
+            target = (f"{_reduced('embedding', storage, binary, args.dim, coarse)} {opclass}" if binary or coarse
+                      else f"embedding {opclass}")
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+                await conn.execute(text(f"CREATE TABLE {table} (id int PRIMARY KEY, embedding {storage}({args.dim}))"))
+                await conn.execute(text(
+                    f"INSERT INTO {table} (id, embedding) SELECT id, embedding::{storage}({args.dim}) "
+                    f"FROM bench_storage_exact"
+                ))
+                await conn.execute(text(
+                    f"CREATE INDEX {table}_idx ON {table} USING hnsw ({target}) WITH (m = 16, ef_construction = 64)"
+                ))
+                await conn.execute(text(f"ANALYZE {table}"))
+                sizes = (await conn.execute(text(
+                    f"SELECT pg_table_size('{table}'), pg_relation_size('{table}_idx')"
+                ))).one()
+
+            latencies, recalls = [], []
+            sql = text(_query_sql(table, storage, binary, args.dim, coarse))
+            async with engine.connect() as conn:
+                await conn.execute(text(f"SET hnsw.ef_search = {max(40, args.k * RERANK)}"))
+                for q, expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    result = await conn.execute(sql, {"q": str(q), "k": args.k, "candidates": args.k * RERANK})
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    recalls.append(len({r[0] for r in result.all()} & expected) / args.k)
+            latencies.sort()
+            p95 = latencies[int(0.95 * (len(latencies) - 1))]
+            print(f"{name:<16} {sizes[0] / 2**20:>8.1f} {sizes[1] / 2**20:>9.1f} {statistics.mean(recalls):>9.3f} "
+                  f"{statistics.median(latencies):>8.2f} {p95:>8.2f}")
+    finally:
+        async with engine.begin() as conn:
+            for table in [*tables, "bench_storage_exact"]:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--coarse", type=lambda s: [int(n) for n in s.split(",") if n], default=[],
+                        help="comma-separated leading dimensions to index, e.g. 256,512")
+    asyncio.run(main(parser.parse_args()))
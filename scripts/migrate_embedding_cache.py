@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Rewrite legacy JSON ``emb:*`` cache entries in the packed binary format.
+
+Entries keep their remaining TTL. New writes are already binary and reads
+accept both formats, so running this is optional; it just frees memory
+sooner than waiting for the old entries to expire.
+
+Usage:
+    uv run python scripts/migrate_embedding_cache.py [--dry-run]
+"""
+
+import asyncio
+import os
+import sys
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def main(dry_run: bool):
+    from app.cache.embedding_codec import decode_embedding, encode_embedding, is_legacy_entry
+    from app.cache.redis_client import close_redis, get_redis_bytes
+    from app.config import get_settings
+
+    settings = get_settings()
+    r = await get_redis_bytes()
+
+    scanned = converted = bytes_before = bytes_after = 0
+    async for key in r.scan_iter(match="emb:*", count=1000):
+        scanned += 1
+        raw = await r.get(key)
+        if raw is None or not is_legacy_entry(raw):
+            continue
+        packed = encode_embedding(decode_embedding(raw), settings.embedding_cache_dtype)
+        bytes_before += len(raw)
+        bytes_after += len(packed)
+        converted += 1
+        if dry_run:
+            continue
+        ttl = await r.pttl(key)
+        if ttl > 0:
+            await r.set(key, packed, px=ttl)
+        elif ttl == -1:
+            await r.set(key, packed)
+
+    await close_redis()
+    print(f"Scanned {scanned} keys, {'would convert' if dry_run else 'converted'} {converted}")
+    if converted:
+        print(f"Value bytes: {bytes_before:,} -> {bytes_after:,} ({bytes_before / bytes_after:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(dry_run="--dry-run" in sys.argv))
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Rebuild the cache-table embedding indexes from the current settings.
+
+Use after changing VECTOR_INDEX_TYPE, IVFFLAT_LISTS, HNSW_M or
+HNSW_EF_CONSTRUCTION, or after a large backfill when IVFFlat lists should be
+re-sized from the new row counts. Tables are locked for writes while each
+index builds.
+
+Usage:
+    VECTOR_INDEX_TYPE=hnsw uv run python scripts/rebuild_vector_indexes.py
+"""
+
+import asyncio
+import logging
+import os
+import sys
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from app.db.database import engine
+    from app.db.vector_index import rebuild_vector_indexes
+
+    async with engine.begin() as conn:
+        await conn.run_sync(rebuild_vector_indexes)
+    await engine.dispose()
+    print("Vector indexes rebuilt.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
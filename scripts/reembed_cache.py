@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Re-embed the cache tables after changing EMBEDDING_MODEL or EMBEDDING_DIMENSIONS.
+
+Run the migrations (or scripts/rebuild_vector_indexes.py) first so the
+columns have the new width. Rows whose content hash already matches the
+current model and dimensions are skipped, so the job can be re-run safely.
+
+Usage:
+    EMBEDDING_DIMENSIONS=512 uv run python scripts/reembed_cache.py [--batch-size 500] [--missing-only]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def main(batch_size: int, missing_only: bool):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from app.cache.redis_client import close_redis
+    from app.db.database import async_session_factory, engine
+    from app.services.reembed import reembed_all
+
+    async with async_session_factory() as db:
+        counts = await reembed_all(db, batch_size=batch_size, missing_only=missing_only)
+    await engine.dispose()
+    await close_redis()
+    for table, count in counts.items():
+        print(f"{table}: {count} rows re-embedded")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--missing-only", action="store_true", help="only rows without an embedding")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.missing_only))
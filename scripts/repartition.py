@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Change the hash partitioning of the per-user tables while the app keeps running.
+
+Each table is copied into a shadow table with the new layout. A trigger
+mirrors live writes into it, existing rows are copied in primary-key batches,
+the per-partition ANN indexes are built, and then the tables are swapped under
+a short exclusive lock. Every step commits separately, so the live table stays
+readable and writable until the swap. ``--modulus 0`` converts back to plain
+tables. Set PARTITION_MODULUS to the same value afterwards.
+
+Usage:
+    uv run python scripts/repartition.py --modulus 32 [--tables gmail_cache,conversations] [--batch-size 5000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+# Ensure project root is on path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def repartition_online(engine, table, modulus: int, batch_size: int):
+    from app.db.partitioning import backfill_shadow, build_shadow_indexes, create_shadow, drop_shadow, swap_shadow
+
+    start = time.perf_counter()
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(create_shadow, table, modulus)
+        last_id, batches = None, 0
+        while True:
+            async with engine.begin() as conn:
+                last_id = await conn.run_sync(backfill_shadow, table, last_id, batch_size)
+            if last_id is None:
+                break
+            batches += 1
+            if batches % 20 == 0:
+                print(f"  {table.name}: {batches * batch_size:,} rows copied")
+        async with engine.begin() as conn:
+            await conn.run_sync(build_shadow_indexes, table)
+        async with engine.begin() as conn:
+            await conn.run_sync(swap_shadow, table)
+    except Exception:
+        async with engine.begin() as conn:
+            await conn.run_sync(drop_shadow, table)
+        raise
+    print(f"{table.name}: repartitioned into {modulus} partitions in {time.perf_counter() - start:.1f}s")
+
+
+async def main(args):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from app.db.database import engine
+    from app.db.partitioning import PARTITIONED_TABLES, current_modulus
+    from app.models.cache import GCalCache, GDriveCache, GmailCache
+    from app.models.conversation import Conversation
+
+    tables = {m.__tablename__: m.__table__ for m in (GmailCache, GCalCache, GDriveCache, Conversation)}
+    names = args.tables or list(PARTITIONED_TABLES)
+    try:
+        for name in names:
+            async with engine.connect() as conn:
+                current = await conn.run_sync(current_modulus, name)
+            if current == args.modulus:
+                print(f"{name}: already has {current} partitions, skipping")
+                continue
+            print(f"{name}: {current} -> {args.modulus} partitions")
+            await repartition_online(engine, tables[name], args.modulus, args.batch_size)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    from app.config import get_settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modulus", type=int, default=get_settings().partition_modulus)
+    parser.add_argument("--tables", type=lambda s: [t for t in s.split(",") if t], default=None)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
@@ -124,7 +124,7 @@ async def main():
                 description=event.get("description"),
                 start_time=start,
                 end_time=end,
-                attendees={"list": [{"email": a} for a in event.get("attendees", [])]},
+                attendees={"list": [{"email": a.lower()} for a in event.get("attendees", [])]},
                 location=event.get("location"),
                 embedding=embedding,
                 synced_at=datetime.now(timezone.utc),
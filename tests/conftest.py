@@ -5,6 +5,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from app.cache.redis_client import clear_local_cache
 from app.main import app
 
 
@@ -15,6 +16,13 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def _clear_local_cache():
+    clear_local_cache()
+    yield
+    clear_local_cache()
+
+
 @pytest.fixture
 def mock_db():
     db = AsyncMock()
@@ -1,4 +1,5 @@
 import uuid
+from datetime import timedelta
 from unittest.mock import AsyncMock, patch, MagicMock
 
 import pytest
@@ -102,3 +103,182 @@ async def test_agent_retry_on_server_error(gmail_agent):
 async def test_agent_unknown_action_raises(gmail_agent):
     with pytest.raises(ValueError, match="has no action"):
         await gmail_agent.execute_action("nonexistent_action", {})
+
+
+@pytest.mark.asyncio
+async def test_gmail_get_emails_uses_batch_in_demo_mode(gmail_agent):
+    with patch("app.agents.base.settings") as mock_settings, \
+         patch("app.agents.gmail_agent.settings") as gmail_settings:
+        mock_settings.demo_mode = True
+        gmail_settings.google_api_batch_size = 50
+        results = await gmail_agent.get_emails(["msg_tk_001", "missing_id", "msg_acme_001"])
+
+    assert [r["email_id"] for r in results] == ["msg_tk_001", "msg_acme_001"]
+    assert results[0]["subject"].startswith("Your Turkish Airlines")
+
+
+@pytest.mark.asyncio
+async def test_gmail_api_search_fetches_details_in_one_batch(gmail_agent):
+    list_response = {"messages": [{"id": "a"}, {"id": "b"}, {"id": "c"}]}
+    batch_response = [
+        {"id": mid, "snippet": "", "payload": {"headers": [{"name": "Subject", "value": mid.upper()}]}}
+        for mid in ("a", "b", "c")
+    ]
+
+    with patch.object(gmail_agent, "_request", new_callable=AsyncMock, return_value=list_response) as mock_req, \
+         patch.object(gmail_agent, "_batch_request", new_callable=AsyncMock, return_value=batch_response) as mock_batch:
+        results = await gmail_agent._api_search("report", max_results=5)
+
+    mock_req.assert_called_once()
+    mock_batch.assert_called_once()
+    assert len(mock_batch.call_args.args[1]) == 3
+    assert [r["subject"] for r in results] == ["A", "B", "C"]
+
+
+def test_batch_encode_decode_roundtrip():
+    from app.agents.batch import decode_batch_parts, encode_batch
+
+    boundary, body = encode_batch([
+        {"method": "GET", "url": "https://www.googleapis.com/gmail/v1/users/me/messages/m1", "params": {"format": "metadata"}},
+        {"method": "GET", "url": "https://www.googleapis.com/gmail/v1/users/me/messages/m2"},
+    ])
+    assert b"GET /gmail/v1/users/me/messages/m1?format=metadata" in body
+    assert b"Content-ID: <item-1>" in body
+
+    # Google answers out of order and prefixes Content-IDs with "response-"
+    response = (
+        "--resp\r\n"
+        "Content-Type: application/http\r\n"
+        "Content-ID: <response-item-1>\r\n\r\n"
+        "HTTP/1.1 404 Not Found\r\nContent-Type: application/json\r\n\r\n"
+        '{"error": {"code": 404}}\r\n'
+        "--resp\r\n"
+        "Content-Type: application/http\r\n"
+        "Content-ID: <response-item-0>\r\n\r\n"
+        "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n"
+        '{"id": "m1"}\r\n'
+        "--resp--\r\n"
+    ).encode()
+    results = decode_batch_parts("multipart/mixed; boundary=resp", response, expected=3)
+    # item-2 is missing from the response
+    assert results == [(200, {"id": "m1"}), (404, None), (None, None)]
+
+
+@pytest.mark.asyncio
+async def test_batch_request_resends_transient_failures_and_skips_404(gmail_agent):
+    import httpx
+
+    batch = httpx.Response(
+        200,
+        headers={"Content-Type": "multipart/mixed; boundary=resp"},
+        content=(
+            "--resp\r\n"
+            "Content-Type: application/http\r\n"
+            "Content-ID: <response-item-0>\r\n\r\n"
+            "HTTP/1.1 503 Service Unavailable\r\n\r\n"
+            "--resp\r\n"
+            "Content-Type: application/http\r\n"
+            "Content-ID: <response-item-1>\r\n\r\n"
+            "HTTP/1.1 404 Not Found\r\n\r\n"
+            "--resp--\r\n"
+        ).encode(),
+    )
+    requests = [
+        {"method": "GET", "url": "https://www.googleapis.com/gmail/v1/users/me/messages/m1", "params": {"format": "metadata"}},
+        {"method": "GET", "url": "https://www.googleapis.com/gmail/v1/users/me/messages/gone"},
+    ]
+
+    with patch("app.agents.base.settings") as mock_settings, \
+         patch.object(gmail_agent, "_send", new_callable=AsyncMock, return_value=batch), \
+         patch.object(gmail_agent, "_request", new_callable=AsyncMock, return_value={"id": "m1"}) as mock_req:
+        mock_settings.demo_mode = False
+        results = await gmail_agent._batch_request("https://www.googleapis.com/batch/gmail/v1", requests)
+
+    assert results == [{"id": "m1"}, None]
+    mock_req.assert_awaited_once_with("GET", requests[0]["url"], params={"format": "metadata"})
+
+
+@pytest.mark.asyncio
+async def test_gmail_list_history_tracks_adds_and_deletes(gmail_agent):
+    pages = [
+        {
+            "history": [
+                {"messagesAdded": [{"message": {"id": "m1"}}, {"message": {"id": "m2"}}]},
+                {"messagesDeleted": [{"message": {"id": "m1"}}]},
+            ],
+            "historyId": "105",
+            "nextPageToken": "p2",
+        },
+        {
+            "history": [{"messagesDeleted": [{"message": {"id": "old"}}]}],
+            "historyId": "110",
+        },
+    ]
+
+    with patch.object(gmail_agent, "_request", new_callable=AsyncMock, side_effect=pages) as mock_req:
+        added, deleted, history_id = await gmail_agent.list_history("100")
+
+    assert added == ["m2"]
+    assert deleted == ["m1", "old"]
+    assert history_id == "110"
+    assert mock_req.call_args.kwargs["params"]["pageToken"] == "p2"
+
+
+@pytest.mark.asyncio
+async def test_drive_list_changes_pages_until_new_start_token(drive_agent):
+    pages = [
+        {
+            "changes": [
+                {"fileId": "f1", "file": {"id": "f1", "name": "a"}},
+                {"fileId": "f2", "file": {"id": "f2", "name": "b", "trashed": True}},
+            ],
+            "nextPageToken": "p2",
+        },
+        {
+            "changes": [
+                {"fileId": "f3", "removed": True},
+                {"changeType": "drive", "driveId": "d1", "removed": False},
+            ],
+            "newStartPageToken": "99",
+        },
+    ]
+
+    with patch.object(drive_agent, "_request", new_callable=AsyncMock, side_effect=pages):
+        changed, removed, token = await drive_agent.list_changes("10")
+
+    assert [f["id"] for f in changed] == ["f1"]
+    assert removed == ["f2", "f3"]
+    assert token == "99"
+
+
+@pytest.mark.asyncio
+async def test_gcal_full_listing_stops_at_max_results(gcal_agent):
+    pages = [
+        {"items": [{"id": f"e{i}"} for i in range(250)], "nextPageToken": "p2"},
+        {"items": [{"id": "late"}], "nextSyncToken": "s1"},
+    ]
+
+    with patch.object(gcal_agent, "_request", new_callable=AsyncMock, side_effect=pages) as mock_req:
+        items, token = await gcal_agent.list_event_changes(max_results=200)
+
+    assert len(items) == 200
+    assert token is None
+    mock_req.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_gcal_search_uses_prefetched_results(gcal_agent):
+    prefetched = [{"event_id": "ev1", "title": "Acme sync"}]
+    with patch("app.agents.gcal_agent.hybrid_search_events", new_callable=AsyncMock) as mock_search:
+        results = await gcal_agent.search_events(keyword="Acme", prefetched=prefetched)
+
+    assert results == prefetched
+    mock_search.assert_not_awaited()
+
+
+def test_gcal_search_params_resolve_relative_dates(gcal_agent):
+    params = gcal_agent.search_params(keyword="Acme", date="tomorrow", attendee_email="a@acme.com")
+
+    assert params["query"] == "Acme"
+    assert params["date_to"] - params["date_from"] == timedelta(days=1)
+    assert params["attendees"] == ["a@acme.com"]
@@ -1,3 +1,4 @@
+import json
 import uuid
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -83,3 +84,75 @@ async def test_google_auth_redirect():
             resp = await client.get("/api/v1/auth/google")
             assert resp.status_code == 307
             assert "accounts.google.com" in resp.headers.get("location", "")
+
+
+@pytest.mark.asyncio
+async def test_query_stream_emits_intent_steps_tokens_and_done():
+    from datetime import datetime, timezone
+
+    from app.db.database import get_db
+    from app.schemas.query import ClassifiedIntent, StepResult
+
+    user = User(id=uuid.uuid4(), email="u@example.com")
+    request_db = AsyncMock()
+    request_db.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=user)))
+
+    async def mock_get_db():
+        yield request_db
+
+    stream_db = AsyncMock()
+    stream_db.add = MagicMock()
+    stream_db.refresh = AsyncMock(side_effect=lambda conv: setattr(conv, "created_at", datetime.now(timezone.utc)))
+    session = MagicMock()
+    session.return_value.__aenter__ = AsyncMock(return_value=stream_db)
+    session.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    intent = ClassifiedIntent(services=["gcal"], intent="search_events", steps=["search_calendar"], confidence=0.9)
+
+    class Orchestrator:
+        def __init__(self, **kwargs):
+            pass
+
+        async def execute(self, plan, on_result=None):
+            results = [StepResult(step_id="step_0", agent="gcal", action="search_events", status="success", data=[])]
+            for r in results:
+                on_result(r)
+            return results
+
+    async def tokens(query, step_results, user_timezone):
+        for chunk in ("You have ", "no events."):
+            yield "template", chunk
+
+    with patch("app.api.v1.query.rate_limit_check", new_callable=AsyncMock, return_value=True), \
+         patch("app.api.v1.query.get_valid_token", new_callable=AsyncMock, return_value="token"), \
+         patch("app.api.v1.query.get_conversation_context", new_callable=AsyncMock, return_value=[]), \
+         patch("app.api.v1.query.store_conversation_context", new_callable=AsyncMock), \
+         patch("app.api.v1.query.classify_intent", new_callable=AsyncMock, return_value=intent), \
+         patch("app.api.v1.query.ServiceOrchestrator", Orchestrator), \
+         patch("app.api.v1.query.stream_response", tokens), \
+         patch("app.api.v1.query.async_session_factory", session):
+        app.dependency_overrides[get_db] = mock_get_db
+        try:
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as client:
+                resp = await client.post(
+                    "/api/v1/query/stream",
+                    json={"query": "What's on my calendar?"},
+                    headers={"x-user-id": str(user.id)},
+                )
+        finally:
+            app.dependency_overrides.clear()
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+        for block in resp.text.strip().split("\n\n")
+    ]
+    assert [name for name, _ in events] == ["intent", "step", "token", "token", "done"]
+    assert events[0][1]["intent"] == "search_events"
+    assert events[1][1]["step_id"] == "step_0"
+    assert events[-1][1]["response"] == "You have no events."
+    assert events[-1][1]["actions_taken"][0]["detail"] == "0 result(s)"
+    assert events[-1][1]["synthesis"] == "template"
+    stream_db.commit.assert_awaited()
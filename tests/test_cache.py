@@ -0,0 +1,163 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.cache import redis_client
+from app.cache.redis_client import (
+    LocalCache,
+    cache_get_json,
+    cache_mget,
+    cache_set_json,
+    get_local_cache_stats,
+)
+
+
+def _fake_redis(get_value=None, mget_value=None):
+    fake = MagicMock()
+    fake.get = AsyncMock(return_value=get_value)
+    fake.mget = AsyncMock(return_value=mget_value or [])
+    fake.setex = AsyncMock()
+    fake.set = AsyncMock()
+    return fake
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_entries=2, ttl=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" is now the oldest
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.stats() == {"size": 2, "max_entries": 2, "hits": 2, "misses": 1, "evictions": 1}
+
+
+def test_local_cache_expires_entries():
+    cache = LocalCache(max_entries=10, ttl=60)
+    with patch("app.cache.redis_client.time.monotonic", return_value=100.0):
+        cache.set("short", "x", ttl=5)
+        cache.set("long", "y")
+    with patch("app.cache.redis_client.time.monotonic", return_value=110.0):
+        assert cache.get("short") is None
+        assert cache.get("long") == "y"
+
+
+@pytest.mark.asyncio
+async def test_repeated_intent_lookup_skips_redis():
+    fake = _fake_redis(get_value='{"services": ["gcal"]}')
+    with patch("app.cache.redis_client.get_redis", new_callable=AsyncMock, return_value=fake):
+        first = await cache_get_json("intent", "What's on my calendar next week?")
+        second = await cache_get_json("intent", "What's on my calendar next week?")
+
+    assert first == second == {"services": ["gcal"]}
+    fake.get.assert_awaited_once()
+    assert get_local_cache_stats()["intent"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_set_populates_local_cache():
+    fake = _fake_redis()
+    with patch("app.cache.redis_client.get_redis", new_callable=AsyncMock, return_value=fake):
+        await cache_set_json("intent", "q", {"services": ["gmail"]}, ttl=300)
+        assert await cache_get_json("intent", "q") == {"services": ["gmail"]}
+
+    fake.get.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_mget_only_fetches_local_misses():
+    fake = _fake_redis(mget_value=[b"v1", None, b"v3"])
+    with patch("app.cache.redis_client.get_redis_bytes", new_callable=AsyncMock, return_value=fake):
+        assert await cache_mget("emb", ["k1", "k2", "k3"], binary=True) == [b"v1", None, b"v3"]
+        fake.mget.return_value = [None]
+        assert await cache_mget("emb", ["k1", "k2", "k3"], binary=True) == [b"v1", None, b"v3"]
+
+    assert fake.mget.await_count == 2
+    assert len(fake.mget.call_args.args[0]) == 1
+
+
+@pytest.mark.asyncio
+async def test_prefix_opt_out_always_reads_redis():
+    fake = _fake_redis(get_value="x")
+    with (
+        patch.object(redis_client.settings, "l1_cache_max_entries", {"emb": 10}),
+        patch("app.cache.redis_client.get_redis", new_callable=AsyncMock, return_value=fake),
+    ):
+        await redis_client.cache_get("intent", "q")
+        await redis_client.cache_get("intent", "q")
+
+    assert fake.get.await_count == 2
+    assert "intent" not in get_local_cache_stats()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result_and_errors():
+    import asyncio
+
+    from app.cache.single_flight import _inflight, single_flight
+
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*[single_flight("emb", "same text", compute) for _ in range(4)])
+    assert results == [1, 1, 1, 1]
+    assert not _inflight
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    outcomes = await asyncio.gather(
+        single_flight("emb", "bad", fail), single_flight("emb", "bad", fail), return_exceptions=True
+    )
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    # A later call after completion runs again rather than reusing the old result.
+    assert await single_flight("emb", "same text", compute) == 2
+
+
+@pytest.mark.asyncio
+async def test_distributed_single_flight_waits_for_lock_holder():
+    from app.cache import single_flight as sf
+
+    fake = MagicMock()
+    fake.set = AsyncMock(return_value=None)  # lock held by another worker
+    fake.exists = AsyncMock(return_value=1)
+    fake.eval = AsyncMock()
+    compute = AsyncMock(return_value="mine")
+    recheck = AsyncMock(side_effect=[None, "theirs"])
+
+    with (
+        patch.object(sf.settings, "single_flight_distributed", True),
+        patch.object(sf.settings, "single_flight_poll_interval", 0),
+        patch("app.cache.single_flight.get_redis", new_callable=AsyncMock, return_value=fake),
+    ):
+        assert await sf.single_flight("intent", "q", compute, recheck) == "theirs"
+
+    compute.assert_not_awaited()
+    fake.eval.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_distributed_single_flight_releases_own_lock():
+    from app.cache import single_flight as sf
+
+    fake = MagicMock()
+    fake.set = AsyncMock(return_value=True)
+    fake.eval = AsyncMock()
+    compute = AsyncMock(return_value="mine")
+    recheck = AsyncMock(return_value=None)
+
+    with (
+        patch.object(sf.settings, "single_flight_distributed", True),
+        patch("app.cache.single_flight.get_redis", new_callable=AsyncMock, return_value=fake),
+    ):
+        assert await sf.single_flight("intent", "q", compute, recheck) == "mine"
+
+    compute.assert_awaited_once()
+    fake.eval.assert_awaited_once()
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.cache import GmailCache
+from app.services.cache_writer import upsert_cache_rows
+
+
+def _row(user_id, email_id, subject="s"):
+    return {
+        "user_id": user_id,
+        "email_id": email_id,
+        "subject": subject,
+        "sender": "a@b.com",
+        "body_preview": "",
+        "embedding": [0.0, 1.0],
+        "received_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+    }
+
+
+@pytest.mark.asyncio
+async def test_upsert_writes_page_in_one_statement(mock_db, sample_user_id):
+    rows = [_row(sample_user_id, f"m{i}") for i in range(3)]
+
+    written = await upsert_cache_rows(mock_db, GmailCache, rows)
+
+    assert written == 3
+    mock_db.execute.assert_awaited_once()
+    sql = str(mock_db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT ON CONSTRAINT uq_gmail_user_email DO UPDATE" in sql
+    set_clause = sql.split("DO UPDATE SET")[1]
+    assert "subject = excluded.subject" in set_clause
+    assert "received_at" not in set_clause
+    assert "email_id" not in set_clause
+
+
+@pytest.mark.asyncio
+async def test_upsert_dedupes_keys_and_chunks(mock_db, sample_user_id):
+    rows = [_row(sample_user_id, f"m{i}") for i in range(5)] + [_row(sample_user_id, "m0", subject="newer")]
+
+    with patch("app.services.cache_writer.settings") as mock_settings:
+        mock_settings.bulk_copy_threshold = 1000
+        mock_settings.bulk_upsert_chunk_size = 2
+        written = await upsert_cache_rows(mock_db, GmailCache, rows)
+
+    assert written == 5
+    assert mock_db.execute.await_count == 3
+    first_chunk = mock_db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()).params
+    assert first_chunk["subject_m0"] == "newer"
+
+
+@pytest.mark.asyncio
+async def test_upsert_switches_to_copy_for_backfills(mock_db, sample_user_id):
+    rows = [_row(sample_user_id, f"m{i}") for i in range(3)]
+
+    with patch("app.services.cache_writer.settings") as mock_settings, \
+         patch("app.services.cache_writer.copy_upsert_cache_rows", return_value=3) as mock_copy:
+        mock_settings.bulk_copy_threshold = 2
+        await upsert_cache_rows(mock_db, GmailCache, rows)
+
+    mock_copy.assert_awaited_once()
+    mock_db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_attach_embeddings_skips_unchanged_text(mock_db, sample_user_id):
+    from unittest.mock import AsyncMock, MagicMock
+
+    from app.services.cache_writer import attach_embeddings
+    from app.services.embedding import embedding_text_hash
+
+    rows = [_row(sample_user_id, "same"), _row(sample_user_id, "edited"), _row(sample_user_id, "new")]
+    for row in rows:
+        del row["embedding"]
+    texts = ["unchanged text", "edited text", "brand new text"]
+    mock_db.execute.return_value = MagicMock(all=MagicMock(return_value=[
+        ("same", embedding_text_hash("unchanged text")),
+        ("edited", embedding_text_hash("old text")),
+    ]))
+
+    with patch("app.services.cache_writer.generate_embeddings_batch", new_callable=AsyncMock,
+               return_value=[[0.1], [0.2]]) as mock_batch:
+        embedded = await attach_embeddings(mock_db, GmailCache, rows, texts)
+
+    assert embedded == 2
+    mock_batch.assert_awaited_once_with(["edited text", "brand new text"])
+    assert "embedding" not in rows[0]
+    assert rows[1]["embedding"] == [0.1] and rows[2]["embedding"] == [0.2]
+    assert rows[2]["content_hash"] == embedding_text_hash("brand new text")
+
+    # Unchanged rows are written separately so their stored vector is kept
+    mock_db.execute.reset_mock()
+    await upsert_cache_rows(mock_db, GmailCache, rows)
+    assert mock_db.execute.await_count == 2
@@ -0,0 +1,193 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.cache.embedding_codec import decode_embedding, encode_embedding
+from app.cache.redis_client import cache_mget, cache_mset_with_ttl
+from app.services.embedding import _cache_key, generate_embeddings_batch
+
+
+def _embedding_response(vectors):
+    resp = MagicMock()
+    resp.data = [MagicMock(embedding=v) for v in vectors]
+    return resp
+
+
+@pytest.mark.asyncio
+async def test_batch_uses_one_mget_and_one_pipelined_write():
+    texts = ["cached", "fresh a", "fresh b"]
+
+    with patch("app.services.embedding.cache_mget", new_callable=AsyncMock,
+               return_value=[json.dumps([1.0]), None, None]) as mock_mget, \
+         patch("app.services.embedding.cache_mset_with_ttl", new_callable=AsyncMock) as mock_mset, \
+         patch("app.services.embedding._get_client") as mock_client:
+        mock_client.return_value.embeddings.create = AsyncMock(return_value=_embedding_response([[2.0], [3.0]]))
+        results = await generate_embeddings_batch(texts)
+
+    assert results == [[1.0], [2.0], [3.0]]
+    mock_mget.assert_awaited_once_with("emb", [_cache_key(t) for t in texts], binary=True)
+    mock_mset.assert_awaited_once()
+    written = mock_mset.call_args.args[1]
+    assert set(written) == {_cache_key("fresh a"), _cache_key("fresh b")}
+    assert decode_embedding(written[_cache_key("fresh b")]) == [3.0]
+    assert mock_client.return_value.embeddings.create.call_args.kwargs["input"] == ["fresh a", "fresh b"]
+
+
+@pytest.mark.asyncio
+async def test_batch_fully_cached_skips_openai_and_writes():
+    with patch("app.services.embedding.cache_mget", new_callable=AsyncMock,
+               return_value=[json.dumps([1.0]), json.dumps([2.0])]), \
+         patch("app.services.embedding.cache_mset_with_ttl", new_callable=AsyncMock) as mock_mset, \
+         patch("app.services.embedding._get_client") as mock_client:
+        results = await generate_embeddings_batch(["a", "b"])
+
+    assert results == [[1.0], [2.0]]
+    mock_client.assert_not_called()
+    mock_mset.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_redis_batch_primitives_are_single_round_trips():
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    fake_redis = MagicMock()
+    fake_redis.mget = AsyncMock(return_value=["x", None])
+    fake_redis.pipeline.return_value = pipe
+
+    with patch("app.cache.redis_client.get_redis", new_callable=AsyncMock, return_value=fake_redis):
+        assert await cache_mget("emb", ["k1", "k2"]) == ["x", None]
+        await cache_mset_with_ttl("emb", {"k1": "v1", "k2": "v2"}, ttl=60)
+
+    fake_redis.mget.assert_awaited_once()
+    assert len(fake_redis.mget.call_args.args[0]) == 2
+    assert pipe.setex.call_count == 2
+    pipe.execute.assert_awaited_once()
+
+
+def test_codec_float32_roundtrip_is_exact_and_compact():
+    vector = [0.5, -1.25, 3.0, 0.0]
+    raw = encode_embedding(vector)
+    assert raw[0] == 1 and raw[1:2] == b"f"
+    assert len(raw) == 2 + 4 * len(vector)
+    assert decode_embedding(raw) == vector
+
+
+def test_codec_float16_halves_size():
+    vector = [0.5, -1.25, 3.0, 0.0]
+    raw = encode_embedding(vector, "float16")
+    assert len(raw) == 2 + 2 * len(vector)
+    assert decode_embedding(raw) == vector
+
+
+def test_codec_reads_legacy_json_entries():
+    assert decode_embedding(b"[0.1, 0.2]") == [0.1, 0.2]
+    assert decode_embedding("[0.3]") == [0.3]
+
+
+def test_codec_rejects_unknown_dtype():
+    with pytest.raises(ValueError):
+        encode_embedding([1.0], "int8")
+
+
+@pytest.mark.asyncio
+async def test_batcher_merges_window_and_dedupes_texts():
+    import asyncio
+
+    from app.services.embedding_batcher import EmbeddingBatcher
+
+    embed_many = AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+    batcher = EmbeddingBatcher(embed_many, window=0.005, max_batch_size=100)
+
+    results = await asyncio.gather(*[batcher.embed(t) for t in ["a", "bb", "a", "ccc"]])
+
+    assert results == [[1.0], [2.0], [1.0], [3.0]]
+    embed_many.assert_awaited_once_with(["a", "bb", "ccc"])
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["requests"] == 4
+    assert stats["deduplicated"] == 1
+    assert stats["batch_size_histogram"]["4"] == 1
+    assert stats["max_queue_delay_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_at_max_size_and_propagates_errors():
+    import asyncio
+
+    from app.services.embedding_batcher import EmbeddingBatcher
+
+    embed_many = AsyncMock(side_effect=RuntimeError("rate limited"))
+    batcher = EmbeddingBatcher(embed_many, window=10, max_batch_size=2)
+
+    outcomes = await asyncio.wait_for(
+        asyncio.gather(batcher.embed("x"), batcher.embed("y"), return_exceptions=True), timeout=1
+    )
+
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    embed_many.assert_awaited_once_with(["x", "y"])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_generate_embedding_shares_one_openai_call():
+    import asyncio
+
+    from app.services.embedding import generate_embedding
+
+    with patch("app.services.embedding.cache_get", new_callable=AsyncMock, return_value=None), \
+         patch("app.services.embedding.cache_mset_with_ttl", new_callable=AsyncMock) as mock_mset, \
+         patch("app.services.embedding._get_client") as mock_client:
+        mock_client.return_value.embeddings.create = AsyncMock(
+            return_value=_embedding_response([[1.0], [2.0], [3.0]])
+        )
+        results = await asyncio.gather(*[generate_embedding(t) for t in ["acme", "flight", "budget", "acme"]])
+
+    assert results == [[1.0], [2.0], [3.0], [1.0]]
+    mock_client.return_value.embeddings.create.assert_awaited_once()
+    assert mock_client.return_value.embeddings.create.call_args.kwargs["input"] == ["acme", "flight", "budget"]
+    mock_mset.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_reembed_updates_only_stale_rows(mock_db):
+    import uuid
+    from types import SimpleNamespace
+
+    from app.models.cache import GmailCache
+    from app.services.embedding import build_email_text, embedding_text_hash
+    from app.services.reembed import reembed_table
+
+    user_id = uuid.uuid4()
+    current = SimpleNamespace(id=uuid.uuid4(), user_id=user_id, subject="s", sender="a", body_preview="b")
+    current.content_hash = embedding_text_hash(build_email_text("s", "a", "b"))
+    stale = SimpleNamespace(id=uuid.uuid4(), user_id=user_id, subject="t", sender="a", body_preview="b", content_hash="old")
+    page = MagicMock()
+    page.all.return_value = [current, stale]
+    empty = MagicMock()
+    empty.all.return_value = []
+    mock_db.execute = AsyncMock(side_effect=[page, None, empty])
+
+    with patch("app.services.reembed.generate_embeddings_batch", new_callable=AsyncMock,
+               return_value=[[0.5]]) as mock_embed:
+        assert await reembed_table(mock_db, GmailCache) == 1
+
+    mock_embed.assert_awaited_once_with([build_email_text("t", "a", "b")])
+    updates = mock_db.execute.call_args_list[1].args[1]
+    assert updates == [{"id": stale.id, "user_id": user_id, "embedding": [0.5],
+                        "content_hash": embedding_text_hash(build_email_text("t", "a", "b"))}]
+    mock_db.commit.assert_awaited_once()
+
+
+def test_reembed_event_text_matches_sync_for_mixed_case_attendees():
+    from types import SimpleNamespace
+
+    from app.models.cache import GCalCache
+    from app.services.embedding import build_event_text
+    from app.services.reembed import REEMBED_SOURCES
+
+    # Sync builds the text from the API's emails; the row stores them lower-cased
+    synced = build_event_text("Review", "Q4", ["Sam@Acme.com", "kim@acme.com"])
+    row = SimpleNamespace(title="Review", description="Q4",
+                          attendees={"list": [{"email": "sam@acme.com"}, {"email": "kim@acme.com"}]})
+    _, build_text = REEMBED_SOURCES[GCalCache]
+    assert build_text(row) == synced
@@ -0,0 +1,73 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.services import http_client
+from app.services.http_client import (
+    close_http_client,
+    get_http_client,
+    get_pool_stats,
+    pooled_request,
+    reset_pool_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    http_client._client = None
+    http_client._host_limits.clear()
+    reset_pool_stats()
+    yield
+    http_client._client = None
+    http_client._host_limits.clear()
+    reset_pool_stats()
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared_within_loop():
+    first = await get_http_client()
+    second = await get_http_client()
+    assert first is second
+
+
+@pytest.mark.asyncio
+async def test_closed_client_is_recreated():
+    first = await get_http_client()
+    await close_http_client()
+    second = await get_http_client()
+    assert first is not second
+    assert not second.is_closed
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_count_reused_connections():
+    async def fake_send(self, request):
+        # Simulate one TCP connect for the first request only
+        trace = request.extensions["trace"]
+        if get_pool_stats()["requests"] == 1:
+            await trace("connection.connect_tcp.complete", {})
+        return httpx.Response(200, request=request, json={})
+
+    with patch("httpx.AsyncClient._send_single_request", new=fake_send):
+        for _ in range(4):
+            resp = await pooled_request("GET", "https://www.googleapis.com/gmail/v1/users/me/messages")
+            assert resp.status_code == 200
+
+    stats = get_pool_stats()
+    assert stats["requests"] == 4
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 3
+    assert stats["reuse_ratio"] == 0.75
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit_is_created_per_host():
+    async def fake_send(self, request):
+        return httpx.Response(200, request=request, json={})
+
+    with patch("httpx.AsyncClient._send_single_request", new=fake_send):
+        await pooled_request("GET", "https://www.googleapis.com/drive/v3/files")
+        await pooled_request("POST", "https://oauth2.googleapis.com/token")
+
+    assert set(http_client._host_limits) == {"www.googleapis.com", "oauth2.googleapis.com"}
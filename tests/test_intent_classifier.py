@@ -3,9 +3,17 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from app.core import intent_classifier
 from app.schemas.query import ClassifiedIntent
 
 
+@pytest.fixture(autouse=True)
+def llm_path():
+    # These tests exercise the LLM classifier; the local rules have their own tests below
+    with patch.object(intent_classifier.settings, "intent_rules_enabled", False):
+        yield
+
+
 @pytest.fixture
 def mock_openai_response():
     def _make(content: dict):
@@ -113,3 +121,113 @@ async def test_classify_uses_cache():
 
         assert result.services == ["gmail"]
         assert result.intent == "search_emails"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_queries_share_one_llm_call(mock_openai_response):
+    import asyncio
+
+    intent_data = {
+        "services": ["gcal"],
+        "intent": "search_events",
+        "entities": {},
+        "steps": ["search_calendar_events_next_week"],
+        "ambiguities": [],
+        "confidence": 0.95,
+    }
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.01)
+        return mock_openai_response(intent_data)
+
+    with patch("app.core.intent_classifier._get_client") as mock_client, \
+         patch("app.core.intent_classifier.cache_get_json", return_value=None), \
+         patch("app.core.intent_classifier.cache_set_json", new_callable=AsyncMock) as mock_set:
+        mock_client.return_value.chat.completions.create = AsyncMock(side_effect=slow_create)
+
+        from app.core.intent_classifier import classify_intent
+        results = await asyncio.gather(*[classify_intent("What's on my calendar next week?") for _ in range(5)])
+
+        assert all(r.intent == "search_events" for r in results)
+        assert mock_client.return_value.chat.completions.create.await_count == 1
+        mock_set.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_formulaic_query_is_classified_without_the_llm():
+    with patch.object(intent_classifier.settings, "intent_rules_enabled", True), \
+         patch("app.core.intent_classifier._get_client") as mock_client, \
+         patch("app.core.intent_classifier.cache_get_json", new_callable=AsyncMock) as mock_cache:
+        result = await intent_classifier.classify_intent("What's on my calendar tomorrow?")
+
+    mock_client.assert_not_called()
+    mock_cache.assert_not_awaited()
+    assert result.services == ["gcal"]
+    assert result.steps == ["search_calendar_events"]
+    assert result.confidence >= 0.9
+    assert intent_classifier.get_intent_stats()["rules"] >= 1
+
+
+def test_rules_extract_entities():
+    from datetime import date
+
+    from app.core.intent_rules import classify_with_rules
+
+    wednesday = date(2026, 2, 25)
+    emails = classify_with_rules("Find emails from sarah@company.com about the budget from last month", today=wednesday)
+    assert emails.intent == "search_emails"
+    assert emails.entities == {
+        "sender": "sarah@company.com",
+        "keyword": "budget",
+        "date_range": {"from": "2026-01-01", "to": "2026-02-01"},
+    }
+    files = classify_with_rules("Show me PDFs in Drive from last month", today=wednesday)
+    assert files.entities["mime_type"] == "application/pdf"
+    events = classify_with_rules("What's on my calendar next week where john@company.com is invited?", today=wednesday)
+    assert events.entities == {
+        "attendee_email": "john@company.com",
+        "date_range": {"from": "2026-03-02", "to": "2026-03-09"},
+    }
+    assert classify_with_rules("Next Tuesday", today=wednesday).entities["date_range"] == {
+        "from": "2026-03-03", "to": "2026-03-04",
+    }
+
+
+def test_calendar_month_without_year_means_the_next_one():
+    from datetime import date
+
+    from app.core.intent_rules import classify_with_rules
+
+    october = date(2026, 10, 16)
+
+    def date_range(query):
+        return classify_with_rules(query, today=october).entities["date_range"]
+
+    assert date_range("What's on my calendar in May") == {"from": "2027-05-01", "to": "2027-06-01"}
+    assert date_range("Meetings on March 5") == {"from": "2027-03-05", "to": "2027-03-06"}
+    assert date_range("What's on my calendar in October") == {"from": "2026-10-01", "to": "2026-11-01"}
+    assert date_range("What's on my calendar in November") == {"from": "2026-11-01", "to": "2026-12-01"}
+    # Emails and files look back, so the month stays in this year
+    assert date_range("Emails from May") == {"from": "2026-05-01", "to": "2026-06-01"}
+
+
+@pytest.mark.parametrize("query", [
+    "That email about the proposal",
+    "Move the meeting with John",
+    "Cancel my Turkish Airlines flight",
+    "Find events next week that conflict with my out-of-office doc",
+    "Delete all my meetings for today",
+    "Show my sent emails",
+    "Emails I received yesterday",
+    "What files have I got about the launch",
+])
+def test_rules_defer_everything_else(query):
+    from app.core.intent_rules import classify_with_rules
+
+    assert classify_with_rules(query) is None
+
+
+def test_bare_date_defers_when_it_may_answer_a_question():
+    from app.core.intent_rules import classify_with_rules
+
+    assert classify_with_rules("Next Tuesday", conversation_context=["Move the meeting with John"]) is None
@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 from unittest.mock import AsyncMock, patch, MagicMock
 
@@ -7,6 +8,16 @@ from app.core.orchestrator import ServiceOrchestrator
 from app.schemas.query import ExecutionPlan, ExecutionStep
 
 
+@pytest.fixture(autouse=True)
+def mock_query_embeddings():
+    with patch(
+        "app.core.orchestrator.generate_embeddings_batch",
+        new_callable=AsyncMock,
+        side_effect=lambda texts: [[float(i)] for i in range(len(texts))],
+    ) as mock_batch:
+        yield mock_batch
+
+
 @pytest.mark.asyncio
 async def test_execute_single_step(mock_db, sample_user_id, sample_access_token):
     plan = ExecutionPlan(
@@ -126,3 +137,291 @@ async def test_execute_sequential_steps_pass_context(mock_db, sample_user_id, sa
 
         assert len(results) == 2
         assert results[0].status == "success"
+
+
+@pytest.mark.asyncio
+async def test_search_queries_embedded_once_per_plan(
+    mock_db, sample_user_id, sample_access_token, mock_query_embeddings
+):
+    plan = ExecutionPlan(
+        steps=[
+            ExecutionStep(id="step_0", agent="gmail", action="search_emails", params={"keyword": "Acme"}),
+            ExecutionStep(id="step_1", agent="gcal", action="search_events", params={"keyword": "Acme"}),
+            ExecutionStep(id="step_2", agent="drive", action="search_files", params={"keyword": "budget"}),
+            ExecutionStep(id="step_3", agent="gmail", action="get_email", params={"email_id": "1"}),
+        ],
+        parallel_groups=[["step_0", "step_1", "step_2", "step_3"]],
+    )
+    agents = {name: AsyncMock() for name in ("gmail", "gcal", "drive")}
+    for agent in agents.values():
+        agent.execute_action = AsyncMock(return_value=[])
+
+    with patch("app.core.orchestrator.GmailAgent"), \
+         patch("app.core.orchestrator.GCalAgent"), \
+         patch("app.core.orchestrator.DriveAgent"):
+        orchestrator = ServiceOrchestrator(sample_user_id, sample_access_token, mock_db)
+        orchestrator.agents = agents
+        await orchestrator.execute(plan)
+
+    mock_query_embeddings.assert_awaited_once_with(["Acme", "budget"])
+    gmail_calls = {c.args[0]: c.args[1] for c in agents["gmail"].execute_action.call_args_list}
+    assert gmail_calls["search_emails"]["query_embedding"] == [0.0]
+    assert "query_embedding" not in gmail_calls["get_email"]
+    assert agents["gcal"].execute_action.call_args.args[1]["query_embedding"] == [0.0]
+    assert agents["drive"].execute_action.call_args.args[1]["query_embedding"] == [1.0]
+
+
+@pytest.mark.asyncio
+async def test_precompute_failure_falls_back_to_per_step(
+    mock_db, sample_user_id, sample_access_token, mock_query_embeddings
+):
+    mock_query_embeddings.side_effect = RuntimeError("openai down")
+    plan = ExecutionPlan(
+        steps=[ExecutionStep(id="step_0", agent="gmail", action="search_emails", params={"keyword": "flight"})],
+        parallel_groups=[["step_0"]],
+    )
+    mock_gmail = AsyncMock()
+    mock_gmail.execute_action = AsyncMock(return_value=[])
+
+    with patch("app.core.orchestrator.GmailAgent"), \
+         patch("app.core.orchestrator.GCalAgent"), \
+         patch("app.core.orchestrator.DriveAgent"):
+        orchestrator = ServiceOrchestrator(sample_user_id, sample_access_token, mock_db)
+        orchestrator.agents = {"gmail": mock_gmail}
+        results = await orchestrator.execute(plan)
+
+    assert results[0].status == "success"
+    assert "query_embedding" not in mock_gmail.execute_action.call_args.args[1]
+
+
+@pytest.mark.asyncio
+async def test_search_batch_served_by_one_combined_query(mock_db, sample_user_id, sample_access_token):
+    plan = ExecutionPlan(
+        steps=[
+            ExecutionStep(id="step_0", agent="gmail", action="search_emails", params={"keyword": "Acme"}),
+            ExecutionStep(id="step_1", agent="drive", action="search_files", params={"keyword": "Acme"}),
+        ],
+        parallel_groups=[["step_0", "step_1"]],
+        search_batches=[["step_0", "step_1"]],
+    )
+    agents = {name: AsyncMock() for name in ("gmail", "drive")}
+    for name, agent in agents.items():
+        agent.search_params = MagicMock(return_value={"query": "Acme", "limit": 5})
+        agent.execute_action = AsyncMock(return_value=[])
+    grouped = {"gmail": [{"email_id": "e1"}], "drive": []}
+
+    with patch("app.core.orchestrator.GmailAgent"), \
+         patch("app.core.orchestrator.GCalAgent"), \
+         patch("app.core.orchestrator.DriveAgent"), \
+         patch("app.core.orchestrator.hybrid_search_all", new_callable=AsyncMock, return_value=grouped) as mock_all:
+        orchestrator = ServiceOrchestrator(sample_user_id, sample_access_token, mock_db)
+        orchestrator.agents = agents
+        results = await orchestrator.execute(plan)
+
+    mock_all.assert_awaited_once()
+    assert set(mock_all.call_args.args[2]) == {"gmail", "drive"}
+    assert agents["gmail"].execute_action.call_args.args[1]["prefetched"] == [{"email_id": "e1"}]
+    assert agents["drive"].execute_action.call_args.args[1]["prefetched"] == []
+    assert all(r.status == "success" for r in results)
+
+
+@pytest.mark.asyncio
+async def test_search_batch_with_invalid_date_falls_back_to_per_step(mock_db, sample_user_id, sample_access_token):
+    plan = ExecutionPlan(
+        steps=[
+            ExecutionStep(id="step_0", agent="gmail", action="search_emails",
+                          params={"keyword": "Acme", "date_from": "next week"}),
+            ExecutionStep(id="step_1", agent="drive", action="search_files", params={"keyword": "Acme"}),
+        ],
+        parallel_groups=[["step_0", "step_1"]],
+        search_batches=[["step_0", "step_1"]],
+    )
+    orchestrator = ServiceOrchestrator(sample_user_id, sample_access_token, mock_db)
+
+    with patch.object(orchestrator.agents["gmail"], "execute_action", new_callable=AsyncMock,
+                      side_effect=ValueError("Invalid isoformat string: 'next week'")), \
+         patch.object(orchestrator.agents["drive"], "execute_action", new_callable=AsyncMock,
+                      return_value=[]) as drive_action, \
+         patch("app.core.orchestrator.hybrid_search_all", new_callable=AsyncMock) as mock_all:
+        results = await orchestrator.execute(plan)
+
+    mock_all.assert_not_awaited()
+    assert [r.status for r in results] == ["failed", "success"]
+    assert "next week" in results[0].error
+    assert "prefetched" not in drive_action.call_args.args[1]
+
+
+@pytest.mark.asyncio
+async def test_failed_prefetch_task_does_not_abort_the_plan(mock_db, sample_user_id, sample_access_token):
+    plan = ExecutionPlan(
+        steps=[
+            ExecutionStep(id="step_0", agent="gmail", action="search_emails", params={"keyword": "Acme"}),
+            ExecutionStep(id="step_1", agent="drive", action="search_files", params={"keyword": "Acme"}),
+        ],
+        parallel_groups=[["step_0", "step_1"]],
+        search_batches=[["step_0", "step_1"]],
+    )
+    agents = {name: MagicMock(execute_action=AsyncMock(return_value=[])) for name in ("gmail", "drive")}
+
+    with patch.object(ServiceOrchestrator, "_prefetch_searches", new_callable=AsyncMock,
+                      side_effect=RuntimeError("boom")):
+        orchestrator = ServiceOrchestrator(sample_user_id, sample_access_token, mock_db)
+        orchestrator.agents = agents
+        results = await orchestrator.execute(plan)
+
+    assert [r.status for r in results] == ["success", "success"]
+    assert "prefetched" not in agents["gmail"].execute_action.call_args.args[1]
+
+
+@pytest.mark.asyncio
+async def test_parallel_steps_get_their_own_sessions(mock_db, sample_user_id, sample_access_token):
+    from app.agents.gmail_agent import GmailAgent
+    from app.db.database import current_session
+
+    plan = ExecutionPlan(
+        steps=[
+            ExecutionStep(id="step_0", agent="gmail", action="search_emails", params={"keyword": "Acme"}),
+            ExecutionStep(id="step_1", agent="gcal", action="search_events", params={"keyword": "Acme"}),
+        ],
+        parallel_groups=[["step_0", "step_1"]],
+    )
+    opened = []
+
+    class Session:
+        async def __aenter__(self):
+            opened.append(self)
+            return self
+
+        async def __aexit__(self, *exc):
+            self.closed = True
+
+    seen = {}
+
+    def agent(name):
+        async def execute_action(action, params):
+            await asyncio.sleep(0)  # let the sibling step start
+            seen[name] = current_session.get()
+            return []
+        return MagicMock(execute_action=execute_action)
+
+    with patch("app.db.database.async_session_factory", side_effect=Session):
+        orchestrator = ServiceOrchestrator(sample_user_id, sample_access_token, mock_db)
+        orchestrator.agents = {"gmail": agent("gmail"), "gcal": agent("gcal")}
+        results = await orchestrator.execute(plan)
+
+    assert all(r.status == "success" for r in results)
+    assert len(opened) == 2 and all(s.closed for s in opened)
+    assert seen["gmail"] is not seen["gcal"]
+    assert current_session.get() is None
+    # Outside a step, agents use the request session
+    assert GmailAgent(sample_access_token, sample_user_id, mock_db).db is mock_db
+
+
+@pytest.mark.asyncio
+async def test_overlapping_search_batches_use_their_own_sessions(mock_db, sample_user_id, sample_access_token):
+    # step_2 finishes while the first batch is still searching, which releases the second batch
+    plan = ExecutionPlan(
+        steps=[
+            ExecutionStep(id="step_0", agent="gmail", action="search_emails", params={"keyword": "Acme"}),
+            ExecutionStep(id="step_1", agent="drive", action="search_files", params={"keyword": "Acme"}),
+            ExecutionStep(id="step_2", agent="gcal", action="get_event", params={}),
+            ExecutionStep(id="step_3", agent="gmail", action="search_emails", params={"keyword": "Q4"},
+                          depends_on=["step_2"]),
+            ExecutionStep(id="step_4", agent="drive", action="search_files", params={"keyword": "Q4"},
+                          depends_on=["step_2"]),
+        ],
+        parallel_groups=[["step_0", "step_1", "step_2"], ["step_3", "step_4"]],
+        search_batches=[["step_0", "step_1"], ["step_3", "step_4"]],
+    )
+    agents = {name: AsyncMock() for name in ("gmail", "drive", "gcal")}
+    for agent in agents.values():
+        agent.search_params = MagicMock(side_effect=lambda **params: params)
+        agent.execute_action = AsyncMock(return_value=[])
+
+    class Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            self.closed = True
+
+    calls, active, overlapped = [], set(), []
+
+    async def combined_search(db, user_id, searches, **kwargs):
+        calls.append(db)
+        overlapped.append(bool(active))
+        active.add(db)
+        await asyncio.sleep(0.05 if len(calls) == 1 else 0)
+        active.discard(db)
+        return {agent: [] for agent in searches}
+
+    with patch("app.db.database.async_session_factory", side_effect=Session), \
+         patch("app.core.orchestrator.hybrid_search_all", combined_search):
+        orchestrator = ServiceOrchestrator(sample_user_id, sample_access_token, mock_db)
+        orchestrator.agents = agents
+        results = await orchestrator.execute(plan)
+
+    assert all(r.status == "success" for r in results)
+    assert overlapped == [False, True]
+    assert calls[0] is not calls[1]
+    assert mock_db not in calls
+    assert all(db.closed for db in calls)
+
+
+def _recording_agent(log: list[str], delays: dict[str, float]):
+    async def execute_action(action, params):
+        step_id = params["step"]
+        log.append(f"start {step_id}")
+        await asyncio.sleep(delays.get(step_id, 0))
+        log.append(f"end {step_id}")
+        return [step_id]
+    return MagicMock(execute_action=execute_action)
+
+
+def _step(step_id: str, agent: str, action: str = "get_email", depends_on: list[str] | None = None) -> ExecutionStep:
+    return ExecutionStep(id=step_id, agent=agent, action=action, params={"step": step_id}, depends_on=depends_on or [])
+
+
+@pytest.mark.asyncio
+async def test_step_starts_when_its_own_dependencies_finish(mock_db, sample_user_id, sample_access_token):
+    # Layered execution would hold step_2 until the slow calendar search in its layer finished
+    plan = ExecutionPlan(
+        steps=[_step("step_0", "drive"), _step("step_1", "gcal"), _step("step_2", "drive", depends_on=["step_0"])],
+        parallel_groups=[["step_0", "step_1"], ["step_2"]],
+    )
+    log: list[str] = []
+    agent = _recording_agent(log, {"step_1": 0.05})
+
+    orchestrator = ServiceOrchestrator(sample_user_id, sample_access_token, mock_db)
+    orchestrator.agents = {"drive": agent, "gcal": agent}
+    results = await orchestrator.execute(plan)
+
+    assert log.index("end step_2") < log.index("end step_1")
+    assert [r.step_id for r in results] == ["step_0", "step_1", "step_2"]
+    assert results[2].data == ["step_2"]
+    assert results[1].run_ms >= 50
+    assert all(r.queue_ms is not None for r in results)
+
+
+@pytest.mark.asyncio
+async def test_agent_limit_runs_critical_path_first(mock_db, sample_user_id, sample_access_token):
+    from app.core import orchestrator as orchestrator_module
+
+    plan = ExecutionPlan(
+        steps=[
+            _step("step_0", "gmail"),
+            _step("step_1", "gmail"),
+            _step("step_2", "gmail", depends_on=["step_1"]),
+        ],
+        parallel_groups=[["step_0", "step_1"], ["step_2"]],
+    )
+    log: list[str] = []
+
+    with patch.object(orchestrator_module.settings, "orchestrator_agent_concurrency", {"gmail": 1}):
+        orchestrator = ServiceOrchestrator(sample_user_id, sample_access_token, mock_db)
+        orchestrator.agents = {"gmail": _recording_agent(log, {})}
+        results = await orchestrator.execute(plan)
+
+    # One gmail step at a time, and step_1 goes first because step_2 waits on it
+    assert log == ["start step_1", "end step_1", "start step_0", "end step_0", "start step_2", "end step_2"]
+    assert results[0].queue_ms > 0
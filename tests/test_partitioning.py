@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.db import partitioning, vector_index
+from app.models.cache import GCalCache
+from app.models.conversation import Conversation
+
+
+def _conn(partitions=(), counts=(0,)):
+    """Sync connection mock: partition lookups return ``partitions``, counts come from ``counts`` in order."""
+    counts = iter(counts)
+    conn = MagicMock()
+
+    def execute(stmt, params=None):
+        sql = str(stmt)
+        result = MagicMock()
+        if "pg_inherits" in sql:
+            result.scalars.return_value = list(partitions)
+        elif "count(*)" in sql:
+            result.scalar_one.return_value = next(counts)
+        else:
+            result.scalars.return_value.all.return_value = []
+        return result
+
+    conn.execute.side_effect = execute
+    return conn
+
+
+def _statements(conn) -> list[str]:
+    return [" ".join(str(c.args[0]).split()) for c in conn.execute.call_args_list]
+
+
+def test_models_are_hash_partitioned_with_user_in_primary_key():
+    for table in (GCalCache.__table__, Conversation.__table__):
+        assert table.dialect_options["postgresql"]["partition_by"] == "HASH (user_id)"
+        assert table.primary_key.columns.keys() == ["id", "user_id"]
+
+
+def test_partitions_ddl():
+    assert partitioning.partitions_ddl("gmail_cache", 2) == [
+        "CREATE TABLE IF NOT EXISTS gmail_cache_p0 PARTITION OF gmail_cache FOR VALUES WITH (MODULUS 2, REMAINDER 0)",
+        "CREATE TABLE IF NOT EXISTS gmail_cache_p1 PARTITION OF gmail_cache FOR VALUES WITH (MODULUS 2, REMAINDER 1)",
+    ]
+
+
+def test_create_shadow_builds_partitioned_copy_with_trigger():
+    conn = _conn()
+    assert partitioning.create_shadow(conn, GCalCache.__table__, 4) == "gcal_cache_repart"
+
+    sql = _statements(conn)
+    assert any("CREATE TABLE gcal_cache_repart (LIKE gcal_cache" in s and "PARTITION BY HASH (user_id)" in s for s in sql)
+    assert sum("PARTITION OF gcal_cache_repart" in s for s in sql) == 4
+    assert "ALTER TABLE gcal_cache_repart ADD CONSTRAINT gcal_cache_pkey_repart PRIMARY KEY (id, user_id)" in sql
+    assert "ALTER TABLE gcal_cache_repart ADD CONSTRAINT uq_gcal_user_event_repart UNIQUE (user_id, event_id)" in sql
+    assert ("CREATE INDEX ix_gcal_attendees_repart ON gcal_cache_repart USING gin (attendees jsonb_path_ops)"
+            in sql)
+    # The ANN index is built after the backfill, per partition
+    assert not any("ix_gcal_embedding" in s for s in sql)
+    assert any(s.startswith("CREATE TRIGGER gcal_cache_repart_sync AFTER INSERT OR UPDATE OR DELETE ON gcal_cache")
+               for s in sql)
+
+
+def test_swap_refuses_when_shadow_is_behind():
+    conn = _conn(counts=(10, 9))
+    with pytest.raises(RuntimeError):
+        partitioning.swap_shadow(conn, GCalCache.__table__)
+    assert not any(s.startswith("DROP TABLE") for s in _statements(conn))
+
+
+def test_swap_renames_shadow_and_partitions():
+    conn = _conn(partitions=["gcal_cache_repart_p0", "gcal_cache_repart_p1"], counts=(5, 5))
+    partitioning.swap_shadow(conn, GCalCache.__table__)
+
+    sql = _statements(conn)
+    assert sql.index("DROP TABLE gcal_cache") < sql.index("ALTER TABLE gcal_cache_repart RENAME TO gcal_cache")
+    assert "ALTER TABLE gcal_cache_repart_p1 RENAME TO gcal_cache_p1" in sql
+
+
+def test_vector_index_is_sized_per_partition():
+    conn = _conn(partitions=["gmail_cache_p0", "gmail_cache_p1"], counts=(50_000, 2_000_000))
+    with patch.object(vector_index.settings, "vector_index_type", "ivfflat"), \
+         patch.object(vector_index.settings, "ivfflat_lists", 0):
+        vector_index.create_vector_index(conn, "gmail_cache", "ix_gmail_embedding")
+
+    sql = _statements(conn)
+    assert any(s.startswith("CREATE INDEX ix_gmail_embedding ON ONLY gmail_cache") for s in sql)
+    assert any(s.startswith("CREATE INDEX ix_gmail_embedding_p0 ON gmail_cache_p0") and "lists = 50" in s for s in sql)
+    assert any(s.startswith("CREATE INDEX ix_gmail_embedding_p1 ON gmail_cache_p1") and "lists = 1414" in s for s in sql)
+    assert "ALTER INDEX ix_gmail_embedding ATTACH PARTITION ix_gmail_embedding_p1" in sql
@@ -91,3 +91,30 @@ def test_plan_with_date_entities():
 
     assert plan.steps[0].params.get("date_from") == "2026-01-01"
     assert plan.steps[0].params.get("date_to") == "2026-01-31"
+
+
+def test_sibling_searches_batched_per_parallel_group():
+    intent = ClassifiedIntent(
+        services=["gmail", "gcal"],
+        intent="cancel_flight",
+        entities={"airline": "Turkish Airlines"},
+        steps=["search_gmail_for_booking", "find_calendar_event", "extract_booking_reference", "draft_cancellation_email"],
+        ambiguities=[],
+        confidence=0.9,
+    )
+    plan = build_execution_plan(intent)
+
+    # Only the first layer has searches on more than one service
+    assert plan.search_batches == [["step_0", "step_1"]]
+
+
+def test_single_service_plan_has_no_search_batch():
+    intent = ClassifiedIntent(
+        services=["gmail"],
+        intent="search_emails",
+        entities={"keyword": "budget"},
+        steps=["search_emails", "search_gmail"],
+        ambiguities=[],
+        confidence=0.9,
+    )
+    assert build_execution_plan(intent).search_batches == []
@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core import response_synthesizer
+from app.core.response_synthesizer import get_synthesis_stats, stream_response, synthesize_response
+from app.core.response_templates import render_template
+from app.schemas.query import StepResult
+
+
+def _result(action: str, data, agent: str = "gcal", status: str = "success") -> StepResult:
+    return StepResult(step_id="step_0", agent=agent, action=action, status=status, data=data)
+
+
+@pytest.fixture
+def llm():
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=MagicMock(
+        choices=[MagicMock(message=MagicMock(content="LLM answer"))]
+    ))
+    with patch("app.core.response_synthesizer._get_client", return_value=client):
+        yield client.chat.completions.create
+
+
+@pytest.mark.asyncio
+async def test_single_search_is_rendered_without_the_llm(llm):
+    events = [{"title": "Standup", "start_time": datetime(2026, 3, 2, 9, 30, tzinfo=timezone.utc),
+               "end_time": datetime(2026, 3, 2, 10, 0, tzinfo=timezone.utc), "location": "Room 1"}]
+    before = get_synthesis_stats()["template"]
+
+    text, actions, path = await synthesize_response("What's on Monday?", [_result("search_events", events)])
+
+    llm.assert_not_called()
+    assert text == "✓ Found 1 calendar event:\n- Standup — Mon, Mar 2, 9:30 AM–10:00 AM UTC — Room 1"
+    assert actions[0].detail == "1 result(s)"
+    assert path == "template"
+    assert get_synthesis_stats()["template"] == before + 1
+
+
+@pytest.mark.asyncio
+async def test_template_times_are_shown_in_the_user_timezone(llm):
+    # Cached times are UTC: 02:00 UTC on Mar 3 is still Mar 2 in Los Angeles
+    events = [{"title": "Launch", "start_time": "2026-03-03T02:00:00+00:00", "end_time": "2026-03-03T03:00:00+00:00"},
+              {"title": "Offsite", "start_time": "2026-03-04", "end_time": "2026-03-05"}]
+    emails = [{"subject": "Late", "sender": "a@b.com", "received_at": datetime(2026, 3, 3, 1, 0, tzinfo=timezone.utc)}]
+
+    text, _, _ = await synthesize_response("q", [_result("search_events", events)], "America/Los_Angeles")
+
+    assert text == ("✓ Found 2 calendar events:\n"
+                    "- Launch — Mon, Mar 2, 6:00 PM–7:00 PM PST\n"
+                    "- Offsite — Wed, Mar 4")
+    assert render_template([_result("search_emails", emails, agent="gmail")], "America/Los_Angeles") == (
+        "✓ Found 1 email:\n- Late — from a@b.com — Mon, Mar 2"
+    )
+    # An unknown zone falls back to UTC
+    assert "Tue, Mar 3, 2:00 AM–3:00 AM UTC" in render_template([_result("search_events", events)], "Mars/Base")
+
+
+@pytest.mark.asyncio
+async def test_multi_step_plans_go_to_the_llm(llm):
+    results = [_result("search_events", []), _result("search_emails", [], agent="gmail")]
+
+    text, _, path = await synthesize_response("q", results)
+
+    llm.assert_awaited_once()
+    assert text == "LLM answer"
+    assert path == "llm"
+
+
+@pytest.mark.asyncio
+async def test_templates_can_be_disabled(llm):
+    with patch.object(response_synthesizer.settings, "synthesis_templates_enabled", False):
+        await synthesize_response("q", [_result("search_events", [])])
+    llm.assert_awaited_once()
+
+
+def test_write_and_edge_templates():
+    assert render_template([_result("draft_email", {"to": "hr@company.com", "subject": "Vacation", "status": "drafted"},
+                                    agent="gmail")]) == (
+        '✓ Drafted an email to hr@company.com with the subject "Vacation".\nWould you like me to send it?'
+    )
+    emails = [{"subject": "Budget", "sender": "sarah@company.com", "date": "Mon, 2 Mar 2026 10:00:00 +0000"}]
+    assert render_template([_result("search_emails", emails, agent="gmail")]) == (
+        "✓ Found 1 email:\n- Budget — from sarah@company.com — Mon, Mar 2"
+    )
+    assert render_template([_result("search_files", [], agent="drive")]) == "⚠ I couldn't find any matching files."
+    # No template for this action, and failed steps never use one
+    assert render_template([_result("get_email", {"subject": "x"}, agent="gmail")]) is None
+
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_the_path_it_took(llm):
+    failed = [chunk async for chunk in stream_response("q", [_result("search_events", None, status="failed")])]
+    templated = [chunk async for chunk in stream_response("q", [_result("search_files", [], agent="drive")])]
+
+    llm.assert_not_called()
+    assert [path for path, _ in failed] == ["failed"]
+    assert templated == [("template", "⚠ I couldn't find any matching files.")]
@@ -0,0 +1,160 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from app.agents.gmail_agent import GmailAgent
+from app.workers.tasks import _sync_gmail
+
+
+def _message(email_id: str) -> dict:
+    return {"email_id": email_id, "subject": f"Subject {email_id}", "sender": "a@b.com", "snippet": "hi"}
+
+
+@pytest.fixture(autouse=True)
+def mock_invalidate():
+    with patch("app.services.user_vector_index.invalidate_user_index", new_callable=AsyncMock) as mock:
+        yield mock
+
+
+@pytest.fixture
+def sync_db(mock_db):
+    mock_db.execute.return_value = MagicMock(scalar_one_or_none=MagicMock(return_value=None))
+    return mock_db
+
+
+@pytest.mark.asyncio
+async def test_gmail_sync_uses_history_when_token_stored(sync_db, sample_user_id, sample_access_token,
+                                                          mock_invalidate):
+    status = MagicMock(sync_token="500")
+
+    with patch("app.workers.tasks._get_sync_status", new_callable=AsyncMock, return_value=status), \
+         patch("app.workers.tasks._update_sync_status", new_callable=AsyncMock) as mock_update, \
+         patch.object(GmailAgent, "list_history", new_callable=AsyncMock, return_value=(["m2"], ["m1"], "510")), \
+         patch.object(GmailAgent, "list_message_ids", new_callable=AsyncMock) as mock_list, \
+         patch.object(GmailAgent, "get_emails", new_callable=AsyncMock, return_value=[_message("m2")]) as mock_get, \
+         patch("app.services.cache_writer.attach_embeddings", new_callable=AsyncMock) as mock_attach, \
+         patch("app.services.cache_writer.upsert_cache_rows", new_callable=AsyncMock) as mock_upsert:
+        await _sync_gmail(sync_db, sample_user_id, sample_access_token)
+
+    mock_list.assert_not_called()
+    mock_get.assert_awaited_once_with(["m2"])
+    assert len(mock_attach.call_args.args[3]) == 1
+    # only the DELETE for m1 goes through the session directly
+    assert sync_db.execute.await_count == 1
+    assert [r["email_id"] for r in mock_upsert.call_args.args[2]] == ["m2"]
+    assert mock_update.call_args.kwargs["sync_token"] == "510"
+    mock_invalidate.assert_awaited_once_with(sample_user_id, "gmail")
+
+
+@pytest.mark.asyncio
+async def test_gmail_sync_full_resync_when_history_expired(sync_db, sample_user_id, sample_access_token):
+    status = MagicMock(sync_token="1")
+    expired = httpx.HTTPStatusError(
+        "not found",
+        request=httpx.Request("GET", "https://www.googleapis.com/gmail/v1/users/me/history"),
+        response=httpx.Response(404),
+    )
+
+    with patch("app.workers.tasks._get_sync_status", new_callable=AsyncMock, return_value=status), \
+         patch("app.workers.tasks._update_sync_status", new_callable=AsyncMock) as mock_update, \
+         patch.object(GmailAgent, "list_history", new_callable=AsyncMock, side_effect=expired), \
+         patch.object(GmailAgent, "get_history_id", new_callable=AsyncMock, return_value="900"), \
+         patch.object(GmailAgent, "list_message_ids", new_callable=AsyncMock, return_value=["m1", "m2"]), \
+         patch.object(GmailAgent, "get_emails", new_callable=AsyncMock,
+                      return_value=[_message("m1"), _message("m2")]), \
+         patch("app.services.cache_writer.attach_embeddings", new_callable=AsyncMock), \
+         patch("app.services.cache_writer.upsert_cache_rows", new_callable=AsyncMock) as mock_upsert:
+        await _sync_gmail(sync_db, sample_user_id, sample_access_token)
+
+    assert len(mock_upsert.call_args.args[2]) == 2
+    assert mock_update.call_args.kwargs["sync_token"] == "900"
+
+
+@pytest.mark.asyncio
+async def test_gmail_sync_keeps_cursor_when_batch_item_rate_limited(sync_db, sample_user_id, sample_access_token):
+    batch = httpx.Response(
+        200,
+        headers={"Content-Type": "multipart/mixed; boundary=resp"},
+        content=(
+            "--resp\r\n"
+            "Content-Type: application/http\r\n"
+            "Content-ID: <response-item-0>\r\n\r\n"
+            "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n"
+            '{"id": "m1", "snippet": "", "payload": {"headers": []}}\r\n'
+            "--resp\r\n"
+            "Content-Type: application/http\r\n"
+            "Content-ID: <response-item-1>\r\n\r\n"
+            "HTTP/1.1 429 Too Many Requests\r\n\r\n"
+            "--resp--\r\n"
+        ).encode(),
+    )
+    request = httpx.Request("GET", "https://www.googleapis.com/gmail/v1/users/me/messages/m2")
+    still_limited = httpx.HTTPStatusError("rate limited", request=request, response=httpx.Response(429, request=request))
+
+    with patch("app.workers.tasks._get_sync_status", new_callable=AsyncMock, return_value=MagicMock(sync_token="500")), \
+         patch("app.workers.tasks._update_sync_status", new_callable=AsyncMock) as mock_update, \
+         patch("app.agents.base.settings") as base_settings, \
+         patch.object(GmailAgent, "list_history", new_callable=AsyncMock, return_value=(["m1", "m2"], [], "510")), \
+         patch.object(GmailAgent, "_send", new_callable=AsyncMock, side_effect=[batch, still_limited]) as mock_send, \
+         patch("app.services.cache_writer.upsert_cache_rows", new_callable=AsyncMock) as mock_upsert:
+        base_settings.demo_mode = False
+        await _sync_gmail(sync_db, sample_user_id, sample_access_token)
+
+    assert mock_send.await_args_list[1].args[1].endswith("/messages/m2")
+    mock_upsert.assert_not_called()
+    mock_update.assert_not_called()
+    sync_db.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_gcal_sync_full_resync_on_410_and_drops_cancelled(sync_db, sample_user_id, sample_access_token):
+    from app.agents.gcal_agent import GCalAgent
+    from app.workers.tasks import _sync_gcal
+
+    gone = httpx.HTTPStatusError(
+        "gone",
+        request=httpx.Request("GET", "https://www.googleapis.com/calendar/v3/calendars/primary/events"),
+        response=httpx.Response(410),
+    )
+    full_listing = (
+        [
+            {"id": "ev1", "summary": "Standup", "status": "confirmed",
+             "start": {"dateTime": "2026-03-02T09:00:00+00:00"}, "end": {"dateTime": "2026-03-02T09:15:00+00:00"}},
+            {"id": "ev2", "status": "cancelled"},
+        ],
+        "sync_2",
+    )
+
+    with patch("app.workers.tasks._get_sync_status", new_callable=AsyncMock, return_value=MagicMock(sync_token="old")), \
+         patch("app.workers.tasks._update_sync_status", new_callable=AsyncMock) as mock_update, \
+         patch.object(GCalAgent, "list_event_changes", new_callable=AsyncMock, side_effect=[gone, full_listing]) as mock_list, \
+         patch("app.services.cache_writer.attach_embeddings", new_callable=AsyncMock) as mock_attach, \
+         patch("app.services.cache_writer.upsert_cache_rows", new_callable=AsyncMock) as mock_upsert:
+        await _sync_gcal(sync_db, sample_user_id, sample_access_token)
+
+    assert mock_list.await_args_list[1].kwargs == {"max_results": 200}
+    assert len(mock_attach.call_args.args[3]) == 1
+    assert [r["event_id"] for r in mock_upsert.call_args.args[2]] == ["ev1"]
+    assert mock_update.call_args.kwargs["sync_token"] == "sync_2"
+
+
+@pytest.mark.asyncio
+async def test_drive_sync_applies_changes_incrementally(sync_db, sample_user_id, sample_access_token):
+    from app.agents.drive_agent import DriveAgent
+    from app.workers.tasks import _sync_drive
+
+    changed = [{"id": "f1", "name": "Plan.docx", "mimeType": "application/msword"}]
+
+    with patch("app.workers.tasks._get_sync_status", new_callable=AsyncMock, return_value=MagicMock(sync_token="40")), \
+         patch("app.workers.tasks._update_sync_status", new_callable=AsyncMock) as mock_update, \
+         patch.object(DriveAgent, "list_changes", new_callable=AsyncMock, return_value=(changed, ["f9"], "45")), \
+         patch.object(DriveAgent, "list_all_files", new_callable=AsyncMock) as mock_full, \
+         patch("app.services.cache_writer.attach_embeddings", new_callable=AsyncMock), \
+         patch("app.services.cache_writer.upsert_cache_rows", new_callable=AsyncMock) as mock_upsert:
+        await _sync_drive(sync_db, sample_user_id, sample_access_token)
+
+    mock_full.assert_not_called()
+    assert sync_db.execute.await_count == 1
+    assert [r["file_id"] for r in mock_upsert.call_args.args[2]] == ["f1"]
+    assert mock_update.call_args.kwargs["sync_token"] == "45"
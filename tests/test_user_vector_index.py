@@ -0,0 +1,158 @@
+import math
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import user_vector_index
+from app.services.vector_search import hybrid_search_all, hybrid_search_emails, hybrid_search_events
+
+
+@pytest.fixture(autouse=True)
+def enabled():
+    user_vector_index.clear_user_indexes()
+    with patch.object(user_vector_index.settings, "user_vector_index_enabled", True), \
+         patch("app.services.user_vector_index.cache_get", new_callable=AsyncMock, return_value="v1") as version:
+        yield version
+    user_vector_index.clear_user_indexes()
+
+
+def _rows_result(rows):
+    result = MagicMock()
+    result.mappings.return_value.all.return_value = rows
+    return result
+
+
+def _email(i: int, vector: list[float], sender: str, days_ago: int) -> dict:
+    return {
+        "id": f"id{i}", "email_id": f"e{i}", "subject": f"Subject {i}", "sender": sender, "recipients": None,
+        "body_preview": "", "received_at": datetime.now(timezone.utc) - timedelta(days=days_ago),
+        "embedding": str(vector),
+    }
+
+
+EMAILS = [
+    _email(0, [1.0, 0.0], "Alice <alice@acme.com>", 1),
+    _email(1, [0.8, 0.6], "bob@example.com", 2),
+    _email(2, [0.0, 1.0], "carol@acme.com", 40),
+]
+
+
+@pytest.mark.asyncio
+async def test_warm_index_serves_searches_without_the_database(mock_db, sample_user_id):
+    mock_db.execute = AsyncMock(return_value=_rows_result(EMAILS))
+
+    first = await hybrid_search_emails(mock_db, sample_user_id, "q", limit=2, query_embedding=[2.0, 0.0])
+    second = await hybrid_search_emails(mock_db, sample_user_id, "q", limit=5, query_embedding=[0.0, 1.0],
+                                        sender="ACME.com")
+
+    # One load query; both searches were answered in memory
+    assert mock_db.execute.await_count == 1
+    assert "FROM gmail_cache" in str(mock_db.execute.call_args.args[0])
+    assert [r["email_id"] for r in first] == ["e0", "e1"]
+    assert first[0]["similarity"] == pytest.approx(1.0)
+    assert sorted(r["email_id"] for r in second) == ["e0", "e2"]
+    assert user_vector_index.get_user_index_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_date_filters_apply_to_in_memory_search(mock_db, sample_user_id):
+    mock_db.execute = AsyncMock(return_value=_rows_result(EMAILS))
+
+    results = await hybrid_search_emails(mock_db, sample_user_id, "q", limit=5, query_embedding=[0.0, 1.0],
+                                         date_from=datetime.now(timezone.utc) - timedelta(days=7))
+
+    assert [r["email_id"] for r in results] == ["e1", "e0"]
+
+
+@pytest.mark.asyncio
+async def test_new_sync_version_reloads_index(mock_db, sample_user_id, enabled):
+    mock_db.execute = AsyncMock(return_value=_rows_result(EMAILS))
+
+    await hybrid_search_emails(mock_db, sample_user_id, "q", limit=1, query_embedding=[1.0, 0.0])
+    enabled.return_value = "v2"
+    await hybrid_search_emails(mock_db, sample_user_id, "q", limit=1, query_embedding=[1.0, 0.0])
+
+    assert mock_db.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_oversized_user_stays_on_pgvector(mock_db, sample_user_id):
+    mock_db.execute = AsyncMock(side_effect=lambda stmt, *a: _rows_result(
+        EMAILS if "LIMIT :max_rows" in str(stmt) else
+        [{**EMAILS[0], "similarity": 0.9, "score": 0.9}] if a else []
+    ))
+
+    with patch.object(user_vector_index.settings, "user_vector_index_max_rows", 2):
+        await hybrid_search_emails(mock_db, sample_user_id, "q", limit=1, query_embedding=[1.0, 0.0])
+        await hybrid_search_emails(mock_db, sample_user_id, "q", limit=1, query_embedding=[1.0, 0.0])
+
+    loads = [c for c in mock_db.execute.call_args_list if "LIMIT :max_rows" in str(c.args[0])]
+    assert len(loads) == 1
+    assert user_vector_index.get_user_index_stats()["too_large"] == 1
+
+
+@pytest.mark.asyncio
+async def test_event_attendee_filter_in_memory(mock_db, sample_user_id):
+    start = datetime.now(timezone.utc)
+    events = [
+        {"id": f"id{i}", "event_id": f"ev{i}", "title": "Sync", "description": None, "start_time": start,
+         "end_time": start + timedelta(hours=1), "attendees": {"list": [{"email": email}]}, "location": None,
+         "embedding": "[1,0]"}
+        for i, email in enumerate(["sam@acme.com", "kim@acme.com"])
+    ]
+    mock_db.execute = AsyncMock(return_value=_rows_result(events))
+
+    results = await hybrid_search_events(mock_db, sample_user_id, "q", attendees=["Kim@Acme.com"],
+                                         query_embedding=[1.0, 0.0])
+
+    assert [r["event_id"] for r in results] == ["ev1"]
+
+
+@pytest.mark.asyncio
+async def test_search_all_skips_union_branches_served_in_memory(mock_db, sample_user_id):
+    user_vector_index._cache.put(
+        (str(sample_user_id), "gmail"),
+        await user_vector_index._load(AsyncMock(execute=AsyncMock(return_value=_rows_result(EMAILS))),
+                                      sample_user_id, "gmail", "v1"),
+    )
+    mock_db.execute = AsyncMock(return_value=_rows_result([]))
+    searches = {"gmail": {"query": "q", "limit": 1}}
+
+    grouped = await hybrid_search_all(mock_db, sample_user_id, searches, query_embeddings={"q": [1.0, 0.0]})
+
+    mock_db.execute.assert_not_called()
+    assert [r["email_id"] for r in grouped["gmail"]] == ["e0"]
+
+
+def test_lru_evicts_by_bytes():
+    import numpy as np
+
+    def index(n: int) -> user_vector_index.UserVectorIndex:
+        return user_vector_index.UserVectorIndex(
+            service="drive", version=None, rows=[{}] * n, matrix=np.zeros((n, 256), dtype=np.float32), times={},
+        )
+
+    cache = user_vector_index._IndexCache()
+    with patch.object(user_vector_index.settings, "user_vector_index_max_bytes", 3 * index(100).nbytes):
+        for user in ("a", "b", "c", "d"):
+            cache.put((user, "drive"), index(100))
+        cache.put(("huge", "drive"), index(1000))
+
+    assert cache.stats()["indexes"] == 3
+    assert cache.get(("a", "drive"), None) is None
+    assert cache.get(("d", "drive"), None) is not None
+    assert cache.get(("huge", "drive"), None) is None
+
+
+@pytest.mark.asyncio
+async def test_in_memory_decay_matches_sql_ranking(mock_db, sample_user_id):
+    # e1 is slightly less similar than e2 but 38 days more recent
+    emails = [_email(1, [0.6, 0.8], "a@x.com", 1), _email(2, [0.0, 1.0], "a@x.com", 40)]
+    mock_db.execute = AsyncMock(return_value=_rows_result(emails))
+
+    with patch.object(user_vector_index.settings, "temporal_decay", {"gmail": "log"}):
+        results = await hybrid_search_emails(mock_db, sample_user_id, "q", limit=1, query_embedding=[0.0, 1.0])
+
+    assert [r["email_id"] for r in results] == ["e1"]
+    assert results[0]["score"] == pytest.approx(0.8 / math.log(3), rel=1e-3)
@@ -0,0 +1,279 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import vector_search
+from app.services.vector_search import hybrid_search_all, hybrid_search_emails, hybrid_search_events
+
+
+def _result(rows):
+    result = MagicMock()
+    result.mappings.return_value.all.return_value = rows
+    return result
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_all_runs_one_union_query(mock_db, sample_user_id):
+    now = datetime.now(timezone.utc)
+    mock_db.execute = AsyncMock(side_effect=lambda *a, **k: _result([
+        {"source": "gmail", "id": "1", "email_id": "e1", "subject": "Acme contract", "sender": "a@acme.com",
+         "body_preview": "", "received_at": now, "similarity": 0.9, "score": 0.9},
+        {"source": "drive", "id": "2", "file_id": "f1", "name": "Acme deck", "mime_type": "application/pdf",
+         "content_preview": "", "modified_at": now, "similarity": 0.8, "score": 0.8},
+    ] if len(a) > 1 else []))
+    searches = {
+        "gmail": {"query": "Acme", "sender": "acme.com", "date_from": None, "date_to": None, "limit": 5},
+        "gcal": {"query": "Acme", "date_from": now, "date_to": None, "attendees": ["Sam@Acme.com"], "limit": 10},
+        "drive": {"query": "Acme deck", "mime_type": None, "date_from": None, "date_to": None, "limit": 5},
+    }
+
+    with patch("app.services.vector_search.generate_embedding", new_callable=AsyncMock, return_value=[0.2]) as gen, \
+         patch.object(vector_search.settings, "vector_search_refill_factor", 1), \
+         patch.object(vector_search.settings, "vector_search_exact_fallback", False):
+        grouped = await hybrid_search_all(mock_db, sample_user_id, searches, query_embeddings={"Acme": [0.1]})
+
+    # SET LOCAL for the ANN search breadth, then the single search statement
+    assert mock_db.execute.await_count == 2
+    assert str(mock_db.execute.call_args_list[0].args[0]).startswith("SET LOCAL")
+    sql = str(mock_db.execute.call_args.args[0])
+    params = mock_db.execute.call_args.args[1]
+    assert sql.count("UNION ALL") == 2
+    assert params["gmail_sender"] == "%acme.com%"
+    assert params["gcal_limit"] == 10
+    assert "attendees @> CAST(:gcal_attendee_0 AS jsonb)" in sql
+    assert params["gcal_attendee_0"] == '{"list": [{"email": "sam@acme.com"}]}'
+    assert params["gmail_embedding"] == "[0.1]"
+    assert params["drive_embedding"] == "[0.2]"
+    gen.assert_awaited_once_with("Acme deck")
+
+    assert grouped["gmail"][0]["email_id"] == "e1"
+    assert "score" in grouped["gmail"][0]
+    assert grouped["gcal"] == []
+    assert grouped["drive"][0]["file_id"] == "f1"
+
+
+@pytest.mark.asyncio
+async def test_search_sets_probes_or_ef_search_from_settings(mock_db, sample_user_id):
+    from app.db import vector_index
+    from app.services.vector_search import hybrid_search_files
+
+    mock_db.execute = AsyncMock(return_value=_result([]))
+    with patch.object(vector_index.settings, "vector_index_type", "hnsw"), \
+         patch.object(vector_index.settings, "hnsw_ef_search", 80):
+        await hybrid_search_files(mock_db, sample_user_id, "q", query_embedding=[0.1])
+    assert str(mock_db.execute.call_args_list[0].args[0]) == "SET LOCAL hnsw.ef_search = 80"
+
+    mock_db.execute.reset_mock()
+    with patch.object(vector_index.settings, "vector_index_type", "ivfflat"), \
+         patch.object(vector_index.settings, "ivfflat_probes", 7):
+        await hybrid_search_files(mock_db, sample_user_id, "q", query_embedding=[0.1])
+    assert str(mock_db.execute.call_args_list[0].args[0]) == "SET LOCAL ivfflat.probes = 7"
+
+
+def test_vector_index_kwargs_follow_settings():
+    from app.db import vector_index
+
+    with patch.object(vector_index.settings, "vector_index_type", "ivfflat"), \
+         patch.object(vector_index.settings, "ivfflat_lists", 0):
+        assert vector_index.vector_index_kwargs(5_000)["postgresql_with"] == {"lists": 10}
+        assert vector_index.vector_index_kwargs(400_000)["postgresql_with"] == {"lists": 400}
+        assert vector_index.vector_index_kwargs(4_000_000)["postgresql_with"] == {"lists": 2000}
+    with patch.object(vector_index.settings, "vector_index_type", "hnsw"):
+        kwargs = vector_index.vector_index_kwargs(5_000)
+    assert kwargs["postgresql_using"] == "hnsw"
+    assert kwargs["postgresql_with"] == {"m": 16, "ef_construction": 64}
+
+
+def _email_row(i):
+    return {"id": str(i), "email_id": f"e{i}", "subject": "s", "sender": "a@acme.com",
+            "body_preview": "", "received_at": None, "similarity": 0.9 - i / 100,
+            "score": 0.9 - i / 100}
+
+
+def _statements(db):
+    return [str(c.args[0]) for c in db.execute.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_short_filtered_result_is_widened_then_refilled(mock_db, sample_user_id):
+    responses = iter([[_email_row(0)], [_email_row(0), _email_row(1)], [_email_row(i) for i in range(5)]])
+    mock_db.execute = AsyncMock(side_effect=lambda stmt, *a: _result(next(responses) if a else []))
+
+    results = await hybrid_search_emails(mock_db, sample_user_id, "q", sender="acme.com", limit=5, query_embedding=[0.1])
+
+    assert len(results) == 5
+    statements = _statements(mock_db)
+    assert "SET LOCAL ivfflat.probes = 10" in statements
+    assert "SET LOCAL ivfflat.probes = 40" in statements
+    assert "SET LOCAL enable_indexscan = off" in statements
+    assert statements[-1] == "SET LOCAL enable_indexscan = on"
+
+
+@pytest.mark.asyncio
+async def test_full_result_does_not_refill(mock_db, sample_user_id):
+    mock_db.execute = AsyncMock(side_effect=lambda stmt, *a: _result([_email_row(i) for i in range(3)] if a else []))
+
+    results = await hybrid_search_emails(mock_db, sample_user_id, "q", limit=3, query_embedding=[0.1])
+
+    assert len(results) == 3
+    assert sum(1 for s in _statements(mock_db) if "FROM gmail_cache" in s) == 1
+
+
+@pytest.mark.asyncio
+async def test_attendee_filter_runs_in_sql_before_limit(mock_db, sample_user_id):
+    rows = [{"id": str(i), "event_id": f"ev{i}", "title": "Sync", "description": None, "start_time": None,
+             "end_time": None, "attendees": {"list": [{"email": "sam@acme.com"}]}, "location": None,
+             "similarity": 0.8, "score": 0.8} for i in range(4)]
+    mock_db.execute = AsyncMock(side_effect=lambda stmt, *a: _result(rows if a else []))
+
+    results = await hybrid_search_events(
+        mock_db, sample_user_id, "sync", attendees=["sam@acme.com"], limit=4, query_embedding=[0.1]
+    )
+
+    # Every row the query returns is kept: no Python post-filter after LIMIT
+    assert len(results) == 4
+    search = next(c for c in mock_db.execute.call_args_list if len(c.args) > 1)
+    assert "attendees @> CAST(:attendee_0 AS jsonb)" in str(search.args[0])
+
+
+def test_attendee_index_migration_lowercases_existing_emails():
+    import importlib.util
+    from pathlib import Path
+
+    path = (Path(__file__).parents[1] / "app/db/migrations/versions/3d9e7b25f1c0_gin_index_on_gcal_attendees.py")
+    spec = importlib.util.spec_from_file_location("attendee_index_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    with patch.object(migration, "op") as mock_op:
+        migration.upgrade()
+
+    backfill = " ".join(mock_op.execute.call_args.args[0].split())
+    assert backfill.startswith("UPDATE gcal_cache SET attendees = jsonb_set(attendees, '{list}'")
+    assert "jsonb_build_object('email', lower(a->>'email'))" in backfill
+    # Only rows with a mixed-case email are rewritten
+    assert "WHERE a->>'email' <> lower(a->>'email')" in backfill
+    # The rows are fixed before the index is built over them
+    assert [c[0] for c in mock_op.method_calls] == ["execute", "create_index"]
+
+
+@pytest.mark.asyncio
+async def test_iterative_scan_setting_is_applied(mock_db, sample_user_id):
+    from app.db import vector_index
+
+    mock_db.execute = AsyncMock(side_effect=lambda stmt, *a: _result([_email_row(0)] if a else []))
+    with patch.object(vector_index.settings, "vector_iterative_scan", "relaxed_order"):
+        await hybrid_search_emails(mock_db, sample_user_id, "q", limit=1, query_embedding=[0.1])
+
+    assert "SET LOCAL ivfflat.iterative_scan = relaxed_order" in _statements(mock_db)
+
+
+@pytest.mark.asyncio
+async def test_binary_quantized_search_reranks_candidates(mock_db, sample_user_id):
+    from app.db import vector_index
+
+    mock_db.execute = AsyncMock(side_effect=lambda stmt, *a: _result([_email_row(i) for i in range(5)] if a else []))
+    with patch.object(vector_index.settings, "vector_binary_quantize", True), \
+         patch.object(vector_index.settings, "vector_storage_type", "halfvec"), \
+         patch.object(vector_index.settings, "vector_rerank_factor", 4), \
+         patch.object(vector_index.settings, "temporal_decay", {}):
+        await hybrid_search_emails(mock_db, sample_user_id, "q", limit=5, query_embedding=[0.1])
+
+    search = next(c for c in mock_db.execute.call_args_list if len(c.args) > 1)
+    sql, params = str(search.args[0]), search.args[1]
+    assert ("(binary_quantize(embedding)::bit(1536)) <~> "
+            "(binary_quantize(CAST(:embedding AS halfvec))::bit(1536))") in sql
+    assert sql.rstrip().endswith("ORDER BY embedding <=> CAST(:embedding AS halfvec) LIMIT :limit")
+    assert params["candidates"] == 20
+
+
+def test_index_ddl_follows_storage_settings():
+    from app.db import vector_index
+
+    with patch.object(vector_index.settings, "vector_storage_type", "halfvec"), \
+         patch.object(vector_index.settings, "vector_binary_quantize", False), \
+         patch.object(vector_index.settings, "vector_index_type", "hnsw"):
+        ddl = vector_index._create_index_sql("gmail_cache", "ix", vector_index.vector_index_kwargs(10))
+        assert ddl == ("CREATE INDEX ix ON gmail_cache USING hnsw (embedding halfvec_cosine_ops) "
+                       "WITH (m = 16, ef_construction = 64)")
+        assert vector_index.embedding_sql_type() == "halfvec(1536)"
+
+    with patch.object(vector_index.settings, "vector_binary_quantize", True), \
+         patch.object(vector_index.settings, "vector_index_type", "hnsw"):
+        ddl = vector_index._create_index_sql("gmail_cache", "ix", vector_index.vector_index_kwargs(10))
+    assert "((binary_quantize(embedding)::bit(1536)) bit_hamming_ops)" in ddl
+
+
+@pytest.mark.asyncio
+async def test_coarse_search_scans_truncated_vectors(mock_db, sample_user_id):
+    from app.db import vector_index
+
+    mock_db.execute = AsyncMock(side_effect=lambda stmt, *a: _result([_email_row(i) for i in range(5)] if a else []))
+    with patch.object(vector_index.settings, "embedding_search_dimensions", 256), \
+         patch.object(vector_index.settings, "vector_rerank_factor", 4), \
+         patch.object(vector_index.settings, "temporal_decay", {}):
+        await hybrid_search_emails(mock_db, sample_user_id, "q", limit=5, query_embedding=[0.1])
+
+    search = next(c for c in mock_db.execute.call_args_list if len(c.args) > 1)
+    sql, params = str(search.args[0]), search.args[1]
+    assert ("(subvector(embedding, 1, 256)::vector(256)) <=> "
+            "(subvector(CAST(:embedding AS vector), 1, 256)::vector(256))") in sql
+    assert sql.rstrip().endswith("ORDER BY embedding <=> CAST(:embedding AS vector) LIMIT :limit")
+    assert params["candidates"] == 20
+
+
+def test_index_ddl_for_coarse_dimensions():
+    from app.db import vector_index
+
+    with patch.object(vector_index.settings, "embedding_search_dimensions", 512), \
+         patch.object(vector_index.settings, "vector_index_type", "hnsw"):
+        ddl = vector_index._create_index_sql("gmail_cache", "ix", vector_index.vector_index_kwargs(10))
+        assert "((subvector(embedding, 1, 512)::vector(512)) vector_cosine_ops)" in ddl
+        with patch.object(vector_index.settings, "vector_binary_quantize", True):
+            ddl = vector_index._create_index_sql("gmail_cache", "ix", vector_index.vector_index_kwargs(10))
+        assert "((binary_quantize(subvector(embedding, 1, 512)::vector(512))::bit(512)) bit_hamming_ops)" in ddl
+
+    # A search width at or above the stored width means a single-stage search
+    with patch.object(vector_index.settings, "embedding_search_dimensions", 1536):
+        assert not vector_index.is_two_stage()
+
+
+def test_column_conversion_truncates_or_clears():
+    from app.db import vector_index
+
+    with patch.object(vector_index, "EMBEDDING_DIM", 512):
+        narrow = vector_index._convert_column_sql("gmail_cache", "vector(1536)", "vector(512)")
+        widen = vector_index._convert_column_sql("gmail_cache", "vector(256)", "vector(512)")
+    assert narrow.endswith("USING l2_normalize(subvector(embedding, 1, 512))::vector(512)")
+    assert widen.endswith("USING NULL")
+
+
+@pytest.mark.asyncio
+async def test_decay_is_scored_in_sql_over_an_overfetched_set(mock_db, sample_user_id):
+    mock_db.execute = AsyncMock(side_effect=lambda stmt, *a: _result([_email_row(i) for i in range(3)] if a else []))
+    with patch.object(vector_search.settings, "temporal_decay", {"gmail": "log", "drive": "exp"}), \
+         patch.object(vector_search.settings, "temporal_decay_overfetch", 4), \
+         patch.object(vector_search.settings, "temporal_decay_half_life_days", 14.0):
+        results = await hybrid_search_emails(mock_db, sample_user_id, "q", limit=3, query_embedding=[0.1])
+        sql, params = vector_search._search_sql("drive", sample_user_id, [0.1], [], {}, 5)
+
+    search = next(c for c in mock_db.execute.call_args_list if len(c.args) > 1)
+    email_sql = " ".join(str(search.args[0]).split())
+    assert "LIMIT :fetch ) nearest ORDER BY score DESC LIMIT :limit" in email_sql
+    assert "similarity * (1 / ln(coalesce(abs(extract(epoch FROM (now() - received_at)))" in email_sql
+    assert search.args[1]["fetch"] == 12
+    # Rows come back in SQL score order
+    assert [r["email_id"] for r in results] == ["e0", "e1", "e2"]
+
+    assert "power(0.5, coalesce(abs(extract(epoch FROM (now() - modified_at)))::float8 / 86400, 0) / 14.0)" in sql
+    assert params["fetch"] == 20
+
+
+def test_undecayed_search_ranks_by_similarity_alone(sample_user_id):
+    with patch.object(vector_search.settings, "temporal_decay", {"gmail": "none"}):
+        sql, params = vector_search._search_sql("gmail", sample_user_id, [0.1], [], {}, 5)
+
+    assert "nearest" not in sql
+    assert "AS score" in sql
+    assert "fetch" not in params